@@ -0,0 +1,125 @@
+"""
+Concurrency primitives for fanning work out to R2R
+"""
+import asyncio
+import time
+from typing import Any, AsyncIterable, Awaitable, Callable, Iterable, List, Optional, Tuple
+
+from app.core.tracing import span
+
+class TokenBucket:
+    """Async token-bucket rate limiter shared across requests"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    async def acquire(self, tokens: float = 1.0):
+        """Wait until `tokens` are available and take them"""
+        if self.rate <= 0:
+            return  # Rate limiting disabled
+
+        # The lock keeps waiters in FIFO order while one of them sleeps for a refill
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+
+async def run_bounded(
+    items: Iterable[Any],
+    worker: Callable[[Any], Awaitable[Any]],
+    max_concurrency: int,
+    rate_limiter: Optional[TokenBucket] = None,
+    on_result: Optional[Callable[[int, Any], Awaitable[None]]] = None,
+) -> List[Any]:
+    """Run `worker` over `items` with at most `max_concurrency` in flight.
+
+    Results are returned in the original item order. `on_result` is awaited with
+    (index, result) as each item finishes. If the caller is cancelled, or a worker
+    raises, every sibling is cancelled before the exception propagates.
+    """
+    items = list(items)
+    results: List[Any] = [None] * len(items)
+    if not items:
+        return results
+
+    pending = iter(enumerate(items))
+
+    async def drain():
+        for index, item in pending:
+            if rate_limiter:
+                with span("rate_limit_wait"):
+                    await rate_limiter.acquire()
+            result = await worker(item)
+            results[index] = result
+            if on_result:
+                await on_result(index, result)
+
+    workers = [asyncio.create_task(drain()) for _ in range(max(1, min(max_concurrency, len(items))))]
+    try:
+        await asyncio.gather(*workers)
+    except BaseException:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        raise
+
+    return results
+
+async def run_bounded_stream(
+    items: AsyncIterable[Any],
+    worker: Callable[[Any], Awaitable[Any]],
+    max_concurrency: int,
+    rate_limiter: Optional[TokenBucket] = None,
+    on_result: Optional[Callable[[int, Any], Awaitable[None]]] = None,
+) -> List[Any]:
+    """Like run_bounded, but pulls items from an async iterable as workers free up.
+
+    Work on early items starts while later ones are still being produced. An
+    exception from the iterable cancels in-flight work just like a worker failure.
+    """
+    results: List[Any] = []
+    iterator = items.__aiter__()
+    lock = asyncio.Lock()  # Async generators cannot be advanced by two tasks at once
+
+    async def next_item() -> Optional[Tuple[int, Any]]:
+        async with lock:
+            try:
+                item = await iterator.__anext__()
+            except StopAsyncIteration:
+                return None
+            results.append(None)
+            return len(results) - 1, item
+
+    async def drain():
+        while (entry := await next_item()) is not None:
+            index, item = entry
+            if rate_limiter:
+                with span("rate_limit_wait"):
+                    await rate_limiter.acquire()
+            result = await worker(item)
+            results[index] = result
+            if on_result:
+                await on_result(index, result)
+
+    workers = [asyncio.create_task(drain()) for _ in range(max(1, max_concurrency))]
+    try:
+        await asyncio.gather(*workers)
+    except BaseException:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        raise
+
+    return results
@@ -2,6 +2,7 @@
 Application configuration settings
 """
 import os
+import tempfile
 from typing import List
 from dotenv import load_dotenv
 
@@ -29,7 +30,93 @@ class Settings(BaseSettings):
     
     # R2R Service
     r2r_base_url: str = os.getenv("R2R_BASE_URL", "http://localhost:7272")
-    
+    r2r_max_connections: int = int(os.getenv("R2R_MAX_CONNECTIONS", "50"))
+    r2r_max_keepalive_connections: int = int(os.getenv("R2R_MAX_KEEPALIVE_CONNECTIONS", "20"))
+    r2r_keepalive_expiry: float = float(os.getenv("R2R_KEEPALIVE_EXPIRY", "30"))
+    r2r_connect_timeout: float = float(os.getenv("R2R_CONNECT_TIMEOUT", "5"))
+    r2r_read_timeout: float = float(os.getenv("R2R_READ_TIMEOUT", "60"))
+    r2r_write_timeout: float = float(os.getenv("R2R_WRITE_TIMEOUT", "30"))
+    r2r_pool_timeout: float = float(os.getenv("R2R_POOL_TIMEOUT", "2"))
+    r2r_http2: bool = os.getenv("R2R_HTTP2", "false").lower() == "true"
+    r2r_retry_attempts: int = int(os.getenv("R2R_RETRY_ATTEMPTS", "3"))
+    r2r_retry_base_delay: float = float(os.getenv("R2R_RETRY_BASE_DELAY", "0.5"))
+    r2r_retry_max_delay: float = float(os.getenv("R2R_RETRY_MAX_DELAY", "10"))
+    r2r_breaker_failure_threshold: int = int(os.getenv("R2R_BREAKER_FAILURE_THRESHOLD", "5"))
+    r2r_breaker_reset_timeout: float = float(os.getenv("R2R_BREAKER_RESET_TIMEOUT", "30"))
+    r2r_search_concurrency: int = int(os.getenv("R2R_SEARCH_CONCURRENCY", "16"))
+    r2r_completion_concurrency: int = int(os.getenv("R2R_COMPLETION_CONCURRENCY", "8"))
+    r2r_documents_concurrency: int = int(os.getenv("R2R_DOCUMENTS_CONCURRENCY", "4"))
+    r2r_discovery_ports: str = os.getenv("R2R_DISCOVERY_PORTS", "7272,8000,8080,7273")
+    r2r_discovery_timeout: float = float(os.getenv("R2R_DISCOVERY_TIMEOUT", "1.5"))
+    r2r_discovery_retry_interval: float = float(os.getenv("R2R_DISCOVERY_RETRY_INTERVAL", "30"))
+    r2r_discovery_cache_file: str = os.getenv("R2R_DISCOVERY_CACHE_FILE", os.path.join(tempfile.gettempdir(), "silab_r2r_discovery.json"))
+
+    # RAG completion cache
+    completion_cache_enabled: bool = os.getenv("COMPLETION_CACHE_ENABLED", "true").lower() == "true"
+    completion_cache_max_entries: int = int(os.getenv("COMPLETION_CACHE_MAX_ENTRIES", "2048"))
+    completion_cache_ttl_seconds: float = float(os.getenv("COMPLETION_CACHE_TTL_SECONDS", "86400"))
+    completion_cache_mongo_enabled: bool = os.getenv("COMPLETION_CACHE_MONGO_ENABLED", "false").lower() == "true"
+    completion_cache_collection: str = os.getenv("COMPLETION_CACHE_COLLECTION", "rag_completion_cache")
+
+    # Retrieval context packing
+    context_search_limit: int = int(os.getenv("CONTEXT_SEARCH_LIMIT", "5"))
+    context_token_budget: int = int(os.getenv("CONTEXT_TOKEN_BUDGET", "600"))
+    context_max_chunks: int = int(os.getenv("CONTEXT_MAX_CHUNKS", "3"))
+    context_min_chunk_tokens: int = int(os.getenv("CONTEXT_MIN_CHUNK_TOKENS", "40"))
+    context_overlap_threshold: float = float(os.getenv("CONTEXT_OVERLAP_THRESHOLD", "0.8"))
+
+    # Uploads
+    max_upload_bytes: int = int(os.getenv("MAX_UPLOAD_BYTES", str(250 * 1024 * 1024)))
+    upload_chunk_size: int = int(os.getenv("UPLOAD_CHUNK_SIZE", str(64 * 1024)))
+
+    # Compliance analysis
+    analysis_max_concurrency: int = int(os.getenv("ANALYSIS_MAX_CONCURRENCY", "6"))
+    analysis_rate_limit_per_second: float = float(os.getenv("ANALYSIS_RATE_LIMIT_PER_SECOND", "5"))
+    analysis_rate_limit_burst: int = int(os.getenv("ANALYSIS_RATE_LIMIT_BURST", "5"))
+    analysis_batch_enabled: bool = os.getenv("ANALYSIS_BATCH_ENABLED", "false").lower() == "true"
+    analysis_batch_token_budget: int = int(os.getenv("ANALYSIS_BATCH_TOKEN_BUDGET", "1500"))
+    analysis_batch_small_section_tokens: int = int(os.getenv("ANALYSIS_BATCH_SMALL_SECTION_TOKENS", "300"))
+    analysis_batch_max_sections: int = int(os.getenv("ANALYSIS_BATCH_MAX_SECTIONS", "5"))
+    analysis_batch_max_output_tokens: int = int(os.getenv("ANALYSIS_BATCH_MAX_OUTPUT_TOKENS", "2000"))
+    line_batch_max_lines: int = int(os.getenv("LINE_BATCH_MAX_LINES", "25"))
+    line_batch_token_budget: int = int(os.getenv("LINE_BATCH_TOKEN_BUDGET", "1000"))
+    line_batch_max_output_tokens: int = int(os.getenv("LINE_BATCH_MAX_OUTPUT_TOKENS", "2500"))
+    workaround_mode: str = os.getenv("WORKAROUND_MODE", "eager").lower()  # eager, lazy or prefetch
+    workaround_cache_max_entries: int = int(os.getenv("WORKAROUND_CACHE_MAX_ENTRIES", "5000"))
+    workaround_prefetch_workers: int = int(os.getenv("WORKAROUND_PREFETCH_WORKERS", "1"))
+    workaround_collection: str = os.getenv("WORKAROUND_COLLECTION", "section_workarounds")
+    structured_output_enabled: bool = os.getenv("STRUCTURED_OUTPUT_ENABLED", "false").lower() == "true"
+    structured_output_reask: bool = os.getenv("STRUCTURED_OUTPUT_REASK", "true").lower() == "true"
+    analysis_store_collection: str = os.getenv("ANALYSIS_STORE_COLLECTION", "compliance_analyses")
+    analysis_job_workers: int = int(os.getenv("ANALYSIS_JOB_WORKERS", "2"))
+    analysis_job_collection: str = os.getenv("ANALYSIS_JOB_COLLECTION", "analysis_jobs")
+
+    # Model cascade
+    # Completion models, cheapest first; the last one does the detailed analysis and workarounds
+    model_tiers: str = os.getenv("MODEL_TIERS", "openai/gpt-4o-mini")
+    cascade_confidence_threshold: float = float(os.getenv("CASCADE_CONFIDENCE_THRESHOLD", "0.8"))
+    cascade_triage_max_tokens: int = int(os.getenv("CASCADE_TRIAGE_MAX_TOKENS", "150"))
+
+    # Near-duplicate section reuse
+    similarity_enabled: bool = os.getenv("SIMILARITY_ENABLED", "false").lower() == "true"
+    similarity_threshold: float = float(os.getenv("SIMILARITY_THRESHOLD", "0.95"))
+    # Shorter sections are only reused when their word 3-grams match exactly
+    similarity_exact_match_words: int = int(os.getenv("SIMILARITY_EXACT_MATCH_WORDS", "200"))
+    similarity_num_perm: int = int(os.getenv("SIMILARITY_NUM_PERM", "64"))
+    similarity_bands: int = int(os.getenv("SIMILARITY_BANDS", "16"))
+    similarity_shingle_size: int = int(os.getenv("SIMILARITY_SHINGLE_SIZE", "3"))
+    similarity_max_memory_entries: int = int(os.getenv("SIMILARITY_MAX_MEMORY_ENTRIES", "50000"))
+    similarity_collection: str = os.getenv("SIMILARITY_COLLECTION", "section_similarity")
+
+    # Rule-based pre-screening
+    prescreen_enabled: bool = os.getenv("PRESCREEN_ENABLED", "true").lower() == "true"
+    prescreen_rules_file: str = os.getenv("PRESCREEN_RULES_FILE", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "compliance_rules.json"))
+
+    # Observability
+    metrics_enabled: bool = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    # Append every analysis trace as OTLP/JSON lines to this file; empty disables export
+    trace_export_file: str = os.getenv("TRACE_EXPORT_FILE", "")
+
     # Server
     host: str = os.getenv("HOST", "0.0.0.0")
     port: int = int(os.getenv("PORT", "8000"))
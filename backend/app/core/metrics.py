@@ -0,0 +1,253 @@
+"""
+In-process metrics registry with Prometheus text exposition
+"""
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from fastapi import Request
+from fastapi.exception_handlers import http_exception_handler
+from starlette.exceptions import HTTPException as StarletteHTTPException
+
+# Latency buckets in seconds, from fast local calls to slow LLM completions
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+def escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{name}="{escape_label_value(value)}"' for name, value in zip(names, values)]
+    if extra is not None:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+class Metric(ABC):
+    """A named metric family with one child per label combination"""
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+
+    @abstractmethod
+    def _new_child(self):
+        """A fresh child for one label combination"""
+
+    def labels(self, *values: str):
+        """Child for these label values; cache it on hot paths"""
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {key}")
+            child = self._children[key] = self._new_child()
+        return child
+
+    @abstractmethod
+    def samples(self) -> List[str]:
+        """Exposition lines for every child"""
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}", *self.samples()]
+
+class CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+class Counter(Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return CounterChild()
+
+    def inc(self, amount: float = 1.0):
+        self.labels().inc(amount)
+
+    def samples(self) -> List[str]:
+        return [f"{self.name}{format_labels(self.labelnames, key)} {format_value(child.value)}" for key, child in self._children.items()]
+
+class GaugeChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        self.value -= amount
+
+    def set(self, value: float):
+        self.value = value
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def _new_child(self):
+        return GaugeChild()
+
+    def samples(self) -> List[str]:
+        return [f"{self.name}{format_labels(self.labelnames, key)} {format_value(child.value)}" for key, child in self._children.items()]
+
+class HistogramChild:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Per bucket, not cumulative; the last is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+    def samples(self) -> List[str]:
+        lines = []
+        for key, child in self._children.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), child.counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{format_labels(self.labelnames, key, ('le', format_value(bound)))} {cumulative}")
+            labels = format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {format_value(child.sum)}")
+            lines.append(f"{self.name}_count{labels} {child.count}")
+        return lines
+
+class MetricsRegistry:
+    """Holds metric families and renders them in the Prometheus text format"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def _register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+# Global registry and the application's metrics
+metrics = MetricsRegistry()
+
+http_requests_total = metrics.counter("silab_http_requests_total", "HTTP requests by route and status", ("method", "route", "status"))
+http_request_duration = metrics.histogram("silab_http_request_duration_seconds", "HTTP request latency by route", ("method", "route"))
+http_requests_in_flight = metrics.gauge("silab_http_requests_in_flight", "HTTP requests being served", ("method",))
+http_exceptions_total = metrics.counter("silab_http_exceptions_total", "Unhandled exceptions and exceptions answered with a 5xx, by route and type", ("route", "exception"))
+
+r2r_requests_total = metrics.counter("silab_r2r_requests_total", "R2R requests by endpoint and status", ("endpoint", "status"))
+r2r_request_duration = metrics.histogram("silab_r2r_request_duration_seconds", "R2R request latency by endpoint", ("endpoint",))
+r2r_requests_in_flight = metrics.gauge("silab_r2r_requests_in_flight", "R2R requests awaiting a response", ("endpoint",))
+r2r_errors_total = metrics.counter("silab_r2r_errors_total", "R2R request errors by endpoint and exception type", ("endpoint", "exception"))
+llm_tokens_total = metrics.counter("silab_llm_tokens_total", "LLM tokens reported by R2R completions", ("type",))
+cascade_tier_calls_total = metrics.counter("silab_cascade_tier_calls_total", "Model cascade calls by tier, model and outcome", ("tier", "model", "outcome"))
+cascade_tier_duration = metrics.histogram("silab_cascade_tier_duration_seconds", "Model cascade call latency by tier", ("tier", "model"))
+
+document_sections = metrics.histogram(
+    "silab_compliance_document_sections", "Sections per analyzed document",
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 5000)
+)
+section_violations = metrics.histogram(
+    "silab_compliance_section_violations", "Violations per analyzed section",
+    buckets=(0, 1, 2, 3, 5, 10, 20)
+)
+
+class MetricsMiddleware:
+    """ASGI middleware recording per-route latency, status, in-flight and exception metrics.
+
+    Routes are labelled by their path template (e.g. /compliance/jobs/{job_id}) so the
+    label set stays bounded; requests that match no route share the "unmatched" label.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = 500
+        started = time.perf_counter()
+        # The route is only known once the router has matched, so in-flight is tracked per method
+        in_flight = http_requests_in_flight.labels(method)
+        in_flight.inc()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        except Exception as e:
+            http_exceptions_total.labels(route_template(scope), type(e).__name__).inc()
+            raise
+        finally:
+            in_flight.dec()
+            route = route_template(scope)
+            http_request_duration.labels(method, route).observe(time.perf_counter() - started)
+            http_requests_total.labels(method, route, str(status)).inc()
+
+def route_template(scope) -> str:
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+    return path if path else "unmatched"
+
+async def count_server_errors(request: Request, exc: StarletteHTTPException):
+    """HTTPException handler counting the exception behind each 5xx before the default response.
+
+    Route handlers turn failures into HTTPException(500) inside an except block, and
+    services re-raise them as plain Exceptions, so the innermost exception of the
+    chain is counted.
+    """
+    if exc.status_code >= 500:
+        original = exc
+        while (original.__cause__ or original.__context__) is not None:
+            original = original.__cause__ or original.__context__
+        http_exceptions_total.labels(route_template(request.scope), type(original).__name__).inc()
+    return await http_exception_handler(request, exc)
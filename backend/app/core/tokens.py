@@ -0,0 +1,16 @@
+"""
+Lightweight token estimates for prompt budgeting
+"""
+import re
+
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+def estimate_tokens(text: str) -> int:
+    """Approximate the LLM token count of `text` without a model tokenizer.
+
+    Words longer than four characters are counted as several tokens, roughly
+    matching BPE tokenizers on English prose.
+    """
+    if not text:
+        return 0
+    return sum(1 + (len(token) - 1) // 4 for token in _TOKEN_PATTERN.findall(text))
@@ -0,0 +1,249 @@
+"""
+Lightweight span tracing for per-stage timing, exportable as OpenTelemetry JSON
+"""
+import contextvars
+import functools
+import json
+import os
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, List, Iterator, Callable
+
+from app.core.config import settings
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+_export_lock = threading.Lock()
+
+class Span:
+    """A timed operation within a trace; child spans inherit it through the async context"""
+
+    __slots__ = ("trace", "span_id", "parent_id", "name", "attributes", "start_ns", "end_ns", "error")
+
+    def __init__(self, trace: "Trace", name: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.trace = trace
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes = attributes
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.error: Optional[str] = None
+
+    @property
+    def duration_ms(self) -> float:
+        end_ns = self.end_ns if self.end_ns is not None else time.time_ns()
+        return (end_ns - self.start_ns) / 1e6
+
+class Trace:
+    """Spans recorded for one request"""
+
+    def __init__(self, name: str):
+        self.trace_id = secrets.token_hex(16)
+        self.name = name
+        self.spans: List[Span] = []
+
+    @property
+    def root(self) -> Span:
+        return self.spans[0]
+
+    def _children(self) -> Dict[Optional[str], List[Span]]:
+        children: Dict[Optional[str], List[Span]] = {}
+        for span in self.spans:
+            children.setdefault(span.parent_id, []).append(span)
+        return children
+
+    @staticmethod
+    def _stage_totals(spans: List[Span]) -> Dict[str, Dict[str, Any]]:
+        stages: Dict[str, Dict[str, Any]] = {}
+        for span in spans:
+            stage = stages.setdefault(span.name, {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+            duration = span.duration_ms
+            stage["count"] += 1
+            stage["total_ms"] += duration
+            stage["max_ms"] = max(stage["max_ms"], duration)
+        for stage in stages.values():
+            stage["total_ms"] = round(stage["total_ms"], 3)
+            stage["max_ms"] = round(stage["max_ms"], 3)
+        return stages
+
+    @staticmethod
+    def _has_ancestor(span: Span, names: tuple, by_id: Dict[str, Span]) -> bool:
+        parent = by_id.get(span.parent_id)
+        while parent is not None:
+            if parent.name in names:
+                return True
+            parent = by_id.get(parent.parent_id)
+        return False
+
+    def _descendants(self, span: Span, children: Dict[Optional[str], List[Span]]) -> List[Span]:
+        found, pending = [], list(children.get(span.span_id, []))
+        while pending:
+            child = pending.pop()
+            found.append(child)
+            pending.extend(children.get(child.span_id, []))
+        return found
+
+    def _critical_path(self, span: Span, children: Dict[Optional[str], List[Span]], depth: int) -> List[Dict[str, Any]]:
+        path = [{"name": span.name, "depth": depth, "duration_ms": round(span.duration_ms, 3), **span_labels(span)}]
+        # Walk back from the span's end: the child that finished last, then the last one
+        # to finish before that child started, and so on
+        chain, boundary = [], span.end_ns or 0
+        for child in sorted(children.get(span.span_id, []), key=lambda child: child.end_ns or 0, reverse=True):
+            if (child.end_ns or 0) <= boundary:
+                chain.append(child)
+                boundary = child.start_ns
+        for child in reversed(chain):
+            path.extend(self._critical_path(child, children, depth + 1))
+        return path
+
+    def critical_path(self) -> List[Dict[str, Any]]:
+        """The spans that determined the trace's end time, in start order with their nesting depth"""
+        return self._critical_path(self.root, self._children(), 0)
+
+    def timings(self, unit_names: tuple = ()) -> Dict[str, Any]:
+        """Per-stage totals for the whole trace and for each outermost span named in `unit_names`.
+
+        Stage totals add up time across concurrent spans, so they can exceed the wall time.
+        """
+        children = self._children()
+        by_id = {span.span_id: span for span in self.spans}
+        units = []
+        for span in self.spans:
+            if span.name in unit_names and not self._has_ancestor(span, unit_names, by_id):
+                units.append({
+                    "name": span.name,
+                    **span_labels(span),
+                    "total_ms": round(span.duration_ms, 3),
+                    "stages": self._stage_totals(self._descendants(span, children))
+                })
+        return {
+            "trace_id": self.trace_id,
+            "total_ms": round(self.root.duration_ms, 3),
+            "stages": self._stage_totals(self.spans[1:]),
+            "units": units,
+            "critical_path": self.critical_path()
+        }
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """The trace as an OTLP/JSON ExportTraceServiceRequest"""
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": [otlp_attribute("service.name", settings.app_name)]},
+                "scopeSpans": [{
+                    "scope": {"name": "silab.tracing"},
+                    "spans": [
+                        {
+                            "traceId": self.trace_id,
+                            "spanId": span.span_id,
+                            **({"parentSpanId": span.parent_id} if span.parent_id else {}),
+                            "name": span.name,
+                            "kind": 1,
+                            "startTimeUnixNano": str(span.start_ns),
+                            "endTimeUnixNano": str(span.end_ns or span.start_ns),
+                            "attributes": [otlp_attribute(key, value) for key, value in span.attributes.items()],
+                            "status": {"code": 2, "message": span.error} if span.error else {"code": 1}
+                        }
+                        for span in self.spans
+                    ]
+                }]
+            }]
+        }
+
+def span_labels(span: Span) -> Dict[str, Any]:
+    return {key: value for key, value in span.attributes.items() if key in ("section", "sections", "section_type")}
+
+def otlp_attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        typed = {"boolValue": value}
+    elif isinstance(value, int):
+        typed = {"intValue": str(value)}
+    elif isinstance(value, float):
+        typed = {"doubleValue": value}
+    elif isinstance(value, (list, tuple)):
+        typed = {"arrayValue": {"values": [{"stringValue": str(item)} for item in value]}}
+    else:
+        typed = {"stringValue": str(value)}
+    return {"key": key, "value": typed}
+
+@contextmanager
+def start_trace(name: str, enabled: bool = True, **attributes) -> Iterator[Optional[Trace]]:
+    """Record a trace rooted at `name` for the enclosed work, or nothing when not enabled"""
+    if not enabled:
+        yield None
+        return
+
+    trace = Trace(name)
+    root = Span(trace, name, None, attributes)
+    trace.spans.append(root)
+    token = _current_span.set(root)
+    try:
+        yield trace
+    except BaseException as e:
+        root.error = type(e).__name__
+        raise
+    finally:
+        root.end_ns = time.time_ns()
+        _current_span.reset(token)
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Optional[Span]]:
+    """Time the enclosed block as a child of the current span; a no-op outside a trace"""
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+
+    current = Span(parent.trace, name, parent.span_id, attributes)
+    parent.trace.spans.append(current)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.error = type(e).__name__
+        raise
+    finally:
+        current.end_ns = time.time_ns()
+        _current_span.reset(token)
+
+def traced(name: str, attributes: Optional[Callable[..., Dict[str, Any]]] = None):
+    """Decorator timing every call of an async function as a span named `name`.
+
+    `attributes`, if given, is called with the function's arguments to label the span.
+    """
+    def decorate(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            if _current_span.get() is None:
+                return await func(*args, **kwargs)
+            with span(name, **(attributes(*args, **kwargs) if attributes else {})):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+def set_span_attribute(key: str, value: Any):
+    """Attach an attribute to the current span, if any"""
+    current = _current_span.get()
+    if current is not None:
+        current.attributes[key] = value
+
+def tracing_requested(timings: bool) -> bool:
+    """Trace when the caller asked for timings or traces are exported to a file"""
+    return timings or bool(settings.trace_export_file)
+
+def export_trace(trace: Trace):
+    """Append the trace as one OTLP/JSON line to TRACE_EXPORT_FILE, if configured"""
+    path = settings.trace_export_file
+    if not path:
+        return
+    line = json.dumps(trace.to_otlp(), ensure_ascii=False)
+    try:
+        with _export_lock:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+    except OSError as e:
+        print(f"⚠️  Could not export trace {trace.trace_id}: {e}")
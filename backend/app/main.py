@@ -1,38 +1,60 @@
 """
 SiLab Backend API - Main Application
 """
+import asyncio
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.exceptions import HTTPException as StarletteHTTPException
 
 from app.core.config import settings
 from app.core.database import connect_to_mongo, close_mongo_connection
 from app.services.r2r_service import r2r_service
-from app.routers import health, test_data, rag, compliance
+from app.services.analysis_jobs import analysis_job_manager
+from app.services.section_similarity import section_similarity_index
+from app.services.model_cascade import model_cascade
+from app.services.workaround_store import workaround_store
+from app.core.metrics import MetricsMiddleware, count_server_errors
+from app.routers import health, test_data, rag, compliance, metrics
+
+async def log_r2r_health():
+    """Report R2R availability without delaying startup"""
+    try:
+        health = await r2r_service.health_check()
+        if health.get("status") == "ok":
+            print("✅ R2R service is healthy and ready")
+        else:
+            print("⚠️  R2R service health check failed:", health.get("message"))
+    except Exception as e:
+        print(f"⚠️  R2R service startup check failed: {e}")
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan events"""
     # Startup
     print(f"🚀 Starting {settings.app_name} v{settings.app_version}")
+    if model_cascade.enabled:
+        # Lines are analyzed in shared batches, which the per-section triage does not cover
+        print(f"🪜 Model cascade: {' → '.join(model_cascade.models)}; line analysis uses {model_cascade.final_model} only")
     
     # Connect to MongoDB
     await connect_to_mongo()
+    await section_similarity_index.load()
     
-    # Check R2R service health
-    try:
-        health = await r2r_service.health_check()
-        if health.get("status") == "ok":
-            print("✅ R2R service is healthy and ready")
-        else:
-            print("⚠️  R2R service health check failed:", health.get("message"))
-    except Exception as e:
-        print(f"⚠️  R2R service startup check failed: {e}")
+    # Locate R2R (cached or parallel probe with a short deadline), then check health in the background
+    await r2r_service.discover()
+    health_task = asyncio.create_task(log_r2r_health())
+    
+    # Start background analysis workers (resumes unfinished jobs)
+    await analysis_job_manager.start()
     
     yield
     
     # Shutdown
     print("🛑 Shutting down application")
+    health_task.cancel()
+    await analysis_job_manager.stop()
+    await workaround_store.stop()
     await close_mongo_connection()
     await r2r_service.close()
 
@@ -55,11 +77,18 @@ def create_application() -> FastAPI:
         allow_headers=["*"],
     )
     
+    # Record per-route latency and status for /metrics
+    if settings.metrics_enabled:
+        app.add_middleware(MetricsMiddleware)
+        app.add_exception_handler(StarletteHTTPException, count_server_errors)
+    
     # Include routers
     app.include_router(health.router)
     app.include_router(test_data.router)
     app.include_router(rag.router)
     app.include_router(compliance.router)
+    if settings.metrics_enabled:
+        app.include_router(metrics.router)
     
     return app
 
@@ -17,12 +17,14 @@ class RAGQuery(BaseModel):
     limit: int = 10
     use_hybrid_search: bool = True
     task_prompt: Optional[str] = None
+    bypass_cache: bool = False
 
 class ComplianceAnalysisRequest(BaseModel):
     """Compliance analysis request model"""
     content: str
     filename: str
     analysis_type: str = "full"
+    previous_analysis_id: Optional[str] = None
 
 class ComplianceViolation(BaseModel):
     """Compliance violation model"""
@@ -1,309 +1,629 @@
 """
 Compliance analysis endpoints - Semantic Section Analysis
 """
-from fastapi import APIRouter, HTTPException, UploadFile, File
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from starlette.requests import ClientDisconnect
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Awaitable, Callable, AsyncIterable, AsyncIterator, Set
 import asyncio
+import hashlib
+import json
 import re
+import time
 
-from app.models.schemas import RAGQuery, ComplianceAnalysisRequest
-from app.services.r2r_service import r2r_service
+from app.core.config import settings
+from app.core.concurrency import TokenBucket, run_bounded, run_bounded_stream
+from app.core.tokens import estimate_tokens
+from app.core.metrics import document_sections, section_violations
+from app.core.tracing import Trace, span, traced, set_span_attribute, start_trace, tracing_requested, export_trace
+from app.models.schemas import ComplianceAnalysisRequest
+from app.services.r2r_service import r2r_service, RetrievalContext
+from app.services.analysis_store import analysis_store
+from app.services.analysis_jobs import analysis_job_manager, JobReporter
+from app.services.rule_screener import rule_screener, ScreenResult, DECISION_VIOLATION, DECISION_ESCALATE
+from app.services.section_similarity import section_similarity_index
+from app.services.model_cascade import model_cascade, OUTCOME_SETTLED
+from app.services.workaround_store import workaround_store, make_workaround_handle
+from app.services.structured_output import ResponseSpec, BatchResponseSpec, object_schema, extract_json, parse_completion, parse_stats
+from app.services.section_parser import DocumentSection, IncrementalSectionParser, parse_document_sections
+from app.services.uploads import UploadTooLargeError, InvalidUploadError, StreamingUpload
 
 router = APIRouter(prefix="/compliance", tags=["compliance"])
 
-class DocumentSection:
-    def __init__(self, title: str, content: str, start_line: int, end_line: int, section_type: str):
-        self.title = title
-        self.content = content
-        self.start_line = start_line
-        self.end_line = end_line
-        self.section_type = section_type  # 'feature', 'architecture', 'compliance', 'business', 'other'
+# Shared across requests so concurrent analyses respect the same R2R budget
+analysis_rate_limiter = TokenBucket(
+    rate=settings.analysis_rate_limit_per_second,
+    capacity=settings.analysis_rate_limit_burst
+)
 
-def parse_document_sections(document_content: str) -> List[DocumentSection]:
-    """Parse document into logical sections based on structure and content"""
-    
-    lines = document_content.split('\n')
-    sections = []
-    current_section_lines = []
-    current_title = ""
-    current_start_line = 1
-    
-    # Patterns to identify section headers
-    header_patterns = [
-        r'^[A-Z][A-Z\s]{2,}$',  # ALL CAPS headers
-        r'^\d+\.\s*[A-Z][A-Z\s]+',  # Numbered sections like "1. INSTANT MONEY"
-        r'^[A-Z][A-Z\s]+:$',  # Headers ending with colon
-        r'^\s*[-=]{3,}\s*$',  # Separator lines
-    ]
-    
-    def classify_section_type(title: str, content: str) -> str:
-        """Classify section based on title and content"""
-        title_lower = title.lower()
-        content_lower = content.lower()
-        
-        # Feature sections
-        if any(keyword in title_lower for keyword in ['feature', 'transfer', 'payment', 'onboarding', 'service', 'investment']):
-            return 'feature'
-        
-        # Technical/Architecture sections  
-        if any(keyword in title_lower for keyword in ['architecture', 'technical', 'security', 'database', 'api']):
-            return 'architecture'
-        
-        # Compliance/Regulatory sections
-        if any(keyword in title_lower for keyword in ['compliance', 'regulatory', 'legal', 'monitoring']):
-            return 'compliance'
-        
-        # Business sections
-        if any(keyword in title_lower for keyword in ['business', 'model', 'strategy', 'marketing', 'partnership']):
-            return 'business'
-        
-        # Data handling sections
-        if any(keyword in content_lower for keyword in ['customer data', 'biometric', 'privacy', 'data sharing']):
-            return 'data_privacy'
-            
-        return 'other'
-    
-    def is_header_line(line: str) -> bool:
-        """Check if a line is likely a section header"""
-        line = line.strip()
-        if not line or len(line) < 3:
-            return False
-            
-        for pattern in header_patterns:
-            if re.match(pattern, line):
-                return True
-        return False
-    
-    for i, line in enumerate(lines, 1):
-        line_stripped = line.strip()
-        
-        # Check if this line is a section header
-        if is_header_line(line_stripped) and current_section_lines:
-            # Save the previous section
-            if current_title and current_section_lines:
-                section_content = '\n'.join(current_section_lines).strip()
-                if section_content:  # Only create section if it has content
-                    section_type = classify_section_type(current_title, section_content)
-                    sections.append(DocumentSection(
-                        title=current_title,
-                        content=section_content,
-                        start_line=current_start_line,
-                        end_line=i-1,
-                        section_type=section_type
-                    ))
-            
-            # Start new section
-            current_title = line_stripped
-            current_section_lines = []
-            current_start_line = i
-            
-        elif is_header_line(line_stripped) and not current_section_lines:
-            # First header
-            current_title = line_stripped
-            current_start_line = i
-            
-        else:
-            # Regular content line
-            if line_stripped:  # Don't add empty lines
-                current_section_lines.append(line_stripped)
-    
-    # Don't forget the last section
-    if current_title and current_section_lines:
-        section_content = '\n'.join(current_section_lines).strip()
-        if section_content:
-            section_type = classify_section_type(current_title, section_content)
-            sections.append(DocumentSection(
-                title=current_title,
-                content=section_content,
-                start_line=current_start_line,
-                end_line=len(lines),
-                section_type=section_type
-            ))
-    
-    # If no sections were found, treat the whole document as one section
-    if not sections:
-        full_content = '\n'.join([line.strip() for line in lines if line.strip()])
-        if full_content:
-            sections.append(DocumentSection(
-                title="Document Content",
-                content=full_content,
-                start_line=1,
-                end_line=len(lines),
-                section_type='other'
-            ))
-    
-    return sections
-
-async def analyze_section_compliance(section: DocumentSection) -> Dict[str, Any]:
-    """Analyze a document section for compliance violations using targeted regulatory analysis"""
-    
-    # Create section-specific analysis prompt based on section type
-    def get_analysis_prompt(section_type: str) -> str:
-        base_prompt = """You are a Philippine financial compliance expert analyzing this business section for regulatory violations.
+def section_fingerprint(section: DocumentSection) -> str:
+    """Fingerprint everything that feeds a section's analysis prompt, ignoring whitespace-only edits"""
+    normalized = "\x1f".join([
+        section.section_type,
+        " ".join(section.title.split()),
+        " ".join(section.content.split())
+    ])
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
 
-SECTION ANALYSIS:
-Title: {title}
-Type: {section_type}
-Content: {content}
-
-""".format(title=section.title, section_type=section.section_type, content=section.content)
+def section_retrieval_key(section: DocumentSection) -> tuple:
+    """Key under which a section's analysis and workaround calls share one regulatory search"""
+    title = re.sub(r'^\d+\.\s*', '', section.title.strip()).rstrip(':')
+    return (section.section_type, " ".join(title.lower().split()))
 
-        if section_type == 'feature':
-            return base_prompt + """Focus on:
+# Regulatory focus per section type, shared by single-section and batched prompts
+SECTION_FOCUS = {
+    'feature': """Focus on:
 - AML/KYC requirements (RA 9160): Customer verification, transaction monitoring, suspicious activity reporting
 - Consumer protection: Risk disclosure, fair pricing, customer rights
-- Banking regulations: Proper authorization, transaction limits, security measures
-
-Respond with violations found in this EXACT format:
-SECTION_ANALYSIS: [Overall compliance assessment]
-VIOLATIONS_FOUND: [number]
-VIOLATION_DETAILS:
-- [Specific violation 1 with regulatory source]
-- [Specific violation 2 with regulatory source]
-BUSINESS_IMPACT: [How these violations affect the business]
-REGULATORY_RISK: [Potential regulatory consequences]"""
-
-        elif section_type in ['data_privacy', 'architecture']:
-            return base_prompt + """Focus on:
+- Banking regulations: Proper authorization, transaction limits, security measures""",
+    'data_privacy': """Focus on:
 - Data Privacy Act (RA 10173): Consent, data minimization, security, retention limits
 - BSP Data Privacy Guidelines: Customer data protection, cross-border transfers
-- Cybersecurity requirements: Data encryption, access controls, breach notification
-
-Respond in this EXACT format:
-SECTION_ANALYSIS: [Overall data protection assessment]
-VIOLATIONS_FOUND: [number]  
-VIOLATION_DETAILS:
-- [Specific violation 1 with regulatory source]
-- [Specific violation 2 with regulatory source]
-BUSINESS_IMPACT: [How these violations affect the business]
-REGULATORY_RISK: [Potential regulatory consequences]"""
-
-        elif section_type == 'compliance':
-            return base_prompt + """Focus on:
+- Cybersecurity requirements: Data encryption, access controls, breach notification""",
+    'compliance': """Focus on:
 - Compliance framework adequacy
 - Regulatory reporting requirements
 - Risk management procedures
-- Oversight and governance
+- Oversight and governance""",
+}
+SECTION_FOCUS['architecture'] = SECTION_FOCUS['data_privacy']
 
-Respond in this EXACT format:
-SECTION_ANALYSIS: [Overall compliance framework assessment]
-VIOLATIONS_FOUND: [number]
-VIOLATION_DETAILS:
-- [Specific violation 1 with regulatory source]
-- [Specific violation 2 with regulatory source]  
-BUSINESS_IMPACT: [How these violations affect the business]
-REGULATORY_RISK: [Potential regulatory consequences]"""
-
-        else:
-            return base_prompt + """Analyze against all applicable Philippine financial regulations including:
+DEFAULT_SECTION_FOCUS = """Analyze against all applicable Philippine financial regulations including:
 - RA 9160 (AML/CFT)
 - RA 10173 (Data Privacy)
 - BSP Banking Regulations
 - SEC Securities Rules
-- Consumer Protection Act
+- Consumer Protection Act"""
+
+SECTION_ASSESSMENT_LABEL = {
+    'data_privacy': "Overall data protection assessment",
+    'architecture': "Overall data protection assessment",
+    'compliance': "Overall compliance framework assessment",
+}
 
-Respond in this EXACT format:
-SECTION_ANALYSIS: [Overall compliance assessment]
+SECTION_RESPONSE_FORMAT = """SECTION_ANALYSIS: [{assessment}]
 VIOLATIONS_FOUND: [number]
 VIOLATION_DETAILS:
 - [Specific violation 1 with regulatory source]
 - [Specific violation 2 with regulatory source]
-BUSINESS_IMPACT: [How these violations affect the business] 
+BUSINESS_IMPACT: [How these violations affect the business]
 REGULATORY_RISK: [Potential regulatory consequences]"""
 
+SECTION_RESPONSE_SPEC = ResponseSpec("section_analysis", object_schema({
+    "section_analysis": {"type": "string"},
+    "violation_count": {"type": "integer"},
+    "violation_details": {"type": "array", "items": {"type": "string"}},
+    "business_impact": {"type": "string"},
+    "regulatory_risk": {"type": "string"}
+}), SECTION_RESPONSE_FORMAT)
+
+# Feature sections have always been asked for "violations found" in the same format
+FEATURE_SECTION_RESPONSE_SPEC = ResponseSpec(
+    SECTION_RESPONSE_SPEC.name, SECTION_RESPONSE_SPEC.schema, SECTION_RESPONSE_FORMAT,
+    text_prefix="Respond with violations found in this EXACT format:\n"
+)
+
+SECTION_BATCH_RESPONSE_SPEC = BatchResponseSpec(SECTION_RESPONSE_SPEC, "sections", "SECTION")
+
+def section_response_spec(section_type: str) -> ResponseSpec:
+    return FEATURE_SECTION_RESPONSE_SPEC if section_type == 'feature' else SECTION_RESPONSE_SPEC
+
+def section_assessment_label(section_type: str) -> str:
+    return SECTION_ASSESSMENT_LABEL.get(section_type, "Overall compliance assessment")
+
+def get_analysis_prompt(section: DocumentSection) -> str:
+    """Build the section-specific analysis prompt"""
+    return """You are a Philippine financial compliance expert analyzing this business section for regulatory violations.
+
+SECTION ANALYSIS:
+Title: {title}
+Type: {section_type}
+Content: {content}
+
+{focus}
+
+{response_instructions}""".format(
+        title=section.title,
+        section_type=section.section_type,
+        content=section.content,
+        focus=SECTION_FOCUS.get(section.section_type, DEFAULT_SECTION_FOCUS),
+        response_instructions=section_response_spec(section.section_type).instructions(assessment=section_assessment_label(section.section_type))
+    )
+
+COUNT_PATTERN = re.compile(r'^\s*\[?\s*(\d+)')
+
+def leading_count(value: Any) -> int:
+    """Violation count from a field such as "2", "[1]" or "1 (see below)"; 0 when there is none"""
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, (int, float)):
+        return max(0, int(value))
+    match = COUNT_PATTERN.match(str(value))
+    return int(match.group(1)) if match else 0
+
+def parse_section_completion(completion: str) -> Dict[str, Any]:
+    """Parse a section completion in the JSON or SECTION_ANALYSIS/VIOLATIONS_FOUND text format"""
+    parsed = {
+        "violations_count": 0,
+        "violations_found": False,  # Whether a violation count was present at all
+        "section_analysis": "",
+        "violation_details": [],
+        "business_impact": "",
+        "regulatory_risk": "",
+        "format": None
+    }
+    
+    data = extract_json(completion)
+    if isinstance(data, dict) and "violation_count" in data:
+        details = data.get("violation_details") or []
+        parsed.update(
+            violations_count=leading_count(data["violation_count"]),
+            violations_found=True,
+            section_analysis=str(data.get("section_analysis") or ""),
+            violation_details=[str(detail) for detail in details] if isinstance(details, list) else [str(details)],
+            business_impact=str(data.get("business_impact") or ""),
+            regulatory_risk=str(data.get("regulatory_risk") or ""),
+            format="json"
+        )
+        return parsed
+    
+    current_section = None
+    
+    for line in completion.split('\n'):
+        line = line.strip()
+        if line.startswith('SECTION_ANALYSIS:'):
+            parsed["section_analysis"] = line.split(':', 1)[1].strip()
+        elif line.startswith('VIOLATIONS_FOUND:'):
+            parsed["violations_count"] = leading_count(line.split(':', 1)[1])
+            parsed["violations_found"] = True
+            parsed["format"] = "text"
+        elif line.startswith('VIOLATION_DETAILS:'):
+            current_section = 'violations'
+        elif line.startswith('BUSINESS_IMPACT:'):
+            parsed["business_impact"] = line.split(':', 1)[1].strip()
+            current_section = None
+        elif line.startswith('REGULATORY_RISK:'):
+            parsed["regulatory_risk"] = line.split(':', 1)[1].strip()
+            current_section = None
+        elif current_section == 'violations' and line.startswith('- '):
+            parsed["violation_details"].append(line[2:].strip())  # Remove "- " prefix
+    
+    return parsed
+
+async def build_section_result(section: DocumentSection, completion: str, parsed: Dict[str, Any], retrieval_context: Optional[RetrievalContext] = None) -> Dict[str, Any]:
+    """Turn a parsed section completion into a section result, generating workarounds for violations"""
+    violations_count = parsed["violations_count"]
+    
+    # Generate workarounds for this section if violations found, or leave a handle to generate them on demand
+    workarounds = []
+    workaround_handle = None
+    if violations_count > 0 and parsed["section_analysis"]:
+        if settings.workaround_mode in ("lazy", "prefetch"):
+            workaround_handle = await register_section_workarounds(section, parsed)
+        else:
+            workarounds = await generate_section_workarounds(section, parsed["violation_details"], parsed["section_analysis"], retrieval_context)
+    
+    result = {
+        "sectionTitle": section.title,
+        "sectionType": section.section_type,
+        "startLine": section.start_line,
+        "endLine": section.end_line,
+        "status": "VIOLATION" if violations_count > 0 else "COMPLIANT",
+        "violationCount": violations_count,
+        "analysis": completion,
+        "sectionAnalysis": parsed["section_analysis"],
+        "violationDetails": parsed["violation_details"],
+        "businessImpact": parsed["business_impact"],
+        "regulatoryRisk": parsed["regulatory_risk"],
+        "workarounds": workarounds
+    }
+    if workaround_handle:
+        result["workaroundHandle"] = workaround_handle
+    return result
+
+def build_section_error(section: DocumentSection, error: Exception) -> Dict[str, Any]:
+    """Section result for an analysis that failed"""
+    return {
+        "sectionTitle": section.title,
+        "sectionType": section.section_type,
+        "startLine": section.start_line,
+        "endLine": section.end_line,
+        "status": "ERROR",
+        "violationCount": 0,
+        "analysis": f"Error during analysis: {str(error)}",
+        "sectionAnalysis": "Analysis failed",
+        "violationDetails": [],
+        "businessImpact": "Could not assess impact",
+        "regulatoryRisk": "Could not assess risk",
+        "workarounds": []
+    }
+
+def unique_rule_values(screen: ScreenResult, attribute: str) -> List[Any]:
+    """A rule attribute from each hit, without repeats"""
+    values = []
+    for hit in screen.hits:
+        value = getattr(hit.rule, attribute)
+        if value and value not in values:
+            values.append(value)
+    return values
+
+def build_rule_section_result(section: DocumentSection, screen: ScreenResult) -> Dict[str, Any]:
+    """Section result decided by the rule pre-screen, in the same shape as an LLM result"""
+    if screen.decision == DECISION_VIOLATION:
+        section_analysis = f"Rule pre-screen matched {len(screen.hits)} known violation pattern(s)"
+        violation_details = [f'{hit.rule.issue}: "{hit.matched_text}" ({hit.rule.citation})' for hit in screen.hits]
+        business_impact = "; ".join(unique_rule_values(screen, "business_impact"))
+        regulatory_risk = "; ".join(unique_rule_values(screen, "regulatory_risk"))
+    else:
+        section_analysis = "Rule pre-screen found no regulatory-relevant content"
+        violation_details = []
+        business_impact = "None identified"
+        regulatory_risk = "None identified"
+
+    analysis = "\n".join([
+        f"SECTION_ANALYSIS: {section_analysis}",
+        f"VIOLATIONS_FOUND: {len(violation_details)}",
+        "VIOLATION_DETAILS:",
+        *(f"- {detail}" for detail in violation_details),
+        f"BUSINESS_IMPACT: {business_impact}",
+        f"REGULATORY_RISK: {regulatory_risk}"
+    ])
+
+    return {
+        "sectionTitle": section.title,
+        "sectionType": section.section_type,
+        "startLine": section.start_line,
+        "endLine": section.end_line,
+        "status": "VIOLATION" if violation_details else "COMPLIANT",
+        "violationCount": len(violation_details),
+        "analysis": analysis,
+        "sectionAnalysis": section_analysis,
+        "violationDetails": violation_details,
+        "businessImpact": business_impact,
+        "regulatoryRisk": regulatory_risk,
+        "workarounds": unique_rule_values(screen, "workaround"),
+        "prescreen": screen.summary()
+    }
+
+def section_span_attributes(section: DocumentSection, *args, **kwargs) -> Dict[str, Any]:
+    """Trace span labels for work on one section"""
+    return {"section": section.title, "section_type": section.section_type, "lines": f"{section.start_line}-{section.end_line}"}
+
+def batch_span_attributes(sections: List[DocumentSection], *args, **kwargs) -> Dict[str, Any]:
+    """Trace span labels for a batched analysis of several sections"""
+    return {"sections": [section.title for section in sections], "section_type": sections[0].section_type}
+
+def prescreen_section(section: DocumentSection) -> Optional[Dict[str, Any]]:
+    """Decide a clear-cut section from the rules, or None when it needs the LLM"""
+    screen = rule_screener.screen(section.content)
+    if screen is None or screen.decision == DECISION_ESCALATE:
+        return None
+    return build_rule_section_result(section, screen)
+
+SECTION_TRIAGE_FORMAT = """VERDICT: [VIOLATION or COMPLIANT]
+CONFIDENCE: [0.0 to 1.0, how sure you are of the verdict]
+REASON: [One sentence naming the deciding regulation, or why none is violated]"""
+
+SECTION_TRIAGE_SPEC = ResponseSpec("section_triage", object_schema({
+    "verdict": {"type": "string", "enum": ["VIOLATION", "COMPLIANT"]},
+    "confidence": {"type": "number"},
+    "reason": {"type": "string"}
+}), SECTION_TRIAGE_FORMAT)
+
+CONFIDENCE_PATTERN = re.compile(r'(\d+(?:\.\d+)?)\s*(%)?')
+
+def get_triage_prompt(section: DocumentSection) -> str:
+    """Build the short screening prompt used by the cascade's triage tiers"""
+    return """You are a Philippine financial compliance expert screening this business section for possible regulatory violations.
+
+SECTION:
+Title: {title}
+Type: {section_type}
+Content: {content}
+
+Decide only whether the section violates any regulation in the provided documents. Answer VIOLATION if you are unsure.
+
+{response_instructions}""".format(
+        title=section.title,
+        section_type=section.section_type,
+        content=section.content,
+        response_instructions=SECTION_TRIAGE_SPEC.instructions()
+    )
+
+def parse_confidence(value: Any) -> Optional[float]:
+    """A confidence as a 0-1 float, accepting percentages"""
+    match = CONFIDENCE_PATTERN.search(str(value))
+    if match is None:
+        return None
+    confidence = float(match.group(1))
+    if match.group(2) or confidence > 1:
+        confidence /= 100
+    return min(confidence, 1.0)
+
+def parse_section_triage(completion: str) -> Dict[str, Any]:
+    """Parse a triage completion in the JSON or VERDICT/CONFIDENCE text format"""
+    parsed = {"verdict": "", "confidence": None, "reason": "", "format": None}
+    
+    data = extract_json(completion)
+    if isinstance(data, dict) and "verdict" in data:
+        parsed.update(
+            verdict=str(data["verdict"]).strip().upper(),
+            confidence=parse_confidence(data.get("confidence")),
+            reason=str(data.get("reason") or ""),
+            format="json"
+        )
+    else:
+        for line in completion.split('\n'):
+            line = line.strip()
+            if line.startswith('VERDICT:'):
+                parsed["verdict"] = line.split(':', 1)[1].strip(' []').upper()
+                parsed["format"] = "text"
+            elif line.startswith('CONFIDENCE:'):
+                parsed["confidence"] = parse_confidence(line.split(':', 1)[1])
+            elif line.startswith('REASON:'):
+                parsed["reason"] = line.split(':', 1)[1].strip()
+    
+    # A verdict without a usable confidence cannot settle a section
+    if parsed["verdict"] not in ("VIOLATION", "COMPLIANT") or parsed["confidence"] is None:
+        parsed["format"] = None
+    return parsed
+
+def cascade_span_attributes(section: DocumentSection, tier: int, model: str, *args, **kwargs) -> Dict[str, Any]:
+    return {**section_span_attributes(section), "tier": tier, "model": model}
+
+@traced("cascade_triage", cascade_span_attributes)
+async def triage_section(section: DocumentSection, tier: int, model: str, retrieval_context: Optional[RetrievalContext] = None) -> Dict[str, Any]:
+    """Screen a section with one triage tier, returning the parse and whether it settles the section"""
+    started = time.perf_counter()
     try:
-        prompt = get_analysis_prompt(section.section_type)
-        
         result = await r2r_service.rag_completion(
             query=f"Analyze this {section.section_type} section for Philippine regulatory compliance: {section.title}",
             use_hybrid_search=True,
-            task_prompt=prompt
+            task_prompt=get_triage_prompt(section),
+            max_tokens=settings.cascade_triage_max_tokens,
+            retrieval_context=retrieval_context,
+            retrieval_key=section_retrieval_key(section),
+            response_format=SECTION_TRIAGE_SPEC.response_format(),
+            model=model,
+            defer_cache=True
+        )
+    except Exception as e:
+        print(f"⚠️  Triage of section {section.title} on {model} failed, escalating: {e}")
+        model_cascade.record(tier, time.perf_counter() - started, "error")
+        return {"format": None, "outcome": "error"}
+    
+    completion = result.get('completion', '')
+    # No re-ask here: escalating an unparseable triage answer is cheaper than reformatting it
+    with span("parse_completion", spec=SECTION_TRIAGE_SPEC.name):
+        parsed = parse_section_triage(completion)
+    parse_stats.record(SECTION_TRIAGE_SPEC.name, parsed["format"] or "failed")
+    if parsed["format"] is not None:
+        await r2r_service.store_completion(result.get('cache_key'), completion)
+    
+    parsed["completion"] = completion
+    parsed["outcome"] = model_cascade.triage_outcome(parsed)
+    model_cascade.record(tier, time.perf_counter() - started, parsed["outcome"])
+    set_span_attribute("outcome", parsed["outcome"])
+    return parsed
+
+def build_triage_section_result(section: DocumentSection, tier: int, model: str, parsed: Dict[str, Any]) -> Dict[str, Any]:
+    """Section result settled as compliant by a triage tier, in the same shape as a full analysis"""
+    section_analysis = parsed["reason"] or "No violations found in triage"
+    return {
+        "sectionTitle": section.title,
+        "sectionType": section.section_type,
+        "startLine": section.start_line,
+        "endLine": section.end_line,
+        "status": "COMPLIANT",
+        "violationCount": 0,
+        "analysis": parsed["completion"],
+        "sectionAnalysis": section_analysis,
+        "violationDetails": [],
+        "businessImpact": "None identified",
+        "regulatoryRisk": "Low",
+        "workarounds": [],
+        "cascade": {"tier": tier, "model": model, "confidence": parsed["confidence"]}
+    }
+
+async def cascade_triage_section(section: DocumentSection, retrieval_context: Optional[RetrievalContext] = None) -> Optional[Dict[str, Any]]:
+    """Screen a section with each triage tier in turn; the result of the tier that settles it, or None to escalate"""
+    for tier, model in enumerate(model_cascade.triage_models):
+        parsed = await triage_section(section, tier, model, retrieval_context)
+        if parsed["outcome"] == OUTCOME_SETTLED:
+            return build_triage_section_result(section, tier, model, parsed)
+    return None
+
+def record_final_tier(result: Dict[str, Any], seconds: float):
+    """Count a section analyzed by the cascade's last tier and label its result"""
+    if not model_cascade.enabled:
+        return
+    if result["status"] == "ERROR":
+        model_cascade.record(model_cascade.final_tier, seconds, "error")
+        return
+    model_cascade.record(model_cascade.final_tier, seconds, "violation" if result["violationCount"] > 0 else "compliant")
+    result["cascade"] = {"tier": model_cascade.final_tier, "model": model_cascade.final_model}
+
+@traced("analyze_section", section_span_attributes)
+async def analyze_section_compliance(section: DocumentSection, retrieval_context: Optional[RetrievalContext] = None, triage: bool = True) -> Dict[str, Any]:
+    """Analyze a document section for compliance violations using targeted regulatory analysis.
+
+    With several MODEL_TIERS the section is screened by the cheaper tiers first (unless
+    `triage` is off because that already happened), and only sections they flag or are
+    unsure about reach the detailed analysis.
+    """
+    if model_cascade.enabled and triage:
+        settled = await cascade_triage_section(section, retrieval_context)
+        if settled is not None:
+            return settled
+    
+    started = time.perf_counter()
+    try:
+        result = await r2r_service.rag_completion(
+            query=f"Analyze this {section.section_type} section for Philippine regulatory compliance: {section.title}",
+            use_hybrid_search=True,
+            task_prompt=get_analysis_prompt(section),
+            retrieval_context=retrieval_context,
+            retrieval_key=section_retrieval_key(section),
+            response_format=SECTION_RESPONSE_SPEC.response_format(),
+            defer_cache=True
         )
         
-        completion = result.get('completion', '')
-        
-        # Parse the structured response
-        violations_count = 0
-        section_analysis = ""
-        violation_details = []
-        business_impact = ""
-        regulatory_risk = ""
-        
-        lines = completion.split('\n')
-        current_section = None
-        
-        for line in lines:
-            line = line.strip()
-            if line.startswith('SECTION_ANALYSIS:'):
-                section_analysis = line.split(':', 1)[1].strip()
-            elif line.startswith('VIOLATIONS_FOUND:'):
-                violations_text = line.split(':', 1)[1].strip()
-                violations_count = int(violations_text) if violations_text.isdigit() else 0
-            elif line.startswith('VIOLATION_DETAILS:'):
-                current_section = 'violations'
-            elif line.startswith('BUSINESS_IMPACT:'):
-                business_impact = line.split(':', 1)[1].strip()
-                current_section = None
-            elif line.startswith('REGULATORY_RISK:'):
-                regulatory_risk = line.split(':', 1)[1].strip()
-                current_section = None
-            elif current_section == 'violations' and line.startswith('- '):
-                violation_details.append(line[2:].strip())  # Remove "- " prefix
-        
-        # Generate workarounds for this section if violations found
-        workarounds = []
-        if violations_count > 0 and section_analysis:
-            workarounds = await generate_section_workarounds(section, violation_details, section_analysis)
-        
-        return {
-            "sectionTitle": section.title,
-            "sectionType": section.section_type,
-            "startLine": section.start_line,
-            "endLine": section.end_line,
-            "status": "VIOLATION" if violations_count > 0 else "COMPLIANT",
-            "violationCount": violations_count,
-            "analysis": completion,
-            "sectionAnalysis": section_analysis,
-            "violationDetails": violation_details,
-            "businessImpact": business_impact,
-            "regulatoryRisk": regulatory_risk,
-            "workarounds": workarounds
-        }
+        completion, parsed = await parse_completion(
+            section_response_spec(section.section_type),
+            result.get('completion', ''),
+            parse_section_completion,
+            cache_key=result.get('cache_key'),
+            assessment=section_assessment_label(section.section_type)
+        )
+        elapsed = time.perf_counter() - started
+        section_result = await build_section_result(section, completion, parsed, retrieval_context)
+        record_final_tier(section_result, elapsed)
+        return section_result
         
     except Exception as e:
         print(f"Error analyzing section {section.title}: {e}")
-        return {
-            "sectionTitle": section.title,
-            "sectionType": section.section_type,
-            "startLine": section.start_line,
-            "endLine": section.end_line,
-            "status": "ERROR",
-            "violationCount": 0,
-            "analysis": f"Error during analysis: {str(e)}",
-            "sectionAnalysis": "Analysis failed",
-            "violationDetails": [],
-            "businessImpact": "Could not assess impact",
-            "regulatoryRisk": "Could not assess risk",
-            "workarounds": []
-        }
+        section_result = build_section_error(section, e)
+        record_final_tier(section_result, time.perf_counter() - started)
+        return section_result
 
-async def generate_section_workarounds(section: DocumentSection, violation_details: List[str], section_analysis: str) -> List[Dict[str, Any]]:
-    """Generate comprehensive workarounds for a section's compliance violations"""
+BATCH_BLOCK_PATTERN = re.compile(r'^\s*=+\s*SECTION\s+(\d+)\s*=+\s*$', re.MULTILINE)
+
+def get_batch_analysis_prompt(sections: List[DocumentSection]) -> str:
+    """Build one prompt that analyzes several sections of the same type"""
+    section_type = sections[0].section_type
+    section_blocks = "\n\n".join(
+        f"SECTION {i}:\nTitle: {section.title}\nContent: {section.content}"
+        for i, section in enumerate(sections, 1)
+    )
     
-    workaround_prompt = f"""You are a compliance consultant providing comprehensive solutions for this business section.
+    return f"""You are a Philippine financial compliance expert analyzing {len(sections)} {section_type} sections of a business proposal for regulatory violations. Assess each section independently.
 
-SECTION CONTEXT:
-Title: {section.title}
-Type: {section.section_type}
-Analysis: {section_analysis}
+{section_blocks}
 
-VIOLATIONS TO ADDRESS:
-{chr(10).join('- ' + detail for detail in violation_details)}
+{SECTION_FOCUS.get(section_type, DEFAULT_SECTION_FOCUS)}
 
-Generate exactly 3 strategic workaround approaches. Focus on business-practical solutions:
+{SECTION_BATCH_RESPONSE_SPEC.instructions(assessment=section_assessment_label(section_type))}"""
+
+def split_batch_completion(completion: str, block_pattern: re.Pattern = BATCH_BLOCK_PATTERN, items_key: str = "sections") -> Dict[int, str]:
+    """Demultiplex a batched completion into per-item blocks keyed by 1-based item number.
+
+    A JSON completion is split on its `items_key` array, each item becoming a JSON block.
+    """
+    blocks = {}
+    data = extract_json(completion)
+    if isinstance(data, dict) and isinstance(data.get(items_key), list):
+        for item in data[items_key]:
+            if isinstance(item, dict) and str(item.get("number", "")).isdigit():
+                blocks.setdefault(int(item["number"]), json.dumps(item))
+        return blocks
+    
+    markers = list(block_pattern.finditer(completion))
+    for i, marker in enumerate(markers):
+        end = markers[i + 1].start() if i + 1 < len(markers) else len(completion)
+        blocks.setdefault(int(marker.group(1)), completion[marker.end():end].strip())
+    return blocks
 
-APPROACH 1:
+@traced("analyze_section_batch", batch_span_attributes)
+async def analyze_section_batch(sections: List[DocumentSection], retrieval_context: Optional[RetrievalContext] = None, triage: bool = True) -> List[Dict[str, Any]]:
+    """Analyze several small same-type sections with one completion.
+
+    Sections whose block is missing or unparseable fall back to individual calls. If
+    the completion itself fails (R2R error, timeout or open breaker), every section
+    gets an error result, since individual calls would only multiply the failure.
+    Batches are analyzed by the last model tier; `triage` only applies to those fallbacks.
+    """
+    if len(sections) == 1:
+        return [await analyze_section_compliance(sections[0], retrieval_context, triage)]
+    
+    def parse_batch(completion: str) -> Dict[str, Any]:
+        blocks = split_batch_completion(completion, BATCH_BLOCK_PATTERN, "sections")
+        parsed_blocks = [parse_section_completion(blocks.get(i, "")) for i in range(1, len(sections) + 1)]
+        formats = {parsed["format"] for parsed in parsed_blocks}
+        return {"blocks": blocks, "parsed_blocks": parsed_blocks, "format": formats.pop() if len(formats) == 1 else None}
+    
+    max_tokens = min(settings.analysis_batch_max_output_tokens, 400 * len(sections))
+    batch = parse_batch("")
+    started = time.perf_counter()
+    try:
+        result = await r2r_service.rag_completion(
+            query=f"Analyze these {sections[0].section_type} sections for Philippine regulatory compliance: " + "; ".join(section.title for section in sections),
+            use_hybrid_search=True,
+            task_prompt=get_batch_analysis_prompt(sections),
+            max_tokens=max_tokens,
+            retrieval_context=retrieval_context,
+            response_format=SECTION_BATCH_RESPONSE_SPEC.response_format(),
+            defer_cache=True
+        )
+        _, batch = await parse_completion(
+            SECTION_BATCH_RESPONSE_SPEC,
+            result.get('completion', ''),
+            parse_batch,
+            max_tokens=max_tokens,
+            cache_key=result.get('cache_key'),
+            assessment=section_assessment_label(sections[0].section_type)
+        )
+    except Exception as e:
+        elapsed = time.perf_counter() - started
+        print(f"⚠️  Batched analysis of {len(sections)} sections failed: {e}")
+        errors = [build_section_error(section, e) for section in sections]
+        for error in errors:
+            record_final_tier(error, elapsed)
+        return errors
+    elapsed = time.perf_counter() - started
+    
+    blocks, parsed_blocks = batch["blocks"], batch["parsed_blocks"]
+    fallbacks = sum(1 for parsed in parsed_blocks if not parsed["violations_found"])
+    if fallbacks:
+        print(f"⚠️  {fallbacks}/{len(sections)} batched sections fell back to individual analysis")
+    
+    async def resolve(section: DocumentSection, block: str, parsed: Dict[str, Any]) -> Dict[str, Any]:
+        if not parsed["violations_found"]:
+            return await analyze_section_compliance(section, retrieval_context, triage)
+        try:
+            section_result = await build_section_result(section, block, parsed, retrieval_context)
+        except Exception as e:
+            print(f"Error analyzing section {section.title}: {e}")
+            section_result = build_section_error(section, e)
+        record_final_tier(section_result, elapsed)
+        return section_result
+    
+    return list(await asyncio.gather(*(
+        resolve(section, blocks.get(i, ""), parsed)
+        for i, (section, parsed) in enumerate(zip(sections, parsed_blocks), 1)
+    )))
+
+def plan_section_batches(sections: List[DocumentSection]) -> List[List[int]]:
+    """Group indexes of small same-type sections into batches that fit the token budget.
+
+    Large sections, and every section when batching is disabled, get a batch of their own.
+    Batches are returned in order of their first section.
+    """
+    if not settings.analysis_batch_enabled:
+        return [[i] for i in range(len(sections))]
+    
+    batches: List[List[int]] = []
+    open_batches: Dict[str, tuple] = {}  # section_type -> (batch, token total)
+    
+    for i, section in enumerate(sections):
+        tokens = estimate_tokens(section.title) + estimate_tokens(section.content)
+        if tokens > settings.analysis_batch_small_section_tokens:
+            batches.append([i])
+            continue
+        
+        batch, batch_tokens = open_batches.get(section.section_type, (None, 0))
+        if (batch is None
+                or batch_tokens + tokens > settings.analysis_batch_token_budget
+                or len(batch) >= settings.analysis_batch_max_sections):
+            batch, batch_tokens = [], 0
+            batches.append(batch)
+        batch.append(i)
+        open_batches[section.section_type] = (batch, batch_tokens + tokens)
+    
+    return batches
+
+SECTION_WORKAROUNDS_TEMPLATE = """APPROACH 1:
 TITLE: [Strategic approach name]
 DESCRIPTION: [How this approach addresses the violations]
 IMPLEMENTATION_STEPS: [Specific actions, separated by |]
@@ -322,7 +642,79 @@ TITLE: [Third strategic approach]
 DESCRIPTION: [How this approach addresses the violations]
 IMPLEMENTATION_STEPS: [Specific actions, separated by |]  
 REGULATORY_ALIGNMENT: [How this ensures compliance]
-BUSINESS_BENEFIT: [Additional business value]
+BUSINESS_BENEFIT: [Additional business value]"""
+
+SECTION_WORKAROUNDS_SPEC = ResponseSpec("section_workarounds", object_schema({
+    "approaches": {"type": "array", "items": object_schema({
+        "title": {"type": "string"},
+        "description": {"type": "string"},
+        "implementation_steps": {"type": "array", "items": {"type": "string"}},
+        "regulatory_alignment": {"type": "string"},
+        "business_benefit": {"type": "string"}
+    })}
+}), SECTION_WORKAROUNDS_TEMPLATE, text_prefix="")
+
+def parse_section_workarounds(completion: str) -> Dict[str, Any]:
+    """Parse up to 3 workaround approaches from a JSON or APPROACH-block completion"""
+    approaches = []
+    data = extract_json(completion)
+    if isinstance(data, dict) and isinstance(data.get("approaches"), list):
+        response_format = "json"
+        for approach in data["approaches"]:
+            if isinstance(approach, dict):
+                steps = approach.get("implementation_steps") or []
+                approaches.append({
+                    "title": str(approach.get("title") or "").strip(),
+                    "description": str(approach.get("description") or "").strip(),
+                    "steps": [str(step).strip() for step in steps if str(step).strip()] if isinstance(steps, list) else [str(steps)],
+                    "regulatoryAlignment": str(approach.get("regulatory_alignment") or "").strip(),
+                    "businessBenefit": str(approach.get("business_benefit") or "").strip()
+                })
+    else:
+        response_format = "text"
+        # Parse the structured response
+        for approach in completion.split('APPROACH ')[1:]:  # Skip empty first element
+            fields = {"steps": []}
+            for line in approach.strip().split('\n'):
+                line = line.strip()
+                for label, key in (('TITLE:', 'title'), ('DESCRIPTION:', 'description'), ('REGULATORY_ALIGNMENT:', 'regulatoryAlignment'), ('BUSINESS_BENEFIT:', 'businessBenefit')):
+                    if line.startswith(label):
+                        fields[key] = line.split(':', 1)[1].strip()
+                if line.startswith('IMPLEMENTATION_STEPS:'):
+                    steps_text = line.split(':', 1)[1].strip()
+                    fields["steps"] = [step.strip() for step in steps_text.split('|') if step.strip()]
+            approaches.append({
+                "title": fields.get("title", ""),
+                "description": fields.get("description", ""),
+                "steps": fields["steps"],
+                "regulatoryAlignment": fields.get("regulatoryAlignment", ""),
+                "businessBenefit": fields.get("businessBenefit", "")
+            })
+    
+    workarounds = [
+        {**approach, "steps": approach["steps"] or ["Implementation steps to be defined"]}
+        for approach in approaches[:3]  # Limit to 3 approaches
+        if approach["title"] and approach["description"]
+    ]
+    return {"workarounds": workarounds, "format": response_format if workarounds else None}
+
+@traced("generate_workarounds", section_span_attributes)
+async def generate_section_workarounds(section: DocumentSection, violation_details: List[str], section_analysis: str, retrieval_context: Optional[RetrievalContext] = None) -> List[Dict[str, Any]]:
+    """Generate comprehensive workarounds for a section's compliance violations"""
+    
+    workaround_prompt = f"""You are a compliance consultant providing comprehensive solutions for this business section.
+
+SECTION CONTEXT:
+Title: {section.title}
+Type: {section.section_type}
+Analysis: {section_analysis}
+
+VIOLATIONS TO ADDRESS:
+{chr(10).join('- ' + detail for detail in violation_details)}
+
+Generate exactly 3 strategic workaround approaches. Focus on business-practical solutions:
+
+{SECTION_WORKAROUNDS_SPEC.instructions()}
 
 Focus on practical, implementable solutions that transform compliance challenges into business opportunities."""
     
@@ -330,45 +722,15 @@ Focus on practical, implementable solutions that transform compliance challenges
         result = await r2r_service.rag_completion(
             query=f"How to make this {section.section_type} section compliant with Philippine regulations",
             use_hybrid_search=True,
-            task_prompt=workaround_prompt
+            task_prompt=workaround_prompt,
+            retrieval_context=retrieval_context,
+            retrieval_key=section_retrieval_key(section),
+            response_format=SECTION_WORKAROUNDS_SPEC.response_format(),
+            defer_cache=True
         )
         
-        completion = result.get('completion', '')
-        workarounds = []
-        
-        # Parse the structured response
-        approaches = completion.split('APPROACH ')[1:]  # Skip empty first element
-        
-        for approach in approaches[:3]:  # Limit to 3 approaches
-            lines = approach.strip().split('\n')
-            title = ""
-            description = ""
-            steps = []
-            regulatory_alignment = ""
-            business_benefit = ""
-            
-            for line in lines:
-                line = line.strip()
-                if line.startswith('TITLE:'):
-                    title = line.split(':', 1)[1].strip()
-                elif line.startswith('DESCRIPTION:'):
-                    description = line.split(':', 1)[1].strip()
-                elif line.startswith('IMPLEMENTATION_STEPS:'):
-                    steps_text = line.split(':', 1)[1].strip()
-                    steps = [step.strip() for step in steps_text.split('|') if step.strip()]
-                elif line.startswith('REGULATORY_ALIGNMENT:'):
-                    regulatory_alignment = line.split(':', 1)[1].strip()
-                elif line.startswith('BUSINESS_BENEFIT:'):
-                    business_benefit = line.split(':', 1)[1].strip()
-            
-            if title and description:
-                workarounds.append({
-                    "title": title,
-                    "description": description,
-                    "steps": steps if steps else ["Implementation steps to be defined"],
-                    "regulatoryAlignment": regulatory_alignment,
-                    "businessBenefit": business_benefit
-                })
+        _, parsed = await parse_completion(SECTION_WORKAROUNDS_SPEC, result.get('completion', ''), parse_section_workarounds, cache_key=result.get('cache_key'))
+        workarounds = parsed["workarounds"]
         
         # Fallback workarounds if parsing failed
         if not workarounds:
@@ -396,19 +758,25 @@ Focus on practical, implementable solutions that transform compliance challenges
             }
         ]
 
-async def generate_workaround_suggestions(original_text: str, compliance_issue: str, regulatory_source: str) -> List[Dict[str, Any]]:
-    """Generate 3 workaround suggestions for a compliance violation"""
-    
-    workaround_prompt = f"""You are a compliance consultant providing workaround solutions for Philippine financial regulations.
-
-VIOLATION DETAILS:
-- Original problematic text: "{original_text}"
-- Compliance issue: {compliance_issue}
-- Regulatory source: {regulatory_source}
+async def generate_workarounds_for_handle(request: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Generate the workarounds recorded under a workaround handle"""
+    section = DocumentSection(title=request["title"], content="", section_type=request["section_type"])
+    return await generate_section_workarounds(section, request["violation_details"], request["section_analysis"])
 
-Generate exactly 3 practical workaround suggestions to make this compliant. For each suggestion, provide:
+async def register_section_workarounds(section: DocumentSection, parsed: Dict[str, Any]) -> str:
+    """Record a violating section's workaround inputs and return its handle"""
+    handle = make_workaround_handle(section_fingerprint(section), parsed["violation_details"])
+    await workaround_store.register(handle, {
+        "title": section.title,
+        "section_type": section.section_type,
+        "violation_details": parsed["violation_details"],
+        "section_analysis": parsed["section_analysis"]
+    })
+    if settings.workaround_mode == "prefetch":
+        workaround_store.prefetch(handle, generate_workarounds_for_handle)
+    return handle
 
-SUGGESTION 1:
+LINE_WORKAROUNDS_TEMPLATE = """SUGGESTION 1:
 TITLE: [Short descriptive title]
 DESCRIPTION: [Brief explanation of the solution]
 STEPS: [Specific implementation steps, separated by |]
@@ -424,7 +792,76 @@ SUGGESTION 3:
 TITLE: [Short descriptive title]
 DESCRIPTION: [Brief explanation of the solution] 
 STEPS: [Specific implementation steps, separated by |]
-BENEFIT: [Why this approach ensures compliance]
+BENEFIT: [Why this approach ensures compliance]"""
+
+LINE_WORKAROUNDS_SPEC = ResponseSpec("line_workarounds", object_schema({
+    "suggestions": {"type": "array", "items": object_schema({
+        "title": {"type": "string"},
+        "description": {"type": "string"},
+        "steps": {"type": "array", "items": {"type": "string"}},
+        "benefit": {"type": "string"}
+    })}
+}), LINE_WORKAROUNDS_TEMPLATE, text_prefix="")
+
+def parse_line_workarounds(completion: str) -> Dict[str, Any]:
+    """Parse up to 3 workaround suggestions from a JSON or SUGGESTION-block completion"""
+    suggestions = []
+    data = extract_json(completion)
+    if isinstance(data, dict) and isinstance(data.get("suggestions"), list):
+        response_format = "json"
+        for suggestion in data["suggestions"]:
+            if isinstance(suggestion, dict):
+                steps = suggestion.get("steps") or []
+                suggestions.append({
+                    "title": str(suggestion.get("title") or "").strip(),
+                    "description": str(suggestion.get("description") or "").strip(),
+                    "steps": [str(step).strip() for step in steps if str(step).strip()] if isinstance(steps, list) else [str(steps)],
+                    "benefit": str(suggestion.get("benefit") or "").strip()
+                })
+    else:
+        response_format = "text"
+        # Parse the structured response
+        for suggestion in completion.split('SUGGESTION ')[1:]:  # Skip empty first element
+            fields = {"steps": []}
+            for line in suggestion.strip().split('\n'):
+                for label, key in (('TITLE:', 'title'), ('DESCRIPTION:', 'description'), ('BENEFIT:', 'benefit')):
+                    if line.startswith(label):
+                        fields[key] = line.split(':', 1)[1].strip()
+                if line.startswith('STEPS:'):
+                    steps_text = line.split(':', 1)[1].strip()
+                    fields["steps"] = [step.strip() for step in steps_text.split('|') if step.strip()]
+            suggestions.append({
+                "title": fields.get("title", ""),
+                "description": fields.get("description", ""),
+                "steps": fields["steps"],
+                "benefit": fields.get("benefit", "")
+            })
+    
+    # Only keep suggestions with the minimum required fields
+    workarounds = [
+        {
+            **suggestion,
+            "steps": suggestion["steps"] or ["Implementation steps not provided"],
+            "benefit": suggestion["benefit"] or "Helps achieve regulatory compliance"
+        }
+        for suggestion in suggestions[:3]  # Limit to 3 suggestions
+        if suggestion["title"] and suggestion["description"]
+    ]
+    return {"workarounds": workarounds, "format": response_format if workarounds else None}
+
+async def generate_workaround_suggestions(original_text: str, compliance_issue: str, regulatory_source: str) -> List[Dict[str, Any]]:
+    """Generate 3 workaround suggestions for a compliance violation"""
+    
+    workaround_prompt = f"""You are a compliance consultant providing workaround solutions for Philippine financial regulations.
+
+VIOLATION DETAILS:
+- Original problematic text: "{original_text}"
+- Compliance issue: {compliance_issue}
+- Regulatory source: {regulatory_source}
+
+Generate exactly 3 practical workaround suggestions to make this compliant. For each suggestion, provide:
+
+{LINE_WORKAROUNDS_SPEC.instructions()}
 
 Focus on practical, implementable solutions that directly address the regulatory requirements."""
 
@@ -432,40 +869,13 @@ Focus on practical, implementable solutions that directly address the regulatory
         result = await r2r_service.rag_completion(
             query=f"How to make this compliant with Philippine regulations: {original_text}",
             use_hybrid_search=True,
-            task_prompt=workaround_prompt
+            task_prompt=workaround_prompt,
+            response_format=LINE_WORKAROUNDS_SPEC.response_format(),
+            defer_cache=True
         )
         
-        completion = result.get('completion', '')
-        workarounds = []
-        
-        # Parse the structured response
-        suggestions = completion.split('SUGGESTION ')[1:]  # Skip empty first element
-        
-        for i, suggestion in enumerate(suggestions[:3], 1):  # Limit to 3 suggestions
-            lines = suggestion.strip().split('\n')
-            title = ""
-            description = ""
-            steps = []
-            benefit = ""
-            
-            for line in lines:
-                if line.startswith('TITLE:'):
-                    title = line.split(':', 1)[1].strip()
-                elif line.startswith('DESCRIPTION:'):
-                    description = line.split(':', 1)[1].strip()
-                elif line.startswith('STEPS:'):
-                    steps_text = line.split(':', 1)[1].strip()
-                    steps = [step.strip() for step in steps_text.split('|') if step.strip()]
-                elif line.startswith('BENEFIT:'):
-                    benefit = line.split(':', 1)[1].strip()
-            
-            if title and description:  # Only add if we have minimum required fields
-                workarounds.append({
-                    "title": title,
-                    "description": description,
-                    "steps": steps if steps else ["Implementation steps not provided"],
-                    "benefit": benefit if benefit else "Helps achieve regulatory compliance"
-                })
+        _, parsed = await parse_completion(LINE_WORKAROUNDS_SPEC, result.get('completion', ''), parse_line_workarounds, cache_key=result.get('cache_key'))
+        workarounds = parsed["workarounds"]
         
         # If parsing failed, provide generic workarounds
         if not workarounds:
@@ -516,35 +926,168 @@ Focus on practical, implementable solutions that directly address the regulatory
             }
         ]
 
+def line_workaround(workaround: Dict[str, Any]) -> Dict[str, Any]:
+    """A rule's section-shaped workaround in the shape of an LLM line suggestion"""
+    return {
+        "title": workaround.get("title", ""),
+        "description": workaround.get("description", ""),
+        "steps": workaround.get("steps", []),
+        "benefit": workaround.get("businessBenefit", "")
+    }
+
+def build_rule_line_result(line: str, line_number: int, screen: ScreenResult) -> Dict[str, Any]:
+    """Line result decided by the rule pre-screen, in the same shape as an LLM result"""
+    if screen.decision == DECISION_VIOLATION:
+        compliance_issue = "; ".join(unique_rule_values(screen, "issue"))
+        regulatory_source = "; ".join(unique_rule_values(screen, "citation"))
+        analysis = "\n".join([
+            f"VIOLATIONS_FOUND: {len(screen.hits)}",
+            f"VIOLATION_TEXT: {'; '.join(hit.matched_text for hit in screen.hits)}",
+            f"COMPLIANCE_ISSUE: {compliance_issue}",
+            f"REGULATORY_SOURCE: {regulatory_source}"
+        ])
+    else:
+        compliance_issue = "Rule pre-screen found no regulatory-relevant content"
+        regulatory_source = "N/A"
+        analysis = f"VIOLATIONS_FOUND: 0\nREASON: {compliance_issue}"
+
+    return {
+        "lineNumber": line_number,
+        "originalText": line.strip(),
+        "status": "VIOLATION" if screen.decision == DECISION_VIOLATION else "COMPLIANT",
+        "violations": len(screen.hits),
+        "analysis": analysis,
+        "complianceIssue": compliance_issue,
+        "regulatorySource": regulatory_source,
+        "workarounds": [line_workaround(workaround) for workaround in unique_rule_values(screen, "workaround")],
+        "prescreen": screen.summary()
+    }
+
+MIN_LINE_LENGTH = 10
+
+LINE_RESPONSE_FORMAT = """VIOLATIONS_FOUND: [0 or 1]
+VIOLATION_TEXT: [quote the exact problematic part; omit if compliant]
+COMPLIANCE_ISSUE: [explain the specific violation; omit if compliant]
+REGULATORY_SOURCE: [cite the specific law/regulation from the documents; omit if compliant]
+REASON: [brief explanation why it's compliant; omit if violations were found]"""
+
+LINE_ANALYSIS_SCHEMA = object_schema({
+    "violations_found": {"type": "integer"},
+    "violation_text": {"type": "string"},
+    "compliance_issue": {"type": "string"},
+    "regulatory_source": {"type": "string"},
+    "reason": {"type": "string"}
+})
+
+LINE_RESPONSE_SPEC = ResponseSpec("line_analysis", LINE_ANALYSIS_SCHEMA, """2. If violations are found, respond in this EXACT format:
+   VIOLATIONS_FOUND: 1
+   VIOLATION_TEXT: [quote the exact problematic part]
+   COMPLIANCE_ISSUE: [explain the specific violation]
+   REGULATORY_SOURCE: [cite the specific law/regulation from the documents]
+
+3. If no violations, respond:
+   VIOLATIONS_FOUND: 0
+   REASON: [brief explanation why it's compliant]""", text_prefix="")
+
+LINE_BATCH_RESPONSE_SPEC = BatchResponseSpec(ResponseSpec("line_analysis", LINE_ANALYSIS_SCHEMA, LINE_RESPONSE_FORMAT), "lines", "LINE")
+
+LINE_BLOCK_PATTERN = re.compile(r'^\s*=+\s*LINE\s+(\d+)\s*=+\s*$', re.MULTILINE)
+
+def build_short_line_result(line: str, line_number: int) -> Dict[str, Any]:
+    """Result for a line too short to analyze, decided without any I/O"""
+    return {
+        "lineNumber": line_number,
+        "originalText": line.strip(),
+        "status": "COMPLIANT",
+        "violations": 0,
+        "analysis": "Line too short for meaningful analysis",
+        "complianceIssue": "No content to analyze",
+        "regulatorySource": "N/A"
+    }
+
+def build_line_error(line: str, line_number: int, error: Exception) -> Dict[str, Any]:
+    return {
+        "lineNumber": line_number,
+        "originalText": line.strip(),
+        "status": "ERROR",
+        "violations": 0,
+        "analysis": f"Error during analysis: {str(error)}",
+        "complianceIssue": "Analysis failed",
+        "regulatorySource": "N/A",
+        "workarounds": []
+    }
+
+LINE_LABELS = ('VIOLATIONS_FOUND:', 'COMPLIANCE_ISSUE:', 'REASON:', 'REGULATORY_SOURCE:')
+
+def parse_line_completion(completion: str) -> Dict[str, Any]:
+    """Extract the violation count, issue and source from a JSON or labelled-text line analysis"""
+    data = extract_json(completion)
+    if isinstance(data, dict) and "violations_found" in data:
+        response_format = "json"
+        fields = {
+            'VIOLATIONS_FOUND:': data["violations_found"],
+            'COMPLIANCE_ISSUE:': str(data.get("compliance_issue") or "").strip(),
+            'REASON:': str(data.get("reason") or "").strip(),
+            'REGULATORY_SOURCE:': str(data.get("regulatory_source") or "").strip()
+        }
+        fields = {label: value for label, value in fields.items() if value != ""}
+    else:
+        # One pass over the lines, keeping the first value seen for each label
+        fields = {}
+        for l in completion.split('\n'):
+            for label in LINE_LABELS:
+                if label not in fields and label in l:
+                    fields[label] = l.split(label, 1)[1].strip()
+        response_format = "text" if 'VIOLATIONS_FOUND:' in fields else None
+    
+    violations = leading_count(fields.get('VIOLATIONS_FOUND:', 0))
+    if violations == 0 and str(fields.get('VIOLATIONS_FOUND:', "0")).strip("[] ").lower() not in ("", "0", "none", "no", "false"):
+        violations = 1  # A non-zero answer without a readable count
+    
+    return {
+        "status": "VIOLATION" if violations else "COMPLIANT",
+        "violations": violations,
+        "compliance_issue": fields.get('COMPLIANCE_ISSUE:') or fields.get('REASON:') or "No issues detected",
+        "regulatory_source": fields.get('REGULATORY_SOURCE:') or "N/A",
+        "format": response_format
+    }
+
+async def build_line_result(line: str, line_number: int, completion: str, parsed: Dict[str, Any]) -> Dict[str, Any]:
+    """Turn a parsed line analysis response into a line result, with workarounds for violations"""
+    # If violation found, generate workaround suggestions
+    workarounds = []
+    if parsed["status"] == "VIOLATION":
+        workarounds = await generate_workaround_suggestions(line.strip(), parsed["compliance_issue"], parsed["regulatory_source"])
+    
+    return {
+        "lineNumber": line_number,
+        "originalText": line.strip(),
+        "status": parsed["status"],
+        "violations": parsed["violations"],
+        "analysis": completion,
+        "complianceIssue": parsed["compliance_issue"],
+        "regulatorySource": parsed["regulatory_source"],
+        "workarounds": workarounds
+    }
+
 async def analyze_line_for_compliance(line: str, line_number: int) -> Dict[str, Any]:
     """Analyze a single line for compliance violations using the existing RAG pipeline"""
     
     # Skip empty or very short lines
-    if not line.strip() or len(line.strip()) < 10:
-        return {
-            "lineNumber": line_number,
-            "originalText": line.strip(),
-            "status": "COMPLIANT",
-            "violations": 0,
-            "analysis": "Line too short for meaningful analysis",
-            "complianceIssue": "No content to analyze",
-            "regulatorySource": "N/A"
-        }
+    if not line.strip() or len(line.strip()) < MIN_LINE_LENGTH:
+        return build_short_line_result(line, line_number)
+    
+    # Clear violations and clearly irrelevant lines are decided by the rules
+    screen = rule_screener.screen(line)
+    if screen is not None and screen.decision != DECISION_ESCALATE:
+        return build_rule_line_result(line, line_number, screen)
     
     # Create structured task prompt (based on your existing tests)
     task_prompt = """You are a compliance violation detector for Philippine financial regulations.
 
 INSTRUCTIONS:
 1. Analyze the provided line against Philippine laws (RA 9160 AML, RA 10173 Data Privacy, BSP Banking Rules, SEC Regulations)
-2. If violations are found, respond in this EXACT format:
-   VIOLATIONS_FOUND: 1
-   VIOLATION_TEXT: [quote the exact problematic part]
-   COMPLIANCE_ISSUE: [explain the specific violation]
-   REGULATORY_SOURCE: [cite the specific law/regulation from the documents]
-
-3. If no violations, respond:
-   VIOLATIONS_FOUND: 0
-   REASON: [brief explanation why it's compliant]
+""" + LINE_RESPONSE_SPEC.instructions() + """
 
 Be direct and specific. Focus on regulatory violations based on the retrieved documents."""
     
@@ -555,166 +1098,844 @@ Be direct and specific. Focus on regulatory violations based on the retrieved do
         result = await r2r_service.rag_completion(
             query=query,
             use_hybrid_search=True,
-            task_prompt=task_prompt
+            task_prompt=task_prompt,
+            response_format=LINE_RESPONSE_SPEC.response_format(),
+            defer_cache=True
         )
         
-        completion = result.get('completion', '')
-        
-        # Parse the response
-        violations = 0
-        compliance_issue = "No issues detected"
-        regulatory_source = "N/A"
-        status = "COMPLIANT"
-        
-        # Check for violations
-        if "VIOLATIONS_FOUND:" in completion:
-            violation_lines = [l for l in completion.split('\n') if 'VIOLATIONS_FOUND:' in l]
-            if violation_lines:
-                violation_count = violation_lines[0].split(':')[1].strip()
-                if violation_count != "0":
-                    violations = int(violation_count) if violation_count.isdigit() else 1
-                    status = "VIOLATION"
-        
-        # Extract compliance issue
-        if "COMPLIANCE_ISSUE:" in completion:
-            issue_lines = [l for l in completion.split('\n') if 'COMPLIANCE_ISSUE:' in l]
-            if issue_lines:
-                compliance_issue = issue_lines[0].split(':', 1)[1].strip()
-        elif "REASON:" in completion:
-            reason_lines = [l for l in completion.split('\n') if 'REASON:' in l]
-            if reason_lines:
-                compliance_issue = reason_lines[0].split(':', 1)[1].strip()
-        
-        # Extract regulatory source
-        if "REGULATORY_SOURCE:" in completion:
-            source_lines = [l for l in completion.split('\n') if 'REGULATORY_SOURCE:' in l]
-            if source_lines:
-                regulatory_source = source_lines[0].split(':', 1)[1].strip()
-        
-        # If violation found, generate workaround suggestions
-        workarounds = []
-        if status == "VIOLATION":
-            workarounds = await generate_workaround_suggestions(line.strip(), compliance_issue, regulatory_source)
-        
-        return {
-            "lineNumber": line_number,
-            "originalText": line.strip(),
-            "status": status,
-            "violations": violations,
-            "analysis": completion,
-            "complianceIssue": compliance_issue,
-            "regulatorySource": regulatory_source,
-            "workarounds": workarounds
-        }
+        completion, parsed = await parse_completion(LINE_RESPONSE_SPEC, result.get('completion', ''), parse_line_completion, cache_key=result.get('cache_key'))
+        return await build_line_result(line, line_number, completion, parsed)
         
     except Exception as e:
         print(f"Error analyzing line {line_number}: {e}")
-        return {
-            "lineNumber": line_number,
-            "originalText": line.strip(),
-            "status": "ERROR",
-            "violations": 0,
-            "analysis": f"Error during analysis: {str(e)}",
-            "complianceIssue": "Analysis failed",
-            "regulatorySource": "N/A",
-            "workarounds": []
-        }
+        return build_line_error(line, line_number, e)
+
+def get_line_batch_prompt(lines: List[str]) -> str:
+    """Build one prompt that analyzes several lines independently"""
+    numbered_lines = "\n".join(f"LINE {i}: {line}" for i, line in enumerate(lines, 1))
+    
+    return f"""You are a compliance violation detector for Philippine financial regulations.
+
+Analyze each of these {len(lines)} lines independently against Philippine laws (RA 9160 AML, RA 10173 Data Privacy, BSP Banking Rules, SEC Regulations):
+
+{numbered_lines}
+
+{LINE_BATCH_RESPONSE_SPEC.instructions()}
+
+Be direct and specific. Focus on regulatory violations based on the retrieved documents."""
+
+def plan_line_batches(lines: List[str]) -> List[List[int]]:
+    """Group indexes of consecutive lines into batches that fit the token budget"""
+    batches: List[List[int]] = []
+    batch: List[int] = []
+    batch_tokens = 0
+    
+    for i, line in enumerate(lines):
+        tokens = estimate_tokens(line)
+        if batch and (batch_tokens + tokens > settings.line_batch_token_budget or len(batch) >= settings.line_batch_max_lines):
+            batches.append(batch)
+            batch, batch_tokens = [], 0
+        batch.append(i)
+        batch_tokens += tokens
+    if batch:
+        batches.append(batch)
+    
+    return batches
+
+async def analyze_line_batch(lines: List[str], line_numbers: List[int], retrieval_context: Optional[RetrievalContext] = None) -> List[Dict[str, Any]]:
+    """Analyze several lines with one completion.
+
+    Lines whose block is missing or unparseable fall back to individual calls. If the
+    completion itself fails (R2R error, timeout or open breaker), every line gets an
+    error result instead.
+    """
+    if len(lines) == 1:
+        return [await analyze_line_for_compliance(lines[0], line_numbers[0])]
+    
+    def parse_batch(completion: str) -> Dict[str, Any]:
+        blocks = split_batch_completion(completion, LINE_BLOCK_PATTERN, "lines")
+        parsed_blocks = [parse_line_completion(blocks.get(i, "")) for i in range(1, len(lines) + 1)]
+        formats = {parsed["format"] for parsed in parsed_blocks}
+        return {"blocks": blocks, "parsed_blocks": parsed_blocks, "format": formats.pop() if len(formats) == 1 else None}
+    
+    max_tokens = min(settings.line_batch_max_output_tokens, 100 * len(lines))
+    batch = parse_batch("")
+    try:
+        result = await r2r_service.rag_completion(
+            query="Analyze these lines for Philippine regulatory violations: " + "; ".join(lines),
+            use_hybrid_search=True,
+            task_prompt=get_line_batch_prompt(lines),
+            max_tokens=max_tokens,
+            retrieval_context=retrieval_context,
+            response_format=LINE_BATCH_RESPONSE_SPEC.response_format(),
+            defer_cache=True
+        )
+        _, batch = await parse_completion(LINE_BATCH_RESPONSE_SPEC, result.get('completion', ''), parse_batch, max_tokens=max_tokens, cache_key=result.get('cache_key'))
+    except Exception as e:
+        print(f"⚠️  Batched analysis of {len(lines)} lines failed: {e}")
+        return [build_line_error(line, line_number, e) for line, line_number in zip(lines, line_numbers)]
+    
+    fallbacks = sum(1 for parsed in batch["parsed_blocks"] if parsed["format"] is None)
+    if fallbacks:
+        print(f"⚠️  {fallbacks}/{len(lines)} batched lines fell back to individual analysis")
+    
+    async def resolve(line: str, line_number: int, block: str, parsed: Dict[str, Any]) -> Dict[str, Any]:
+        if parsed["format"] is None:
+            return await analyze_line_for_compliance(line, line_number)
+        try:
+            return await build_line_result(line, line_number, block, parsed)
+        except Exception as e:
+            print(f"Error analyzing line {line_number}: {e}")
+            return build_line_error(line, line_number, e)
+    
+    return list(await asyncio.gather(*(
+        resolve(line, line_number, batch["blocks"].get(i, ""), parsed)
+        for i, (line, line_number, parsed) in enumerate(zip(lines, line_numbers, batch["parsed_blocks"]), 1)
+    )))
+
+async def analyze_document_lines(document_content: str) -> Dict[str, Any]:
+    """Analyze every line of a document, returning line results and counts.
+
+    Blank and short lines are settled without I/O, identical lines are analyzed once,
+    the rule pre-screen decides clear-cut lines, and the rest are batched into shared
+    completions run with bounded concurrency.
+    """
+    lines = document_content.split('\n')
+    line_results: Dict[int, Dict[str, Any]] = {}
+    occurrences: Dict[str, List[int]] = {}  # stripped text -> line numbers, in document order
+    blank_lines = short_lines = 0
+    
+    for line_number, line in enumerate(lines, 1):
+        text = line.strip()
+        if not text:
+            blank_lines += 1
+        elif len(text) < MIN_LINE_LENGTH:
+            short_lines += 1
+            line_results[line_number] = build_short_line_result(text, line_number)
+        else:
+            occurrences.setdefault(text, []).append(line_number)
+    
+    # Clear-cut lines are decided by the rule pre-screen; only the rest go to the LLM
+    results_by_text: Dict[str, Dict[str, Any]] = {}
+    pending: List[str] = []
+    for text, line_numbers in occurrences.items():
+        screen = rule_screener.screen(text)
+        if screen is not None and screen.decision != DECISION_ESCALATE:
+            results_by_text[text] = build_rule_line_result(text, line_numbers[0], screen)
+        else:
+            pending.append(text)
+    
+    retrieval_context = RetrievalContext()
+    batches = plan_line_batches(pending)
+    
+    async def analyze_batch(batch: List[int]) -> List[Dict[str, Any]]:
+        texts = [pending[i] for i in batch]
+        results = await analyze_line_batch(texts, [occurrences[text][0] for text in texts], retrieval_context)
+        for text, result in zip(texts, results):
+            results_by_text[text] = result
+        return results
+    
+    await run_bounded(
+        batches,
+        analyze_batch,
+        max_concurrency=settings.analysis_max_concurrency,
+        rate_limiter=analysis_rate_limiter
+    )
+    
+    # Repeated lines share the analysis of their first occurrence
+    for text, line_numbers in occurrences.items():
+        result = results_by_text[text]
+        line_results[line_numbers[0]] = result
+        for line_number in line_numbers[1:]:
+            line_results[line_number] = {**result, "lineNumber": line_number, "duplicateOf": line_numbers[0]}
+    
+    return {
+        "line_analyses": [line_results[line_number] for line_number in sorted(line_results)],
+        "total_lines": len(lines),
+        "blank_lines": blank_lines,
+        "short_lines": short_lines,
+        "unique_lines": len(occurrences),
+        "duplicate_lines": sum(len(line_numbers) - 1 for line_numbers in occurrences.values()),
+        "prescreened_lines": len(occurrences) - len(pending),
+        "llm_batches": len(batches)
+    }
+
+def index_reusable_analyses(previous_analyses: Optional[List[Dict[str, Any]]]) -> Dict[str, List[Dict[str, Any]]]:
+    """Group a previous run's successful section analyses by fingerprint"""
+    reusable: Dict[str, List[Dict[str, Any]]] = {}
+    for analysis in previous_analyses or []:
+        if analysis.get("sectionFingerprint") and analysis.get("status") != "ERROR":
+            reusable.setdefault(analysis["sectionFingerprint"], []).append(analysis)
+    return reusable
+
+def previous_section_titles(previous_analyses: Optional[List[Dict[str, Any]]]) -> Set[str]:
+    """Titles analyzed in a previous run; a pending section with one of them was edited since"""
+    return {analysis["sectionTitle"] for analysis in previous_analyses or [] if analysis.get("sectionTitle")}
+
+def reuse_section_analysis(section: DocumentSection, fingerprint: str, reusable: Dict[str, List[Dict[str, Any]]]) -> Optional[Dict[str, Any]]:
+    """Take a previous analysis of an unchanged section, remapped to its new lines"""
+    if not reusable.get(fingerprint):
+        return None
+    return {
+        **reusable[fingerprint].pop(0),
+        "sectionTitle": section.title,
+        "startLine": section.start_line,
+        "endLine": section.end_line,
+        "reused": True
+    }
+
+@traced("similarity_lookup", section_span_attributes)
+async def reuse_similar_section(section: DocumentSection, fingerprint: str) -> Optional[Dict[str, Any]]:
+    """Reuse the stored analysis of a near-duplicate section from an earlier document"""
+    match = await section_similarity_index.find_similar(section.section_type, section.title, section.content)
+    if match is None:
+        return None
+    return {
+        **match.analysis,
+        "sectionTitle": section.title,
+        "startLine": section.start_line,
+        "endLine": section.end_line,
+        "sectionFingerprint": fingerprint,
+        "reused": True,
+        "reusedFrom": match.provenance()
+    }
+
+@traced("similarity_index_add", section_span_attributes)
+async def remember_section_analysis(section: DocumentSection, result: Dict[str, Any], document_name: Optional[str]):
+    """Index a fresh LLM analysis so near-duplicate sections can reuse it"""
+    if result["status"] == "ERROR":
+        return
+    analysis = {key: value for key, value in result.items() if key not in ("sectionFingerprint", "reused", "reusedFrom")}
+    await section_similarity_index.add(section.section_type, section.title, section.content, analysis, document_name)
+
+async def analyze_sections(
+    sections: List[DocumentSection],
+    previous_analyses: Optional[List[Dict[str, Any]]] = None,
+    on_section: Optional[Callable[[int, Dict[str, Any]], Awaitable[None]]] = None,
+    document_name: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """Analyze sections concurrently, returning results in document order.
+
+    Sections whose fingerprint matches an entry in `previous_analyses` are spliced in
+    from that entry (with line numbers remapped) instead of being sent to the LLM, as
+    are near-duplicates of sections analyzed in earlier documents. A section edited
+    since `previous_analyses` always goes to the LLM, so the index cannot hand back
+    the analysis of its own earlier version.
+    `on_section` is awaited with (section index, result) as soon as each result is ready.
+    """
+    reusable = index_reusable_analyses(previous_analyses)
+    edited_titles = previous_section_titles(previous_analyses)
+
+    section_analyses: List[Optional[Dict[str, Any]]] = [None] * len(sections)
+    pending = []
+    for index, section in enumerate(sections):
+        fingerprint = section_fingerprint(section)
+        section_analyses[index] = reuse_section_analysis(section, fingerprint, reusable)
+        if section_analyses[index] is None:
+            pending.append((index, section, fingerprint))
+
+    if previous_analyses is not None:
+        print(f"♻️  Reusing {len(sections) - len(pending)} unchanged sections, re-analyzing {len(pending)}")
+
+    if on_section:
+        for index, analysis in enumerate(section_analyses):
+            if analysis is not None:
+                await on_section(index, analysis)
+
+    # Clear-cut sections are decided by the rule pre-screen, and near-duplicates of
+    # earlier sections reuse their analysis; only the rest go to the LLM
+    escalated = []
+    prescreened = similar = 0
+    for index, section, fingerprint in pending:
+        with span("prescreen", **section_span_attributes(section)):
+            result = prescreen_section(section)
+        if result is not None:
+            result["sectionFingerprint"] = fingerprint
+            result["reused"] = False
+            prescreened += 1
+        else:
+            result = None if section.title in edited_titles else await reuse_similar_section(section, fingerprint)
+            if result is None:
+                escalated.append((index, section, fingerprint))
+                continue
+            similar += 1
+        section_analyses[index] = result
+        if on_section:
+            await on_section(index, result)
+    if prescreened:
+        print(f"📏 Rule pre-screen decided {prescreened} sections")
+    if similar:
+        print(f"🧬 Reusing {similar} near-duplicate sections from earlier documents")
+    pending = escalated
+
+    # Search once per section and share the chunks between its analysis and workaround calls
+    retrieval_context = RetrievalContext()
+    total = len(pending)
+    completed = 0
+
+    # Batched completions run on the last model tier, so triage every section before
+    # batching and only pack the ones the cheaper tiers escalate
+    pre_triage = model_cascade.enabled and settings.analysis_batch_enabled
+    if pre_triage and pending:
+        async def triage_pending(item) -> Optional[Dict[str, Any]]:
+            index, section, fingerprint = item
+            result = await cascade_triage_section(section, retrieval_context)
+            if result is not None:
+                await remember_section_analysis(section, result, document_name)
+                result["sectionFingerprint"] = fingerprint
+                result["reused"] = False
+                section_analyses[index] = result
+                if on_section:
+                    await on_section(index, result)
+            return result
+
+        async def on_triaged(index: int, result: Optional[Dict[str, Any]]):
+            nonlocal completed
+            if result is not None:
+                completed += 1
+                print(f"🔍 Analyzed section {completed}/{total}: {result['sectionTitle']} ({result['status']}, triage)")
+
+        settled = await run_bounded(
+            pending,
+            triage_pending,
+            max_concurrency=settings.analysis_max_concurrency,
+            rate_limiter=analysis_rate_limiter,
+            on_result=on_triaged
+        )
+        pending = [item for item, result in zip(pending, settled) if result is None]
+        print(f"🪜 Triage settled {total - len(pending)} sections, escalating {len(pending)}")
+
+    # Small same-type sections may share one completion
+    batches = [[pending[i] for i in batch] for batch in plan_section_batches([section for _, section, _ in pending])]
+
+    async def analyze_batch(batch) -> List[Dict[str, Any]]:
+        results = await analyze_section_batch([section for _, section, _ in batch], retrieval_context, triage=not pre_triage)
+        for (index, section, fingerprint), result in zip(batch, results):
+            await remember_section_analysis(section, result, document_name)
+            result["sectionFingerprint"] = fingerprint
+            result["reused"] = False
+            section_analyses[index] = result
+            if on_section:
+                await on_section(index, result)
+        return results
+
+    async def on_result(index: int, results: List[Dict[str, Any]]):
+        nonlocal completed
+        for result in results:
+            completed += 1
+            print(f"🔍 Analyzed section {completed}/{total}: {result['sectionTitle']} ({result['status']})")
+
+    await run_bounded(
+        batches,
+        analyze_batch,
+        max_concurrency=settings.analysis_max_concurrency,
+        rate_limiter=analysis_rate_limiter,
+        on_result=on_result
+    )
+
+    if pending:
+        print(f"🔁 Regulatory searches: {retrieval_context.searches} run, {retrieval_context.reuses} reused")
+
+    return section_analyses
+
+async def analyze_section_stream(
+    sections: AsyncIterable[DocumentSection],
+    previous_analyses: Optional[List[Dict[str, Any]]] = None,
+    document_name: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """Analyze sections as they are parsed, returning results in document order.
+
+    Each section is dispatched as soon as the parser emits it, so analysis of early
+    sections overlaps the rest of the upload. Sections are analyzed individually
+    because batch planning needs the whole document up front.
+    """
+    reusable = index_reusable_analyses(previous_analyses)
+    edited_titles = previous_section_titles(previous_analyses)
+    retrieval_context = RetrievalContext()
+    counts = {"analyzed": 0, "reused": 0}
+
+    async def analyze(section: DocumentSection) -> Dict[str, Any]:
+        print(f"  📍 Section: {section.title} (Type: {section.section_type}, Lines: {section.start_line}-{section.end_line})")
+        fingerprint = section_fingerprint(section)
+        reused = reuse_section_analysis(section, fingerprint, reusable)
+        if reused is not None:
+            counts["reused"] += 1
+            return reused
+
+        result = prescreen_section(section)
+        if result is None:
+            similar = None if section.title in edited_titles else await reuse_similar_section(section, fingerprint)
+            if similar is not None:
+                counts["reused"] += 1
+                return similar
+
+            # Rate limit only the sections that go to R2R
+            await analysis_rate_limiter.acquire()
+            result = await analyze_section_compliance(section, retrieval_context)
+            await remember_section_analysis(section, result, document_name)
+        result["sectionFingerprint"] = fingerprint
+        result["reused"] = False
+        counts["analyzed"] += 1
+        print(f"🔍 Analyzed section {counts['analyzed']}: {result['sectionTitle']} ({result['status']})")
+        return result
+
+    section_analyses = await run_bounded_stream(sections, analyze, max_concurrency=settings.analysis_max_concurrency)
+
+    if counts["reused"]:
+        print(f"♻️  Reused {counts['reused']} unchanged or near-duplicate sections, analyzed {counts['analyzed']}")
+    if counts["analyzed"]:
+        print(f"🔁 Regulatory searches: {retrieval_context.searches} run, {retrieval_context.reuses} reused")
+
+    return section_analyses
+
+def build_analysis_summary(filename: str, section_analyses: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Build the document-level analysis response from per-section results"""
+    # Calculate summary statistics
+    total_violations = sum(result['violationCount'] for result in section_analyses)
+    total_sections = len(section_analyses)
+    sections_with_violations = sum(1 for result in section_analyses if result['status'] == 'VIOLATION')
+    
+    # Group violations by regulatory domain
+    regulatory_domains = {}
+    business_sections = []
+    
+    for analysis in section_analyses:
+        if analysis['status'] == 'VIOLATION':
+            section_type = analysis['sectionType']
+            if section_type not in regulatory_domains:
+                regulatory_domains[section_type] = []
+            regulatory_domains[section_type].append(analysis)
+            
+            business_sections.append({
+                "section": analysis['sectionTitle'],
+                "violations": analysis['violationCount'],
+                "impact": analysis['businessImpact'],
+                "risk": analysis['regulatoryRisk']
+            })
+    
+    compliance_score = round(((total_sections - sections_with_violations) / total_sections * 100), 2) if total_sections > 0 else 100
+    
+    document_sections.observe(total_sections)
+    for analysis in section_analyses:
+        section_violations.observe(analysis['violationCount'])
+    
+    return {
+        "document_name": filename,
+        "analysis_date": datetime.utcnow(),
+        "analysis_type": "semantic_sections",
+        "total_sections_analyzed": total_sections,
+        "sections_with_violations": sections_with_violations,
+        "total_violations": total_violations,
+        "section_analyses": section_analyses,
+        "regulatory_summary": {
+            "compliance_score": compliance_score,
+            "status": "NON-COMPLIANT" if sections_with_violations > 0 else "COMPLIANT",
+            "domains_affected": list(regulatory_domains.keys()),
+            "business_impact_sections": business_sections
+        },
+        "violation_breakdown": regulatory_domains
+    }
+
+async def load_previous_analyses(previous_analysis_id: Optional[str]) -> Optional[List[Dict[str, Any]]]:
+    """Fetch the section analyses of a stored run, or None when no ID is given"""
+    if not previous_analysis_id:
+        return None
+
+    previous = await analysis_store.get(previous_analysis_id)
+    if previous is None:
+        raise HTTPException(status_code=404, detail=f"Previous analysis {previous_analysis_id} not found")
+    return previous.get("section_analyses", [])
+
+async def run_until_disconnected(http_request: Request, work: Awaitable[Any], poll_interval: float = 0.5) -> Any:
+    """Await `work`, cancelling it if the client goes away first"""
+    task = asyncio.ensure_future(work)
+    disconnected = False
+
+    async def watch_disconnect():
+        nonlocal disconnected
+        while not task.done():
+            if await http_request.is_disconnected():
+                print("🔌 Client disconnected, cancelling in-flight analysis")
+                disconnected = True
+                task.cancel()
+                return
+            await asyncio.sleep(poll_interval)
+
+    watcher = asyncio.create_task(watch_disconnect())
+    try:
+        return await task
+    except asyncio.CancelledError:
+        if not disconnected:
+            raise
+        raise HTTPException(status_code=499, detail="Client closed request")
+    finally:
+        watcher.cancel()
+
+# Spans reported as units in a timings block, one per section or section batch
+TIMING_UNITS = ("analyze_section", "analyze_section_batch")
+
+async def finish_trace(trace: Optional[Trace]):
+    """Export a finished request trace, if one was recorded"""
+    if trace is not None:
+        await asyncio.to_thread(export_trace, trace)
 
 @router.post("/analyze")
-async def analyze_compliance(request: ComplianceAnalysisRequest):
-    """Analyze document content for compliance violations using semantic section analysis"""
+async def analyze_compliance(request: ComplianceAnalysisRequest, http_request: Request, timings: bool = False):
+    """Analyze document content for compliance violations using semantic section analysis.
+
+    With `timings=true` the response includes a per-stage timing breakdown and critical path.
+    """
+    trace = None
     try:
-        print(f"📄 Starting semantic section analysis for: {request.filename}")
-        
-        # Get document content
-        document_content = request.content
-        if not document_content:
-            raise HTTPException(status_code=400, detail="No document content provided")
-        
-        print(f"📝 Document content length: {len(document_content)} characters")
-        
-        # Parse document into semantic sections
-        sections = parse_document_sections(document_content)
-        print(f"📋 Parsed document into {len(sections)} semantic sections")
-        
-        # Log section breakdown
-        for section in sections:
-            print(f"  📍 Section: {section.title} (Type: {section.section_type}, Lines: {section.start_line}-{section.end_line})")
-        
-        # Analyze each section
-        section_analyses = []
-        
-        for i, section in enumerate(sections, 1):
-            print(f"🔍 Analyzing section {i}/{len(sections)}: {section.title}")
+        with start_trace("analyze_compliance", enabled=tracing_requested(timings), filename=request.filename or "") as trace:
+            print(f"📄 Starting semantic section analysis for: {request.filename}")
+            
+            # Get document content
+            document_content = request.content
+            if not document_content:
+                raise HTTPException(status_code=400, detail="No document content provided")
+            
+            print(f"📝 Document content length: {len(document_content)} characters")
+            
+            # Parse document into semantic sections
+            with span("parse_document_sections", characters=len(document_content)):
+                sections = parse_document_sections(document_content)
+            print(f"📋 Parsed document into {len(sections)} semantic sections")
             
-            # Analyze the section
-            result = await analyze_section_compliance(section)
-            section_analyses.append(result)
+            # Log section breakdown
+            for section in sections:
+                print(f"  📍 Section: {section.title} (Type: {section.section_type}, Lines: {section.start_line}-{section.end_line})")
             
-            # Small delay to manage API rate limits
-            await asyncio.sleep(0.2)
+            # Load the previous run so unchanged sections can be reused
+            with span("load_previous_analyses"):
+                previous_analyses = await load_previous_analyses(request.previous_analysis_id)
+            
+            # Analyze sections in parallel (bounded and rate limited)
+            with span("analyze_sections", sections=len(sections)):
+                section_analyses = await run_until_disconnected(http_request, analyze_sections(sections, previous_analyses, document_name=request.filename))
+
+            print(f"✅ Section analysis complete. Processed {len(section_analyses)} sections")
+            
+            result = build_analysis_summary(request.filename, section_analyses)
+            result["reused_sections"] = sum(1 for analysis in section_analyses if analysis.get("reused"))
+            result["previous_analysis_id"] = request.previous_analysis_id
+            with span("store_analysis"):
+                result["analysis_id"] = await analysis_store.save(result)
         
-        print(f"✅ Section analysis complete. Processed {len(section_analyses)} sections")
+        if timings:
+            result["timings"] = trace.timings(TIMING_UNITS)
+        return result
         
-        # Calculate summary statistics
-        total_violations = sum(result['violationCount'] for result in section_analyses)
-        total_sections = len(section_analyses)
-        sections_with_violations = sum(1 for result in section_analyses if result['status'] == 'VIOLATION')
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"❌ Error during analysis: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        await finish_trace(trace)
+
+@router.post("/analyze-lines")
+async def analyze_compliance_lines(request: ComplianceAnalysisRequest, http_request: Request):
+    """Analyze document content line by line, returning a line-granular report"""
+    try:
+        print(f"📄 Starting line analysis for: {request.filename}")
         
-        # Group violations by regulatory domain
-        regulatory_domains = {}
-        business_sections = []
+        if not request.content:
+            raise HTTPException(status_code=400, detail="No document content provided")
         
-        for analysis in section_analyses:
-            if analysis['status'] == 'VIOLATION':
-                section_type = analysis['sectionType']
-                if section_type not in regulatory_domains:
-                    regulatory_domains[section_type] = []
-                regulatory_domains[section_type].append(analysis)
-                
-                business_sections.append({
-                    "section": analysis['sectionTitle'],
-                    "violations": analysis['violationCount'],
-                    "impact": analysis['businessImpact'],
-                    "risk": analysis['regulatoryRisk']
-                })
+        report = await run_until_disconnected(http_request, analyze_document_lines(request.content))
+        line_analyses = report["line_analyses"]
         
-        compliance_score = round(((total_sections - sections_with_violations) / total_sections * 100), 2) if total_sections > 0 else 100
+        print(f"✅ Line analysis complete. {report['unique_lines']} unique lines in {report['llm_batches']} batches, {report['prescreened_lines']} pre-screened, {report['duplicate_lines']} duplicates")
+        
+        lines_with_violations = sum(1 for result in line_analyses if result["status"] == "VIOLATION")
+        compliance_score = round((len(line_analyses) - lines_with_violations) / len(line_analyses) * 100, 2) if line_analyses else 100
         
         return {
             "document_name": request.filename,
             "analysis_date": datetime.utcnow(),
-            "analysis_type": "semantic_sections",
-            "total_sections_analyzed": total_sections,
-            "sections_with_violations": sections_with_violations,
-            "total_violations": total_violations,
-            "section_analyses": section_analyses,
-            "regulatory_summary": {
-                "compliance_score": compliance_score,
-                "status": "NON-COMPLIANT" if sections_with_violations > 0 else "COMPLIANT",
-                "domains_affected": list(regulatory_domains.keys()),
-                "business_impact_sections": business_sections
-            },
-            "violation_breakdown": regulatory_domains
+            "analysis_type": "lines",
+            **report,
+            "lines_with_violations": lines_with_violations,
+            "total_violations": sum(result["violations"] for result in line_analyses),
+            "compliance_score": compliance_score,
+            "status": "NON-COMPLIANT" if lines_with_violations > 0 else "COMPLIANT"
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"❌ Error during analysis: {e}")
+        print(f"❌ Error during line analysis: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.post("/upload-analyze")
-async def upload_and_analyze(file: UploadFile = File(...)):
-    """Upload document and analyze for compliance"""
+def ndjson_event(event_type: str, **data) -> str:
+    """Encode one NDJSON stream frame"""
+    return json.dumps(jsonable_encoder({"type": event_type, **data})) + "\n"
+
+async def stream_section_analysis(request: ComplianceAnalysisRequest, sections: List[DocumentSection], previous_analyses: Optional[List[Dict[str, Any]]]) -> AsyncIterator[str]:
+    """Yield NDJSON frames as sections complete, finishing with the document summary"""
+    total = len(sections)
+    yield ndjson_event(
+        "start",
+        document_name=request.filename,
+        total_sections=total,
+        sections=[
+            {"index": i, "sectionTitle": s.title, "sectionType": s.section_type, "startLine": s.start_line, "endLine": s.end_line}
+            for i, s in enumerate(sections)
+        ]
+    )
+
+    queue: asyncio.Queue = asyncio.Queue()
+    done = 0
+
+    async def on_section(index: int, result: Dict[str, Any]):
+        await queue.put((index, result))
+
+    # The producer runs independently so a slow client never stalls the analysis workers
+    producer = asyncio.create_task(analyze_sections(sections, previous_analyses, on_section=on_section, document_name=request.filename))
     try:
-        content = await file.read()
-        text_content = content.decode('utf-8')
-        
-        # Process the document
-        return {
-            "filename": file.filename,
-            "size": len(content),
-            "content_preview": text_content[:200] + "..." if len(text_content) > 200 else text_content,
-            "message": "Document uploaded successfully"
+        while done < total:
+            getter = asyncio.ensure_future(queue.get())
+            await asyncio.wait({getter, producer}, return_when=asyncio.FIRST_COMPLETED)
+            if not getter.done():
+                getter.cancel()
+                producer.result()  # Surface the producer's exception
+                break
+
+            index, result = getter.result()
+            done += 1
+            yield ndjson_event("section", index=index, result=result)
+            yield ndjson_event("progress", done=done, total=total)
+
+        section_analyses = await producer
+        summary = build_analysis_summary(request.filename, section_analyses)
+        summary["reused_sections"] = sum(1 for analysis in section_analyses if analysis.get("reused"))
+        summary["previous_analysis_id"] = request.previous_analysis_id
+        analysis_id = await analysis_store.save(summary)
+        print(f"✅ Streamed analysis complete. Processed {total} sections")
+
+        summary.pop("section_analyses")
+        yield ndjson_event("summary", analysis_id=analysis_id, **summary)
+
+    except Exception as e:
+        print(f"❌ Error during streamed analysis: {e}")
+        yield ndjson_event("error", detail=str(e))
+    finally:
+        # Runs when the client disconnects too: stop any sections still in flight
+        if not producer.done():
+            producer.cancel()
+            await asyncio.gather(producer, return_exceptions=True)
+
+@router.post("/analyze/stream")
+async def analyze_compliance_stream(request: ComplianceAnalysisRequest):
+    """Stream per-section compliance results as NDJSON while the analysis runs"""
+    if not request.content:
+        raise HTTPException(status_code=400, detail="No document content provided")
+
+    print(f"📄 Starting streamed section analysis for: {request.filename}")
+    sections = parse_document_sections(request.content)
+    print(f"📋 Parsed document into {len(sections)} semantic sections")
+    previous_analyses = await load_previous_analyses(request.previous_analysis_id)
+
+    return StreamingResponse(
+        stream_section_analysis(request, sections, previous_analyses),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def run_analysis_job(job: Dict[str, Any], reporter: JobReporter) -> Dict[str, Any]:
+    """Analyze a queued job's document, reporting each section as it completes"""
+    sections = parse_document_sections(job["content"])
+    print(f"📋 Job {job['_id']}: parsed document into {len(sections)} semantic sections")
+
+    # The ID was checked when the job was queued, but the stored run may have gone since
+    previous_analysis_id = job.get("previous_analysis_id")
+    previous = await analysis_store.get(previous_analysis_id) if previous_analysis_id else None
+    if previous_analysis_id and previous is None:
+        print(f"⚠️  Job {job['_id']}: previous analysis {previous_analysis_id} no longer exists, analyzing without reuse")
+    previous_analyses = previous.get("section_analyses", []) if previous else None
+
+    # Sections finished before an interruption are reused by fingerprint on resume
+    partial_results = list((job.get("partial_results") or {}).values())
+    if partial_results:
+        previous_analyses = partial_results + (previous_analyses or [])
+
+    await reporter.start(len(sections))
+    section_analyses = await analyze_sections(sections, previous_analyses, on_section=reporter.section, document_name=job.get("filename"))
+
+    result = build_analysis_summary(job["filename"], section_analyses)
+    result["reused_sections"] = sum(1 for analysis in section_analyses if analysis.get("reused"))
+    result["previous_analysis_id"] = job.get("previous_analysis_id")
+    result["analysis_id"] = await analysis_store.save(result)
+    return result
+
+analysis_job_manager.register_runner(run_analysis_job)
+
+def serialize_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Public view of a job, with partial results in document order"""
+    partial_results = job.get("partial_results") or {}
+    return {
+        "job_id": job["_id"],
+        "status": job["status"],
+        "filename": job.get("filename"),
+        "progress": job.get("progress"),
+        "created_at": job.get("created_at"),
+        "started_at": job.get("started_at"),
+        "finished_at": job.get("finished_at"),
+        "error": job.get("error"),
+        "section_analyses": [partial_results[key] for key in sorted(partial_results, key=int)],
+        "result": job.get("result")
+    }
+
+@router.post("/jobs", status_code=202)
+async def create_analysis_job(request: ComplianceAnalysisRequest):
+    """Queue a document for background compliance analysis"""
+    if not request.content:
+        raise HTTPException(status_code=400, detail="No document content provided")
+    # Reject an unknown previous analysis now rather than failing the job later
+    await load_previous_analyses(request.previous_analysis_id)
+
+    job = await analysis_job_manager.submit({
+        "filename": request.filename,
+        "content": request.content,
+        "analysis_type": request.analysis_type,
+        "previous_analysis_id": request.previous_analysis_id
+    })
+    return {"job_id": job["_id"], "status": job["status"]}
+
+@router.get("/jobs/{job_id}")
+async def get_analysis_job(job_id: str):
+    """Get a job's status, progress and (partial) results"""
+    job = await analysis_job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return serialize_job(job)
+
+@router.delete("/jobs/{job_id}")
+async def cancel_analysis_job(job_id: str):
+    """Cancel a queued or running job"""
+    job = await analysis_job_manager.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return {"job_id": job_id, "status": job["status"]}
+
+@router.get("/rules")
+async def get_prescreen_rules():
+    """Rule pre-screen version and per-rule hit statistics"""
+    return rule_screener.stats()
+
+@router.post("/rules/reload")
+async def reload_prescreen_rules():
+    """Reload the rule file, e.g. after publishing a new rule version"""
+    previous_version = rule_screener.version
+    rule_screener.load()
+    return {"previous_version": previous_version, "version": rule_screener.version, "rules": len(rule_screener.rules)}
+
+@router.get("/parsing")
+async def get_parse_stats():
+    """How completions were parsed (JSON or text), parse failures and format re-asks"""
+    return parse_stats.stats()
+
+@router.get("/cascade")
+async def get_cascade_stats():
+    """Model cascade tiers with per-tier calls, outcomes, latency and escalation rates"""
+    return model_cascade.stats()
+
+@router.get("/similarity")
+async def get_similarity_index_stats():
+    """Near-duplicate section index size and reuse statistics"""
+    return section_similarity_index.stats()
+
+@router.get("/workarounds/{handle}")
+async def get_section_workarounds(handle: str):
+    """Workarounds for a section analyzed with WORKAROUND_MODE=lazy or prefetch, generated on first request"""
+    cached = workaround_store.is_ready(handle)
+    workarounds = await workaround_store.get(handle, generate_workarounds_for_handle)
+    if workarounds is None:
+        raise HTTPException(status_code=404, detail="Workaround handle not found")
+    return {"handle": handle, "cached": cached, "workarounds": workarounds}
+
+@router.get("/workarounds")
+async def get_workaround_stats():
+    """Workaround mode and on-demand generation statistics"""
+    return workaround_store.stats()
+
+@router.post("/upload-analyze", openapi_extra={
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "properties": {"file": {"type": "string", "format": "binary"}},
+                    "required": ["file"]
+                }
+            },
+            "text/plain": {"schema": {"type": "string"}}
         }
+    }
+})
+async def upload_and_analyze(http_request: Request, previous_analysis_id: Optional[str] = None, timings: bool = False):
+    """Upload a document and analyze it for compliance while it is still arriving.
+
+    The body is read as a stream rather than as an UploadFile, so sections are parsed
+    and sent for analysis as their bytes arrive. The response matches /analyze.
+    """
+    upload = StreamingUpload(http_request)
+    parser = IncrementalSectionParser()
+    characters = 0
+
+    async def parsed_sections() -> AsyncIterator[DocumentSection]:
+        nonlocal characters
+        async for text in upload.iter_text():
+            characters += len(text)
+            for section in parser.feed(text):
+                yield section
+        for section in parser.close():
+            yield section
+
+    trace = None
+    try:
+        with start_trace("upload_and_analyze", enabled=tracing_requested(timings)) as trace:
+            # Load the previous run so unchanged sections can be reused
+            with span("load_previous_analyses"):
+                previous_analyses = await load_previous_analyses(previous_analysis_id)
+
+            print("📤 Streaming upload into semantic section analysis")
+            # Parsing is interleaved with analysis here, so it has no span of its own
+            with span("analyze_sections"):
+                section_analyses = await analyze_section_stream(parsed_sections(), previous_analyses, document_name=upload.filename)
+            if not characters:
+                raise HTTPException(status_code=400, detail="No document content provided")
+
+            print(f"📝 Document {upload.filename}: {upload.bytes_read} bytes, {parser.line_count} lines")
+            print(f"✅ Section analysis complete. Processed {len(section_analyses)} sections")
+            if trace is not None:
+                trace.root.attributes["filename"] = upload.filename or ""
+
+            result = build_analysis_summary(upload.filename, section_analyses)
+            result["reused_sections"] = sum(1 for analysis in section_analyses if analysis.get("reused"))
+            result["previous_analysis_id"] = previous_analysis_id
+            with span("store_analysis"):
+                result["analysis_id"] = await analysis_store.save(result)
+
+        if timings:
+            result["timings"] = trace.timings(TIMING_UNITS)
+        return result
+
+    except HTTPException:
+        raise
+    except ClientDisconnect:
+        print("🔌 Client disconnected mid-upload, cancelled in-flight analysis")
+        raise HTTPException(status_code=499, detail="Client closed request")
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except InvalidUploadError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except UnicodeDecodeError as e:
+        raise HTTPException(status_code=400, detail=f"File is not valid UTF-8 text: {e}")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        print(f"❌ Error during upload analysis: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        await finish_trace(trace)
@@ -6,6 +6,9 @@ from datetime import datetime
 
 from app.models.schemas import RAGQuery
 from app.services.r2r_service import r2r_service
+from app.services.completion_cache import completion_cache
+from app.services.context_packer import context_packer
+from app.services.uploads import UploadTooLargeError
 
 router = APIRouter(prefix="/rag", tags=["rag"])
 
@@ -14,7 +17,7 @@ async def r2r_health_check():
     """Check R2R service health"""
     try:
         health = await r2r_service.health_check()
-        return health
+        return {**health, "pool": r2r_service.pool_status(), "resilience": r2r_service.resilience_status()}
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
@@ -34,6 +37,8 @@ async def ingest_document(file: UploadFile = File(...)):
             "filename": file.filename,
             "result": result
         }
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -56,7 +61,8 @@ async def rag_chat(query_data: RAGQuery):
         result = await r2r_service.rag_completion(
             query=query_data.query,
             use_hybrid_search=query_data.use_hybrid_search,
-            task_prompt=query_data.task_prompt
+            task_prompt=query_data.task_prompt,
+            bypass_cache=query_data.bypass_cache
         )
         return {
             "query": query_data.query,
@@ -81,4 +87,23 @@ async def delete_document(document_id: str):
         result = await r2r_service.delete_document(document_id)
         return result
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/cache")
+async def completion_cache_stats():
+    """Get completion cache hit/miss statistics"""
+    return completion_cache.stats()
+
+@router.delete("/cache")
+async def clear_completion_cache():
+    """Clear every completion cache tier"""
+    try:
+        await completion_cache.clear()
+        return {"message": "Completion cache cleared"}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/context")
+async def context_packing_stats():
+    """Get retrieval context packing statistics"""
+    return context_packer.stats()
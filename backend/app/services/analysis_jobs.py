@@ -0,0 +1,222 @@
+"""
+Background compliance analysis jobs with a MongoDB-backed job store
+"""
+import asyncio
+import uuid
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Callable, Awaitable
+
+from pymongo import ReturnDocument
+
+from app.core.config import settings
+from app.core.database import get_database
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+UNFINISHED_STATUSES = [JOB_QUEUED, JOB_RUNNING]
+
+class JobReporter:
+    """Progress callbacks handed to the job runner"""
+
+    def __init__(self, manager: "AnalysisJobManager", job_id: str):
+        self.manager = manager
+        self.job_id = job_id
+        self.done = 0
+
+    async def start(self, total: int):
+        await self.manager._update(self.job_id, {"progress": {"done": 0, "total": total}})
+
+    async def section(self, index: int, result: Dict[str, Any]):
+        self.done += 1
+        await self.manager._update(self.job_id, {
+            f"partial_results.{index}": result,
+            "progress.done": self.done
+        })
+
+JobRunner = Callable[[Dict[str, Any], JobReporter], Awaitable[Dict[str, Any]]]
+
+class AnalysisJobManager:
+    """Queues analysis jobs and drains them with an in-process asyncio worker pool.
+
+    Job state is written through to MongoDB when it is connected, so unfinished jobs
+    can be resumed after a restart. A single API process is expected to own the queue.
+    """
+
+    def __init__(self, collection_name: str, concurrency: int):
+        self.collection_name = collection_name
+        self.concurrency = concurrency
+        self.runner: Optional[JobRunner] = None
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._running: Dict[str, asyncio.Task] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+
+    def register_runner(self, runner: JobRunner):
+        """Set the coroutine that performs a job's analysis"""
+        self.runner = runner
+
+    def _collection(self):
+        db = get_database()
+        return db[self.collection_name] if db is not None else None
+
+    async def _update(self, job_id: str, fields: Dict[str, Any]):
+        """Apply dotted-path field updates to the in-memory job and MongoDB"""
+        fields = {**fields, "updated_at": datetime.utcnow()}
+        job = self._jobs.get(job_id)
+        if job is not None:
+            for path, value in fields.items():
+                target = job
+                *parents, leaf = path.split(".")
+                for key in parents:
+                    target = target.setdefault(key, {})
+                target[leaf] = value
+
+        collection = self._collection()
+        if collection is not None:
+            try:
+                await collection.update_one({"_id": job_id}, {"$set": fields})
+            except Exception as e:
+                print(f"⚠️  Failed to persist job {job_id}: {e}")
+
+    async def submit(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Store a new job and queue it"""
+        now = datetime.utcnow()
+        job = {
+            "_id": uuid.uuid4().hex,
+            **payload,
+            "status": JOB_QUEUED,
+            "progress": {"done": 0, "total": None},
+            "partial_results": {},
+            "result": None,
+            "error": None,
+            "created_at": now,
+            "updated_at": now,
+            "started_at": None,
+            "finished_at": None
+        }
+        self._jobs[job["_id"]] = job
+
+        collection = self._collection()
+        if collection is not None:
+            try:
+                await collection.insert_one(dict(job))
+            except Exception as e:
+                print(f"⚠️  Failed to persist job {job['_id']}: {e}")
+
+        await self._queue.put(job["_id"])
+        print(f"🗂️  Queued analysis job {job['_id']} ({payload.get('filename')})")
+        return job
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Load a job from memory or MongoDB"""
+        if job_id in self._jobs:
+            return self._jobs[job_id]
+
+        collection = self._collection()
+        if collection is None:
+            return None
+        return await collection.find_one({"_id": job_id})
+
+    async def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Cancel a queued or running job"""
+        job = await self.get(job_id)
+        if job is None or job["status"] not in UNFINISHED_STATUSES:
+            return job
+
+        await self._update(job_id, {"status": JOB_CANCELLED, "finished_at": datetime.utcnow()})
+        task = self._running.get(job_id)
+        if task:
+            task.cancel()
+        print(f"🛑 Cancelled analysis job {job_id}")
+        return await self.get(job_id)
+
+    async def _claim(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Atomically move a queued job to running"""
+        fields = {"status": JOB_RUNNING, "started_at": datetime.utcnow(), "updated_at": datetime.utcnow()}
+        collection = self._collection()
+        if collection is not None:
+            try:
+                job = await collection.find_one_and_update(
+                    {"_id": job_id, "status": JOB_QUEUED},
+                    {"$set": fields},
+                    return_document=ReturnDocument.AFTER
+                )
+                if job is None:
+                    return None
+                self._jobs[job_id] = job
+                return job
+            except Exception as e:
+                print(f"⚠️  Failed to claim job {job_id} in MongoDB: {e}")
+
+        job = self._jobs.get(job_id)
+        if job is None or job["status"] != JOB_QUEUED:
+            return None
+        job.update(fields)
+        return job
+
+    async def _run(self, job_id: str):
+        job = await self._claim(job_id)
+        if job is None:
+            return  # Cancelled while queued, or claimed elsewhere
+
+        print(f"⚙️  Running analysis job {job_id}")
+        try:
+            result = await self.runner(job, JobReporter(self, job_id))
+            await self._update(job_id, {"status": JOB_COMPLETED, "result": result, "finished_at": datetime.utcnow()})
+            print(f"✅ Analysis job {job_id} completed")
+        except asyncio.CancelledError:
+            if job["status"] != JOB_CANCELLED:
+                raise  # Shutdown: leave the job running so it resumes on restart
+        except Exception as e:
+            print(f"❌ Analysis job {job_id} failed: {e}")
+            await self._update(job_id, {"status": JOB_FAILED, "error": str(e), "finished_at": datetime.utcnow()})
+        finally:
+            # Completed jobs live in MongoDB; keep memory only when there is no database
+            if self._collection() is not None:
+                self._jobs.pop(job_id, None)
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            task = asyncio.create_task(self._run(job_id))
+            self._running[job_id] = task
+            try:
+                await task  # User cancellations are absorbed by _run; only shutdown propagates
+            finally:
+                self._running.pop(job_id, None)
+                self._queue.task_done()
+
+    async def start(self):
+        """Start the worker pool and requeue jobs left unfinished by a previous run"""
+        self._queue = asyncio.Queue()
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(max(1, self.concurrency))]
+
+        collection = self._collection()
+        if collection is None:
+            return
+
+        try:
+            await collection.update_many({"status": JOB_RUNNING}, {"$set": {"status": JOB_QUEUED}})
+            resumed = 0
+            async for job in collection.find({"status": JOB_QUEUED}, {"_id": 1}).sort("created_at", 1):
+                await self._queue.put(job["_id"])
+                resumed += 1
+            if resumed:
+                print(f"♻️  Resuming {resumed} unfinished analysis jobs")
+        except Exception as e:
+            print(f"⚠️  Could not resume analysis jobs: {e}")
+
+    async def stop(self):
+        """Stop the worker pool; running jobs stay unfinished and resume on next start"""
+        for worker in self._workers:
+            worker.cancel()
+        for task in list(self._running.values()):
+            task.cancel()
+        await asyncio.gather(*self._workers, *self._running.values(), return_exceptions=True)
+        self._workers = []
+
+# Global analysis job manager instance
+analysis_job_manager = AnalysisJobManager(settings.analysis_job_collection, settings.analysis_job_workers)
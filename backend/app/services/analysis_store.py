@@ -0,0 +1,60 @@
+"""
+Persistence for completed compliance analyses
+"""
+import copy
+import uuid
+from collections import OrderedDict
+from typing import Optional, Dict, Any
+
+from app.core.config import settings
+from app.core.database import get_database
+
+class AnalysisStore:
+    """Stores analysis results in MongoDB, keeping recent ones in memory as well"""
+
+    def __init__(self, collection_name: str, max_memory_entries: int = 100):
+        self.collection_name = collection_name
+        self.max_memory_entries = max_memory_entries
+        self._recent: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    def _remember(self, analysis_id: str, analysis: Dict[str, Any]):
+        self._recent[analysis_id] = analysis
+        self._recent.move_to_end(analysis_id)
+        while len(self._recent) > self.max_memory_entries:
+            self._recent.popitem(last=False)
+
+    async def save(self, analysis: Dict[str, Any]) -> str:
+        """Persist an analysis result and return its ID"""
+        analysis_id = uuid.uuid4().hex
+        self._remember(analysis_id, copy.deepcopy(analysis))
+
+        db = get_database()
+        if db is not None:
+            try:
+                await db[self.collection_name].insert_one({**copy.deepcopy(analysis), "_id": analysis_id})
+            except Exception as e:
+                print(f"⚠️  Failed to persist analysis {analysis_id}: {e}")
+
+        return analysis_id
+
+    async def get(self, analysis_id: str) -> Optional[Dict[str, Any]]:
+        """Load a stored analysis result by ID"""
+        if analysis_id in self._recent:
+            return copy.deepcopy(self._recent[analysis_id])
+
+        db = get_database()
+        if db is None:
+            return None
+
+        try:
+            document = await db[self.collection_name].find_one({"_id": analysis_id})
+        except Exception as e:
+            print(f"⚠️  Failed to load analysis {analysis_id}: {e}")
+            return None
+
+        if document:
+            document.pop("_id", None)
+        return document
+
+# Global analysis store instance
+analysis_store = AnalysisStore(settings.analysis_store_collection)
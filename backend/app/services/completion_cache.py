@@ -0,0 +1,216 @@
+"""
+Content-addressed cache for RAG completions
+"""
+import hashlib
+import json
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Optional, Dict, Any, List
+
+from app.core.config import settings
+from app.core.database import get_database
+
+def make_cache_key(query: str, task_prompt: Optional[str], chunk_ids: List[str], generation_config: Dict[str, Any]) -> str:
+    """Hash everything that determines a completion into a stable key"""
+    payload = json.dumps({
+        "query": query,
+        "task_prompt": task_prompt or "",
+        "chunk_ids": list(chunk_ids),
+        "generation_config": generation_config
+    }, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def chunk_identity(chunk: Dict[str, Any]) -> str:
+    """Stable identifier for a retrieved chunk, falling back to a hash of its text"""
+    chunk_id = chunk.get("id") or chunk.get("chunk_id")
+    if chunk_id:
+        return str(chunk_id)
+    return hashlib.sha1(chunk.get("text", "").encode("utf-8")).hexdigest()
+
+class CacheTier(ABC):
+    """Base class for a completion cache tier"""
+    name = "tier"
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Cached value for `key`, or None on a miss"""
+
+    @abstractmethod
+    async def set(self, key: str, value: Dict[str, Any]):
+        """Store `value` under `key`"""
+
+    @abstractmethod
+    async def clear(self):
+        """Drop every entry"""
+
+    def stats(self) -> Dict[str, Any]:
+        return {"hits": self.hits, "misses": self.misses}
+
+class LRUCacheTier(CacheTier):
+    """In-process LRU tier with per-entry TTL"""
+    name = "memory"
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        super().__init__()
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    async def set(self, key: str, value: Dict[str, Any]):
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {**super().stats(), "entries": len(self._entries), "max_entries": self.max_entries}
+
+class MongoCacheTier(CacheTier):
+    """MongoDB-backed tier shared across workers; a no-op while the database is unavailable"""
+    name = "mongodb"
+
+    def __init__(self, collection_name: str, ttl_seconds: float):
+        super().__init__()
+        self.collection_name = collection_name
+        self.ttl_seconds = ttl_seconds
+        self._index_ready = False
+
+    async def _collection(self):
+        db = get_database()
+        if db is None:
+            return None
+
+        collection = db[self.collection_name]
+        if not self._index_ready:
+            try:
+                # Let MongoDB expire stale entries on its own
+                await collection.create_index("expires_at", expireAfterSeconds=0)
+                self._index_ready = True
+            except Exception as e:
+                print(f"⚠️  Could not create completion cache TTL index: {e}")
+        return collection
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            collection = await self._collection()
+            if collection is None:
+                return None
+
+            document = await collection.find_one({"_id": key})
+            if not document or document.get("expires_at", datetime.min) < datetime.utcnow():
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            return document["value"]
+        except Exception as e:
+            print(f"⚠️  Completion cache lookup failed: {e}")
+            return None
+
+    async def set(self, key: str, value: Dict[str, Any]):
+        try:
+            collection = await self._collection()
+            if collection is None:
+                return
+
+            await collection.replace_one(
+                {"_id": key},
+                {
+                    "_id": key,
+                    "value": value,
+                    "created_at": datetime.utcnow(),
+                    "expires_at": datetime.utcnow() + timedelta(seconds=self.ttl_seconds)
+                },
+                upsert=True
+            )
+        except Exception as e:
+            print(f"⚠️  Completion cache write failed: {e}")
+
+    async def clear(self):
+        collection = await self._collection()
+        if collection is not None:
+            await collection.delete_many({})
+
+class CompletionCache:
+    """Looks up tiers in order and back-fills faster tiers on a slower-tier hit"""
+
+    def __init__(self, tiers: List[CacheTier], enabled: bool = True):
+        self.tiers = tiers
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        for i, tier in enumerate(self.tiers):
+            value = await tier.get(key)
+            if value is not None:
+                for faster_tier in self.tiers[:i]:
+                    await faster_tier.set(key, value)
+                self.hits += 1
+                return value
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, value: Dict[str, Any]):
+        for tier in self.tiers:
+            await tier.set(key, value)
+
+    async def clear(self):
+        for tier in self.tiers:
+            await tier.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "tiers": {tier.name: tier.stats() for tier in self.tiers}
+        }
+
+def build_completion_cache() -> CompletionCache:
+    """Build the cache tiers configured in settings"""
+    tiers: List[CacheTier] = [
+        LRUCacheTier(
+            max_entries=settings.completion_cache_max_entries,
+            ttl_seconds=settings.completion_cache_ttl_seconds
+        )
+    ]
+    if settings.completion_cache_mongo_enabled:
+        tiers.append(MongoCacheTier(
+            collection_name=settings.completion_cache_collection,
+            ttl_seconds=settings.completion_cache_ttl_seconds
+        ))
+    return CompletionCache(tiers, enabled=settings.completion_cache_enabled)
+
+# Global completion cache instance
+completion_cache = build_completion_cache()
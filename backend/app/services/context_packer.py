@@ -0,0 +1,185 @@
+"""
+Token-budgeted packing of retrieved chunks into completion context
+"""
+import re
+from typing import Dict, Any, List, Set, Tuple
+
+from app.core.config import settings
+from app.core.tokens import estimate_tokens
+from app.services.completion_cache import chunk_identity
+
+# A sentence ends at ., ! or ? followed by whitespace and a capital or quote/bracket, or at a line break
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+(?=[A-Z"\'(\[])|\n+')
+WORD_PATTERN = re.compile(r'\w+')
+
+def split_sentences(text: str) -> List[str]:
+    """Split `text` into sentences, each keeping its trailing whitespace"""
+    sentences, start = [], 0
+    for boundary in SENTENCE_BOUNDARY.finditer(text):
+        sentences.append(text[start:boundary.end()])
+        start = boundary.end()
+    if start < len(text):
+        sentences.append(text[start:])
+    return [sentence for sentence in sentences if sentence.strip()]
+
+def sentence_shingles(sentence: str, size: int = 3) -> Set[Tuple[str, ...]]:
+    words = WORD_PATTERN.findall(sentence.lower())
+    if len(words) < size:
+        return {tuple(words)} if words else set()
+    return {tuple(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+def cut_to_tokens(text: str, max_tokens: int) -> str:
+    """Longest whole-word prefix of `text` within `max_tokens`"""
+    words = text.split()
+    low, high = 0, len(words)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if estimate_tokens(" ".join(words[:middle])) <= max_tokens:
+            low = middle
+        else:
+            high = middle - 1
+    return " ".join(words[:low])
+
+def context_header(number: int, filename: str) -> str:
+    return f"DOCUMENT {number} ({filename}):\n"
+
+class ContextPacker:
+    """Packs search chunks into a prompt context within a token budget.
+
+    Chunks are taken in score order. Sentences already covered by a better chunk
+    (overlapping chunk windows, repeated clauses) are dropped, and the chunk that
+    overflows the budget is trimmed at a sentence boundary rather than mid-clause.
+    """
+
+    def __init__(self, token_budget: int, max_chunks: int, min_chunk_tokens: int, overlap_threshold: float):
+        self.token_budget = token_budget
+        self.max_chunks = max_chunks
+        self.min_chunk_tokens = min_chunk_tokens
+        self.overlap_threshold = overlap_threshold
+        self.packs = 0
+        self.chunks_in = 0
+        self.chunks_packed = 0
+        self.duplicates_dropped = 0
+        self.sentences_deduplicated = 0
+        self.chunks_trimmed = 0
+        self.tokens_in = 0
+        self.tokens_packed = 0
+
+    def _covered(self, shingles: Set[Tuple[str, ...]], seen: Set[Tuple[str, ...]]) -> bool:
+        return bool(shingles) and len(shingles & seen) >= self.overlap_threshold * len(shingles)
+
+    def pack(self, chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Chunks to put in the prompt, best first, with `text` deduplicated and trimmed to fit.
+
+        Each packed chunk keeps only the fields the prompt and cache key use: id, score,
+        text, metadata.filename, and whether its text was trimmed.
+        """
+        candidates = [chunk for chunk in chunks if (chunk.get("text") or "").strip()]
+        # Stable sort keeps R2R's order for chunks without scores
+        candidates.sort(key=lambda chunk: chunk.get("score") or 0.0, reverse=True)
+
+        packed: List[Dict[str, Any]] = []
+        seen_ids: Set[str] = set()
+        seen_shingles: Set[Tuple[str, ...]] = set()
+        remaining = self.token_budget
+        self.packs += 1
+        self.chunks_in += len(candidates)
+
+        for chunk in candidates:
+            text = chunk["text"]
+            self.tokens_in += estimate_tokens(text)
+            if len(packed) >= self.max_chunks:
+                continue
+
+            identity = chunk_identity(chunk)
+            if identity in seen_ids:
+                self.duplicates_dropped += 1
+                continue
+
+            sentences = split_sentences(text)
+            novel, chunk_shingles = [], set(seen_shingles)
+            for sentence in sentences:
+                shingles = sentence_shingles(sentence)
+                if not self._covered(shingles, chunk_shingles):
+                    novel.append((sentence, shingles))
+                    chunk_shingles |= shingles
+            self.sentences_deduplicated += len(sentences) - len(novel)
+            if not novel:
+                self.duplicates_dropped += 1
+                continue
+
+            filename = (chunk.get("metadata") or {}).get("filename", "Unknown document")
+            header_tokens = estimate_tokens(context_header(len(packed) + 1, filename))
+            available = remaining - header_tokens
+            if available < self.min_chunk_tokens:
+                continue
+
+            taken, used = [], 0
+            for sentence, shingles in novel:
+                tokens = estimate_tokens(sentence)
+                if used + tokens > available:
+                    break
+                taken.append((sentence, shingles))
+                used += tokens
+            if not taken:
+                # Not even the first sentence fits: keep as many of its words as do
+                partial = cut_to_tokens(novel[0][0], available)
+                if estimate_tokens(partial) < self.min_chunk_tokens:
+                    continue
+                taken = [(partial, sentence_shingles(partial))]
+                used = estimate_tokens(partial)
+
+            packed_text = "".join(sentence for sentence, _ in taken).strip()
+            trimmed = len(taken) < len(sentences) or taken[0][0] != novel[0][0]
+            for _, shingles in taken:
+                seen_shingles |= shingles
+            seen_ids.add(identity)
+            remaining -= header_tokens + used
+            self.chunks_trimmed += trimmed
+            packed.append({
+                "id": identity,
+                "score": chunk.get("score"),
+                "text": packed_text,
+                "metadata": {"filename": filename},
+                "trimmed": trimmed
+            })
+
+        self.chunks_packed += len(packed)
+        self.tokens_packed += sum(estimate_tokens(chunk["text"]) for chunk in packed)
+        return packed
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "token_budget": self.token_budget,
+            "max_chunks": self.max_chunks,
+            "packs": self.packs,
+            "chunks_in": self.chunks_in,
+            "chunks_packed": self.chunks_packed,
+            "duplicates_dropped": self.duplicates_dropped,
+            "sentences_deduplicated": self.sentences_deduplicated,
+            "chunks_trimmed": self.chunks_trimmed,
+            "tokens_in": self.tokens_in,
+            "tokens_packed": self.tokens_packed,
+            "avg_tokens_per_context": round(self.tokens_packed / self.packs, 1) if self.packs else 0.0
+        }
+
+def format_context(packed: List[Dict[str, Any]]) -> str:
+    """The packed chunks as the prompt's regulatory documents block"""
+    return "\n\n".join(
+        context_header(number, chunk["metadata"]["filename"]) + chunk["text"]
+        for number, chunk in enumerate(packed, 1)
+    )
+
+def packed_chunk_key(chunk: Dict[str, Any]) -> str:
+    """Cache identity of a packed chunk, distinguishing trimmed variants of the same chunk"""
+    if not chunk["trimmed"]:
+        return chunk["id"]
+    return f"{chunk['id']}:{len(chunk['text'])}"
+
+# Global context packer
+context_packer = ContextPacker(
+    token_budget=settings.context_token_budget,
+    max_chunks=settings.context_max_chunks,
+    min_chunk_tokens=settings.context_min_chunk_tokens,
+    overlap_threshold=settings.context_overlap_threshold
+)
@@ -0,0 +1,106 @@
+"""
+Model cascade: cheap triage tiers in front of the model that does the detailed analysis
+"""
+from typing import Dict, Any, List
+
+from app.core.config import settings
+from app.core.metrics import cascade_tier_calls_total, cascade_tier_duration
+
+# Triage outcomes; everything except "settled" escalates to the next tier
+OUTCOME_SETTLED = "settled"
+TRIAGE_OUTCOMES = (OUTCOME_SETTLED, "flagged", "low_confidence", "unparsed", "error")
+FINAL_OUTCOMES = ("violation", "compliant", "error")
+
+def parse_model_tiers(value: str) -> List[str]:
+    """Comma-separated model names, cheapest first"""
+    return [model.strip() for model in value.split(",") if model.strip()]
+
+class ModelCascade:
+    """Routes each section through the configured model tiers, cheapest first.
+
+    Every tier but the last triages: a confident compliant verdict settles the
+    section there, anything else (a flagged violation, low confidence, an
+    unparseable answer or an error) escalates to the next tier. The last tier runs
+    the detailed analysis and the workarounds, as a single model does without a cascade.
+    """
+
+    def __init__(self, models: List[str], confidence_threshold: float):
+        if not models:
+            raise ValueError("MODEL_TIERS must name at least one model")
+        self.models = models
+        self.confidence_threshold = confidence_threshold
+        self.outcomes = [dict.fromkeys(TRIAGE_OUTCOMES if tier < len(models) - 1 else FINAL_OUTCOMES, 0) for tier in range(len(models))]
+        self.latency_total = [0.0] * len(models)
+        self.latency_max = [0.0] * len(models)
+
+    @property
+    def enabled(self) -> bool:
+        return len(self.models) > 1
+
+    @property
+    def triage_models(self) -> List[str]:
+        return self.models[:-1]
+
+    @property
+    def final_model(self) -> str:
+        return self.models[-1]
+
+    @property
+    def final_tier(self) -> int:
+        return len(self.models) - 1
+
+    def is_final(self, tier: int) -> bool:
+        return tier == self.final_tier
+
+    def triage_outcome(self, parsed: Dict[str, Any]) -> str:
+        """Whether a parsed triage answer settles the section, or why it escalates"""
+        if parsed["format"] is None:
+            return "unparsed"
+        if parsed["verdict"] != "COMPLIANT":
+            return "flagged"
+        if parsed["confidence"] < self.confidence_threshold:
+            return "low_confidence"
+        return OUTCOME_SETTLED
+
+    def record(self, tier: int, seconds: float, outcome: str):
+        self.outcomes[tier][outcome] += 1
+        self.latency_total[tier] += seconds
+        self.latency_max[tier] = max(self.latency_max[tier], seconds)
+        model = self.models[tier]
+        cascade_tier_calls_total.labels(str(tier), model, outcome).inc()
+        cascade_tier_duration.labels(str(tier), model).observe(seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        tiers = []
+        for tier, model in enumerate(self.models):
+            outcomes = self.outcomes[tier]
+            calls = sum(outcomes.values())
+            entry = {
+                "tier": tier,
+                "model": model,
+                "role": "analysis" if self.is_final(tier) else "triage",
+                "calls": calls,
+                "outcomes": dict(outcomes),
+                "avg_latency_ms": round(self.latency_total[tier] / calls * 1000, 1) if calls else 0.0,
+                "max_latency_ms": round(self.latency_max[tier] * 1000, 1)
+            }
+            if not self.is_final(tier):
+                entry["escalation_rate"] = round((calls - outcomes[OUTCOME_SETTLED]) / calls, 4) if calls else 0.0
+            tiers.append(entry)
+
+        # Sections entering the cascade are the first tier's calls; those reaching the last tier were never settled early
+        entered = sum(self.outcomes[0].values())
+        final_calls = sum(self.outcomes[-1].values())
+        return {
+            "enabled": self.enabled,
+            "confidence_threshold": self.confidence_threshold,
+            "sections": entered,
+            "settled_early_rate": round(1 - final_calls / entered, 4) if self.enabled and entered else 0.0,
+            "tiers": tiers
+        }
+
+# Global model cascade
+model_cascade = ModelCascade(
+    models=parse_model_tiers(settings.model_tiers),
+    confidence_threshold=settings.cascade_confidence_threshold
+)
@@ -1,39 +1,364 @@
+import asyncio
+import contextlib
+import contextvars
 import httpx
 import os
-from typing import Optional, Dict, Any, List
-import tempfile
+import time
+from typing import Optional, Dict, Any, List, Hashable, Callable, Awaitable
+from datetime import datetime
 from fastapi import UploadFile
 import json
 
 from app.core.config import settings
+from app.core.metrics import r2r_requests_total, r2r_request_duration, r2r_requests_in_flight, r2r_errors_total, llm_tokens_total
+from app.core.tracing import span, traced, set_span_attribute
+from app.services.completion_cache import completion_cache, make_cache_key
+from app.services.context_packer import context_packer, format_context, packed_chunk_key
+from app.services.model_cascade import model_cascade
+from app.services.uploads import UploadTooLargeError, open_capped_upload
+from app.services.resilience import CircuitBreaker, CircuitOpenError, RETRYABLE_STATUSES, backoff_delay, retry_after_seconds
+
+# Set by background work (workaround prefetch) so foreground traffic can be told apart
+background_requests: contextvars.ContextVar[bool] = contextvars.ContextVar("r2r_background_requests", default=False)
+
+class RetrievalContext:
+    """Per-request memo of search results so related completions share one search"""
+
+    def __init__(self):
+        self._chunks: Dict[Hashable, asyncio.Future] = {}
+        self.searches = 0
+        self.reuses = 0
+
+    async def get_or_search(self, key: Hashable, search: Callable[[], Awaitable[List[Dict[str, Any]]]]) -> List[Dict[str, Any]]:
+        """Return the chunks stored under `key`, running `search` only for the first caller"""
+        future = self._chunks.get(key)
+        if future is not None:
+            self.reuses += 1
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._chunks[key] = future
+        self.searches += 1
+        try:
+            chunks = await search()
+        except BaseException as e:
+            # Forget the failure so a later caller can retry, and release concurrent waiters
+            del self._chunks[key]
+            future.set_exception(e if isinstance(e, Exception) else Exception("Shared search was cancelled"))
+            future.exception()  # Mark retrieved when nobody else is waiting
+            raise
+
+        future.set_result(chunks)
+        return chunks
+
+    def stats(self) -> Dict[str, int]:
+        return {"searches": self.searches, "reuses": self.reuses}
+
+class PoolStats:
+    """Counters describing how busy the R2R connection pool is"""
+
+    def __init__(self):
+        self.in_flight = 0
+        self.foreground_in_flight = 0
+        self.peak_in_flight = 0
+        self.requests = 0
+        self.pool_timeouts = 0
+        self.connect_timeouts = 0
+        self.read_timeouts = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return dict(vars(self))
+
+def http2_available() -> bool:
+    """HTTP/2 needs the optional 'h2' package (pip install httpx[http2])"""
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+def build_http_client(http2: bool) -> httpx.AsyncClient:
+    """Create the R2R HTTP client from the pool and timeout settings"""
+    return httpx.AsyncClient(
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=settings.r2r_max_connections,
+            max_keepalive_connections=settings.r2r_max_keepalive_connections,
+            keepalive_expiry=settings.r2r_keepalive_expiry
+        ),
+        timeout=httpx.Timeout(
+            connect=settings.r2r_connect_timeout,
+            read=settings.r2r_read_timeout,
+            write=settings.r2r_write_timeout,
+            pool=settings.r2r_pool_timeout
+        )
+    )
+
+DEFAULT_R2R_BASE_URL = "http://localhost:7272"
+COMPLETION_MODEL = model_cascade.final_model
+NO_CONTEXT_COMPLETION = "No relevant regulatory documents found for analysis."
+NO_RESPONSE_COMPLETION = "No response generated"
+
+def load_discovered_url() -> Optional[str]:
+    """Read the R2R URL found by a previous discovery, if any"""
+    try:
+        with open(settings.r2r_discovery_cache_file) as f:
+            return json.load(f).get("base_url")
+    except (OSError, ValueError):
+        return None
+
+def save_discovered_url(base_url: str):
+    """Remember the discovered R2R URL for the next cold start"""
+    try:
+        with open(settings.r2r_discovery_cache_file, "w") as f:
+            json.dump({"base_url": base_url, "discovered_at": datetime.utcnow().isoformat()}, f)
+    except OSError as e:
+        print(f"⚠️  Could not cache R2R discovery result: {e}")
+
+def endpoint_name(path: str) -> str:
+    """Group an R2R path under the endpoint it is rate limited as"""
+    if path.startswith("/v3/retrieval/search"):
+        return "search"
+    if path.startswith("/v3/retrieval/completion"):
+        return "completion"
+    if path.startswith("/v3/documents"):
+        return "documents"
+    return "other"
 
 class R2RService:
     def __init__(self):
-        # Try common R2R API ports
-        api_ports = [7272, 8000, 8080, 7273]
         self.base_url = settings.r2r_base_url
         
-        # If no custom URL provided, detect the correct port
-        if self.base_url == "http://localhost:7272":
-            for port in api_ports:
-                try:
-                    import httpx
-                    with httpx.Client(timeout=5.0) as client:
-                        response = client.get(f"http://localhost:{port}/openapi.json")
-                        if response.status_code == 200 and "openapi" in response.text:
-                            self.base_url = f"http://localhost:{port}"
-                            print(f"✅ Found R2R API on port {port}")
-                            break
-                except:
-                    continue
+        # Only the default URL is auto-discovered; an explicit R2R_BASE_URL is used as-is
+        self._needs_discovery = self.base_url == DEFAULT_R2R_BASE_URL
+        self._discovery_lock = asyncio.Lock()
+        self._discovery_retry_at = 0.0  # Monotonic time before which a failed discovery is not repeated
+        
+        self.http2 = settings.r2r_http2 and http2_available()
+        if settings.r2r_http2 and not self.http2:
+            print("⚠️  R2R_HTTP2 is enabled but the 'h2' package is not installed, using HTTP/1.1")
+        self.client = build_http_client(self.http2)
+        self.pool_stats = PoolStats()
+        # Set while no foreground request is in flight; background work waits on it
+        self.foreground_idle = asyncio.Event()
+        self.foreground_idle.set()
+        
+        self.breaker = CircuitBreaker(
+            failure_threshold=settings.r2r_breaker_failure_threshold,
+            reset_timeout=settings.r2r_breaker_reset_timeout
+        )
+        self.retries = 0
+        self._endpoint_capacity = {
+            "search": settings.r2r_search_concurrency,
+            "completion": settings.r2r_completion_concurrency,
+            "documents": settings.r2r_documents_concurrency
+        }
+        self._endpoint_limits = {endpoint: asyncio.Semaphore(limit) for endpoint, limit in self._endpoint_capacity.items()}
+        self._unlimited = contextlib.nullcontext()
+    
+    async def _probe(self, base_url: str) -> str:
+        """Return `base_url` if an R2R API answers there, otherwise raise"""
+        response = await self.client.get(f"{base_url}/openapi.json", timeout=settings.r2r_discovery_timeout)
+        if response.status_code == 200 and "openapi" in response.text:
+            return base_url
+        raise Exception(f"No R2R API at {base_url}")
+    
+    async def discover(self) -> str:
+        """Find the R2R API once, probing candidate ports in parallel under a global deadline.
+
+        A URL cached by a previous run is trusted without probing; it is rediscovered
+        if a later request cannot connect to it. After a failed discovery, requests use
+        the default URL without probing for R2R_DISCOVERY_RETRY_INTERVAL seconds.
+        """
+        if not self._needs_discovery or time.monotonic() < self._discovery_retry_at:
+            return self.base_url
+        
+        async with self._discovery_lock:
+            if not self._needs_discovery or time.monotonic() < self._discovery_retry_at:
+                return self.base_url
+            
+            cached_url = load_discovered_url()
+            if cached_url:
+                self.base_url = cached_url
+                self._needs_discovery = False
+                print(f"✅ Using cached R2R API location {cached_url}")
+                return self.base_url
+            
+            # Never probe our own API port: it serves an openapi.json too
+            candidates = [
+                f"http://localhost:{port.strip()}"
+                for port in settings.r2r_discovery_ports.split(",")
+                if port.strip() and int(port) != settings.port
+            ]
+            probes = [asyncio.create_task(self._probe(url)) for url in candidates]
+            try:
+                for next_probe in asyncio.as_completed(probes, timeout=settings.r2r_discovery_timeout):
+                    try:
+                        self.base_url = await next_probe
+                    except asyncio.TimeoutError:
+                        break
+                    except Exception:
+                        continue
+                    self._needs_discovery = False
+                    self._discovery_retry_at = 0.0
+                    save_discovered_url(self.base_url)
+                    print(f"✅ Found R2R API at {self.base_url}")
+                    return self.base_url
+            finally:
+                for probe in probes:
+                    probe.cancel()
+                await asyncio.gather(*probes, return_exceptions=True)
+            
+            # Keep the default and try again once the retry interval has passed
+            self.base_url = DEFAULT_R2R_BASE_URL
+            self._discovery_retry_at = time.monotonic() + settings.r2r_discovery_retry_interval
+            print(f"⚠️  R2R API not found on ports {settings.r2r_discovery_ports}, using {self.base_url}")
+            return self.base_url
+    
+    async def _request(self, method: str, path: str, idempotent: Optional[bool] = None, resilient: bool = True, **kwargs) -> httpx.Response:
+        """Send a request to R2R with per-endpoint concurrency caps, retries and circuit breaking.
+
+        Idempotent requests (GET/DELETE and retrieval searches by default) are retried
+        with jittered exponential backoff on transport errors and retryable statuses,
+        honoring Retry-After. Other requests, completions included since a retry bills
+        the LLM again, are only retried when R2R rejected them without processing (429
+        or connection refused). `resilient=False` sends a
+        single attempt that bypasses the breaker, for health probes.
+        """
+        await self.discover()
+        if not resilient:
+            return await self._send(method, path, **kwargs)
         
-        self.client = httpx.AsyncClient(timeout=30.0)
+        endpoint = endpoint_name(path)
+        if idempotent is None:
+            idempotent = method in ("GET", "DELETE") or endpoint == "search"
+        
+        endpoint_limit = self._endpoint_limits.get(endpoint, self._unlimited)
+        attempt = 0
+        while True:
+            attempt += 1
+            # Hold the endpoint slot only while the request is in flight, not during backoff
+            async with endpoint_limit:
+                if not self.breaker.allow():
+                    raise CircuitOpenError(f"R2R circuit breaker is open; not calling {path}")
+                
+                retry_delay = None
+                try:
+                    response = await self._send(method, path, **kwargs)
+                except httpx.PoolTimeout:
+                    # Local pool saturation says nothing about R2R's health
+                    self.breaker.release()
+                    raise
+                except httpx.TransportError as e:
+                    self.breaker.record_failure()
+                    give_up = attempt >= settings.r2r_retry_attempts or self.breaker.state == "open"
+                    if give_up or not (idempotent or isinstance(e, httpx.ConnectError)):
+                        raise
+                    failure = f"{type(e).__name__}: {e}"
+                except BaseException:
+                    self.breaker.release()
+                    raise
+                else:
+                    if response.status_code >= 500:
+                        self.breaker.record_failure()
+                    else:
+                        self.breaker.record_success()
+                    
+                    retryable = response.status_code in RETRYABLE_STATUSES and (idempotent or response.status_code == 429)
+                    if not retryable or attempt >= settings.r2r_retry_attempts or self.breaker.state == "open":
+                        return response
+                    failure = f"HTTP {response.status_code}"
+                    retry_delay = retry_after_seconds(response)
+            
+            if retry_delay is None:
+                retry_delay = backoff_delay(attempt, settings.r2r_retry_base_delay, settings.r2r_retry_max_delay)
+            retry_delay = min(retry_delay, settings.r2r_retry_max_delay)
+            self.retries += 1
+            print(f"🔁 R2R {method} {path} failed ({failure}), retry {attempt}/{settings.r2r_retry_attempts - 1} in {retry_delay:.2f}s")
+            await asyncio.sleep(retry_delay)
+    
+    async def _send(self, method: str, path: str, **kwargs) -> httpx.Response:
+        """Send a single request to R2R, tracking pool usage and per-endpoint metrics"""
+        stats = self.pool_stats
+        stats.requests += 1
+        stats.in_flight += 1
+        stats.peak_in_flight = max(stats.peak_in_flight, stats.in_flight)
+        foreground = not background_requests.get()
+        if foreground:
+            stats.foreground_in_flight += 1
+            self.foreground_idle.clear()
+        endpoint = endpoint_name(path)
+        in_flight = r2r_requests_in_flight.labels(endpoint)
+        in_flight.inc()
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, f"{self.base_url}{path}", **kwargs)
+            r2r_requests_total.labels(endpoint, str(response.status_code)).inc()
+            return response
+        except BaseException as e:
+            r2r_errors_total.labels(endpoint, type(e).__name__).inc()
+            if isinstance(e, httpx.PoolTimeout):
+                stats.pool_timeouts += 1
+            elif isinstance(e, httpx.ConnectTimeout):
+                stats.connect_timeouts += 1
+                self._forget_discovered_url()
+            elif isinstance(e, httpx.ConnectError):
+                self._forget_discovered_url()
+            elif isinstance(e, httpx.ReadTimeout):
+                stats.read_timeouts += 1
+            raise
+        finally:
+            stats.in_flight -= 1
+            if foreground:
+                stats.foreground_in_flight -= 1
+                if not stats.foreground_in_flight:
+                    self.foreground_idle.set()
+            in_flight.dec()
+            r2r_request_duration.labels(endpoint).observe(time.perf_counter() - started)
+    
+    def _forget_discovered_url(self):
+        """R2R moved or went away: rediscover it on the next request"""
+        if settings.r2r_base_url == DEFAULT_R2R_BASE_URL and not self._needs_discovery:
+            self._needs_discovery = True
+            try:
+                os.remove(settings.r2r_discovery_cache_file)
+            except OSError:
+                pass
+    
+    def resilience_status(self) -> Dict[str, Any]:
+        """Circuit breaker state, retry count and per-endpoint concurrency usage"""
+        return {
+            "circuit_breaker": self.breaker.status(),
+            "retries": self.retries,
+            "endpoint_limits": {
+                endpoint: {"limit": limit, "in_use": limit - self._endpoint_limits[endpoint]._value}
+                for endpoint, limit in self._endpoint_capacity.items()
+            }
+        }
+    
+    def pool_status(self) -> Dict[str, Any]:
+        """Pool configuration, usage counters and current connection counts"""
+        status = {
+            "http2": self.http2,
+            "max_connections": settings.r2r_max_connections,
+            "max_keepalive_connections": settings.r2r_max_keepalive_connections,
+            **self.pool_stats.as_dict()
+        }
+        # httpcore does not expose pool state publicly; report it when available
+        connections = getattr(getattr(getattr(self.client, "_transport", None), "_pool", None), "connections", None)
+        if connections is not None:
+            idle = sum(1 for connection in connections if connection.is_idle())
+            status["open_connections"] = len(connections)
+            status["idle_connections"] = idle
+            status["active_connections"] = len(connections) - idle
+            status["saturation"] = round(status["active_connections"] / settings.r2r_max_connections, 4) if settings.r2r_max_connections else None
+        return status
     
     async def health_check(self) -> Dict[str, Any]:
         """Check if R2R service is healthy"""
         try:
             # Check if R2R is running by getting openapi.json
-            response = await self.client.get(f"{self.base_url}/openapi.json")
+            response = await self._request("GET", "/openapi.json", resilient=False)
             if response.status_code == 200:
                 return {"status": "ok", "message": "R2R v3 API is running"}
             else:
@@ -44,8 +369,8 @@ class R2RService:
     async def ingest_document(self, file: UploadFile, metadata: Optional[Dict] = None) -> Dict[str, Any]:
         """Ingest a document into R2R"""
         try:
-            # Read file content
-            content = await file.read()
+            # Stream straight from the upload's spool instead of reading it into memory
+            content = open_capped_upload(file)
             
             # Prepare files for multipart upload
             files = {
@@ -58,19 +383,25 @@ class R2RService:
                 data["metadata"] = json.dumps(metadata)
             
             # Use R2R v3 documents endpoint
-            response = await self.client.post(
-                f"{self.base_url}/v3/documents",
+            response = await self._request(
+                "POST",
+                "/v3/documents",
                 files=files,
                 data=data
             )
             response.raise_for_status()
             return response.json()
             
+        except UploadTooLargeError:
+            raise
         except Exception as e:
             raise Exception(f"Document ingestion failed: {str(e)}")
     
-    async def search_documents(self, query: str, limit: int = 10) -> Dict[str, Any]:
-        """Search documents using vector similarity"""
+    async def search_documents(self, query: str, limit: int = 10, chunks_only: bool = False) -> Dict[str, Any]:
+        """Search documents using vector similarity.
+
+        With `chunks_only`, R2R is asked for scored chunks alone, without graph results.
+        """
         try:
             payload = {
                 "query": query,
@@ -78,10 +409,18 @@ class R2RService:
                     "search_limit": limit
                 }
             }
+            if chunks_only:
+                payload["search_settings"] = {
+                    "limit": limit,
+                    "include_scores": True,
+                    "include_metadatas": True,
+                    "graph_settings": {"enabled": False}
+                }
             
             # Use R2R v3 retrieval search endpoint
-            response = await self.client.post(
-                f"{self.base_url}/v3/retrieval/search",
+            response = await self._request(
+                "POST",
+                "/v3/retrieval/search",
                 json=payload
             )
             response.raise_for_status()
@@ -90,27 +429,70 @@ class R2RService:
         except Exception as e:
             raise Exception(f"Document search failed: {str(e)}")
     
-    async def rag_completion(self, query: str, use_hybrid_search: bool = True, task_prompt: Optional[str] = None) -> Dict[str, Any]:
-        """Get RAG completion using search + completion endpoint approach"""
+    async def chat_completion(self, system_msg: str, user_msg: str, generation_config: Dict[str, Any]) -> str:
+        """Run one completion over a system and user message, without retrieval or caching"""
+        payload = {
+            "messages": [
+                {"role": "system", "content": system_msg},
+                {"role": "user", "content": user_msg}
+            ],
+            "generation_config": generation_config
+        }
+        
+        with span("r2r.completion", model=generation_config.get("model", ""), max_tokens=generation_config.get("max_tokens", 0)):
+            response = await self._request(
+                "POST",
+                "/v3/retrieval/completion",
+                json=payload
+            )
+            response.raise_for_status()
+            result = response.json()
+            
+            # Token usage as reported by the LLM provider, when present
+            usage = result.get("results", {}).get("usage") or {}
+            for token_type in ("prompt_tokens", "completion_tokens"):
+                if isinstance(usage.get(token_type), int):
+                    llm_tokens_total.labels(token_type.split("_")[0]).inc(usage[token_type])
+                    set_span_attribute(token_type, usage[token_type])
+        
+        # Extract the completion
+        return result.get("results", {}).get("choices", [{}])[0].get("message", {}).get("content", NO_RESPONSE_COMPLETION)
+    
+    @traced("rag_completion")
+    async def rag_completion(self, query: str, use_hybrid_search: bool = True, task_prompt: Optional[str] = None, bypass_cache: bool = False, max_tokens: int = 500,
+                             retrieval_context: Optional[RetrievalContext] = None, retrieval_key: Optional[Hashable] = None,
+                             response_format: Optional[Dict[str, Any]] = None, model: Optional[str] = None, defer_cache: bool = False) -> Dict[str, Any]:
+        """Get RAG completion using search + completion endpoint approach.
+
+        Search results are packed into a token-budgeted context (deduplicated, best first,
+        trimmed at sentence boundaries). With a `retrieval_context`, calls sharing a
+        `retrieval_key` (default: the query) reuse the first call's packed results
+        instead of searching again.
+        A `response_format` (e.g. a JSON schema) is passed through in the generation config.
+        `model` overrides the completion model (default: the last MODEL_TIERS entry).
+        With `defer_cache`, a fresh completion is not cached here; its `cache_key` is
+        returned so the caller can store it with `store_completion` once it parses.
+        """
         try:
             # First, get search results
-            search_results = await self.search_documents(query, limit=3)
-            search_chunks = search_results.get("results", {}).get("chunk_search_results", [])
+            async def search() -> List[Dict[str, Any]]:
+                search_results = await self.search_documents(query, limit=settings.context_search_limit, chunks_only=True)
+                return context_packer.pack(search_results.get("results", {}).get("chunk_search_results", []))
+            
+            with span("r2r.search", shared=retrieval_context is not None):
+                if retrieval_context is not None:
+                    search_chunks = await retrieval_context.get_or_search(retrieval_key or query, search)
+                else:
+                    search_chunks = await search()
             
             if not search_chunks:
                 return {
-                    "completion": "No relevant regulatory documents found for analysis.",
+                    "completion": NO_CONTEXT_COMPLETION,
                     "search_results": []
                 }
             
-            # Build context from search results
-            context_parts = []
-            for i, chunk in enumerate(search_chunks[:3], 1):
-                filename = chunk.get('metadata', {}).get('filename', 'Unknown document')
-                text = chunk.get('text', '')[:1000]  # Limit length
-                context_parts.append(f"DOCUMENT {i} ({filename}):\n{text}")
-            
-            context = "\n\n".join(context_parts)
+            # Build context from the packed search results
+            context = format_context(search_chunks)
             
             # Create system message and user message
             system_msg = task_prompt or "You are a compliance analyst for Philippine financial regulations."
@@ -124,37 +506,63 @@ PHILIPPINE REGULATORY DOCUMENTS:
 
 Please analyze if this feature violates any regulations in the provided documents. Respond in the exact format specified."""
             
-            # Use completion endpoint with messages
-            payload = {
-                "messages": [
-                    {"role": "system", "content": system_msg},
-                    {"role": "user", "content": user_msg}
-                ],
-                "generation_config": {
-                    "model": "openai/gpt-4o-mini",
-                    "temperature": 0.1,
-                    "max_tokens": 500
-                }
+            generation_config = {
+                "model": model or COMPLETION_MODEL,
+                "temperature": 0.1,
+                "max_tokens": max_tokens
             }
+            if response_format is not None:
+                generation_config["response_format"] = response_format
             
-            response = await self.client.post(
-                f"{self.base_url}/v3/retrieval/completion",
-                json=payload
+            # Identical query, prompt, retrieved chunks and config give the same completion
+            use_cache = completion_cache.enabled and not bypass_cache
+            cache_key = make_cache_key(
+                query,
+                task_prompt,
+                [packed_chunk_key(chunk) for chunk in search_chunks],
+                generation_config
             )
-            response.raise_for_status()
-            result = response.json()
+            if use_cache:
+                with span("completion_cache.get"):
+                    cached = await completion_cache.get(cache_key)
+                    set_span_attribute("hit", cached is not None)
+                if cached is not None:
+                    set_span_attribute("cached", True)
+                    return {
+                        "completion": cached["completion"],
+                        "search_results": search_chunks,
+                        "cached": True
+                    }
+            elif completion_cache.enabled:
+                completion_cache.bypassed += 1
             
-            # Extract the completion
-            completion = result.get("results", {}).get("choices", [{}])[0].get("message", {}).get("content", "No response generated")
+            # Use completion endpoint with messages
+            set_span_attribute("cached", False)
+            completion = await self.chat_completion(system_msg, user_msg, generation_config)
             
-            return {
+            result = {
                 "completion": completion,
-                "search_results": search_chunks
+                "search_results": search_chunks,
+                "cached": False
             }
+            if defer_cache:
+                if completion_cache.enabled:
+                    result["cache_key"] = cache_key
+            else:
+                await self.store_completion(cache_key, completion)
+            return result
             
         except Exception as e:
             raise Exception(f"RAG completion failed: {str(e)}")
     
+    async def store_completion(self, cache_key: Optional[str], completion: str):
+        """Cache a completion under `cache_key`, skipping empty and fallback responses"""
+        if cache_key is None or not completion_cache.enabled:
+            return
+        if not completion.strip() or completion in (NO_RESPONSE_COMPLETION, NO_CONTEXT_COMPLETION):
+            return
+        await completion_cache.set(cache_key, {"completion": completion})
+    
     async def get_documents(self, limit: int = 10, offset: int = 0) -> Dict[str, Any]:
         """Get list of ingested documents"""
         try:
@@ -163,8 +571,9 @@ Please analyze if this feature violates any regulations in the provided document
                 "offset": offset
             }
             
-            response = await self.client.get(
-                f"{self.base_url}/v3/documents",
+            response = await self._request(
+                "GET",
+                "/v3/documents",
                 params=params
             )
             response.raise_for_status()
@@ -176,8 +585,9 @@ Please analyze if this feature violates any regulations in the provided document
     async def delete_document(self, document_id: str) -> Dict[str, Any]:
         """Delete a document from R2R"""
         try:
-            response = await self.client.delete(
-                f"{self.base_url}/v3/documents/{document_id}"
+            response = await self._request(
+                "DELETE",
+                f"/v3/documents/{document_id}"
             )
             response.raise_for_status()
             return response.json()
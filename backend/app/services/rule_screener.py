@@ -0,0 +1,159 @@
+"""
+Deterministic rule-based pre-screening ahead of LLM compliance analysis
+"""
+import json
+import re
+from typing import Optional, Dict, Any, List
+
+from app.core.config import settings
+
+DECISION_VIOLATION = "violation"
+DECISION_COMPLIANT = "compliant"
+DECISION_ESCALATE = "escalate"
+
+class ComplianceRule:
+    """A violation pattern mapped to its regulatory citation and remediation"""
+
+    def __init__(self, spec: Dict[str, Any]):
+        self.id = spec["id"]
+        self.description = spec.get("description", "")
+        self.citation = spec["citation"]
+        self.issue = spec["issue"]
+        self.business_impact = spec.get("business_impact", "")
+        self.regulatory_risk = spec.get("regulatory_risk", "")
+        self.workaround = spec.get("workaround")
+        self.pattern = re.compile("|".join(f"(?:{pattern})" for pattern in spec["patterns"]), re.IGNORECASE)
+        self.unless = [re.compile(pattern, re.IGNORECASE) for pattern in spec.get("unless", [])]
+        self.hits = 0
+        self.conclusive_hits = 0
+
+class RuleHit:
+    """Where a rule matched, and whether a mitigating phrase on that line makes it ambiguous"""
+
+    def __init__(self, rule: ComplianceRule, matched_text: str, line: str, conclusive: bool):
+        self.rule = rule
+        self.matched_text = matched_text
+        self.line = line
+        self.conclusive = conclusive
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "ruleId": self.rule.id,
+            "matchedText": self.matched_text,
+            "citation": self.rule.citation,
+            "conclusive": self.conclusive
+        }
+
+class ScreenResult:
+    """Outcome of pre-screening one piece of text"""
+
+    def __init__(self, decision: str, hits: List[RuleHit], version: str):
+        self.decision = decision
+        self.hits = hits
+        self.version = version
+
+    def summary(self) -> Dict[str, Any]:
+        """Compact record attached to analysis results"""
+        return {
+            "decision": self.decision,
+            "ruleVersion": self.version,
+            "ruleHits": [hit.to_dict() for hit in self.hits]
+        }
+
+class RuleScreener:
+    """Matches text against a versioned rule file before it is sent to the LLM.
+
+    Text with a conclusive violation hit is decided by the rules; text that hits no
+    rule and mentions none of the escalation terms is clearly compliant; anything
+    else is escalated to the LLM.
+    """
+
+    def __init__(self, rules_file: str, enabled: bool = True):
+        self.rules_file = rules_file
+        self.enabled = enabled
+        self.version = None
+        self.rules: List[ComplianceRule] = []
+        self._any_rule: Optional[re.Pattern] = None
+        self._escalation_terms: Optional[re.Pattern] = None
+        self.decisions = {DECISION_VIOLATION: 0, DECISION_COMPLIANT: 0, DECISION_ESCALATE: 0}
+        if enabled:
+            self.load()
+
+    def load(self):
+        """(Re)load and compile the rule file; keeps the previous rules if it is invalid"""
+        try:
+            with open(self.rules_file, "r", encoding="utf-8") as f:
+                spec = json.load(f)
+            rules = [ComplianceRule(rule) for rule in spec["rules"]]
+            terms = spec.get("escalation_terms", [])
+            escalation_terms = re.compile("|".join(f"(?:{term})" for term in terms), re.IGNORECASE) if terms else None
+        except (OSError, ValueError, KeyError, re.error) as e:
+            print(f"⚠️  Could not load compliance rules from {self.rules_file}: {e}")
+            return
+
+        self.version = str(spec.get("version", "unversioned"))
+        self.rules = rules
+        # One combined pattern rules out most text in a single pass before per-rule matching
+        self._any_rule = re.compile("|".join(f"(?:{rule.pattern.pattern})" for rule in rules), re.IGNORECASE) if rules else None
+        self._escalation_terms = escalation_terms
+        print(f"📏 Loaded {len(rules)} compliance rules (version {self.version})")
+
+    def _hits(self, text: str) -> List[RuleHit]:
+        if self._any_rule is None or not self._any_rule.search(text):
+            return []
+
+        hits = []
+        for rule in self.rules:
+            match = rule.pattern.search(text)
+            if not match:
+                continue
+            line_start = text.rfind("\n", 0, match.start()) + 1
+            line_end = text.find("\n", match.end())
+            line = text[line_start:line_end if line_end != -1 else len(text)].strip()
+            conclusive = not any(unless.search(line) for unless in rule.unless)
+            hits.append(RuleHit(rule, match.group().strip(), line, conclusive))
+        return hits
+
+    def screen(self, text: str) -> Optional[ScreenResult]:
+        """Decide `text` from the rules, or None when pre-screening is disabled"""
+        if not self.enabled or self.version is None:
+            return None
+
+        hits = self._hits(text)
+        if any(hit.conclusive for hit in hits):
+            decision = DECISION_VIOLATION
+        elif not hits and (self._escalation_terms is None or not self._escalation_terms.search(text)):
+            decision = DECISION_COMPLIANT
+        else:
+            decision = DECISION_ESCALATE
+
+        self.decisions[decision] += 1
+        for hit in hits:
+            hit.rule.hits += 1
+            if hit.conclusive:
+                hit.rule.conclusive_hits += 1
+        return ScreenResult(decision, [hit for hit in hits if hit.conclusive] if decision == DECISION_VIOLATION else hits, self.version)
+
+    def stats(self) -> Dict[str, Any]:
+        screened = sum(self.decisions.values())
+        return {
+            "enabled": self.enabled,
+            "rules_file": self.rules_file,
+            "version": self.version,
+            "screened": screened,
+            "decisions": dict(self.decisions),
+            "llm_calls_avoided": screened - self.decisions[DECISION_ESCALATE],
+            "rules": [
+                {
+                    "id": rule.id,
+                    "description": rule.description,
+                    "citation": rule.citation,
+                    "hits": rule.hits,
+                    "conclusive_hits": rule.conclusive_hits
+                }
+                for rule in self.rules
+            ]
+        }
+
+# Global rule screener instance
+rule_screener = RuleScreener(settings.prescreen_rules_file, enabled=settings.prescreen_enabled)
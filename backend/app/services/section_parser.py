@@ -0,0 +1,251 @@
+"""
+Semantic section parsing for compliance documents
+"""
+import re
+from typing import Iterator, List, Optional, Tuple
+
+class DocumentSection:
+    """A semantic section of a document.
+
+    Sections do not own a copy of their text: they keep offsets into a buffer shared
+    with the rest of the document (the submitted string, or the upload chunk they
+    arrived in), and `content` is cut and normalized from it each time it is read.
+    """
+
+    __slots__ = ('title', 'start_line', 'end_line', 'section_type', 'buffer', 'start_offset', 'end_offset', 'normalized')
+
+    def __init__(
+        self,
+        title: str,
+        content: Optional[str] = None,
+        start_line: int = 1,
+        end_line: int = 1,
+        section_type: str = 'other',
+        buffer: Optional[str] = None,
+        start_offset: int = 0,
+        end_offset: Optional[int] = None
+    ):
+        self.title = title
+        self.start_line = start_line
+        self.end_line = end_line
+        self.section_type = section_type  # 'feature', 'architecture', 'compliance', 'business', 'other'
+        # Explicit content is stored as-is; a buffer range is raw document text
+        self.normalized = content is not None
+        self.buffer = content if content is not None else buffer
+        self.start_offset = start_offset
+        self.end_offset = len(self.buffer) if end_offset is None else end_offset
+
+    @property
+    def content(self) -> str:
+        if self.normalized:
+            if self.start_offset == 0 and self.end_offset == len(self.buffer):
+                return self.buffer
+            return self.buffer[self.start_offset:self.end_offset]
+        return normalize_section_text(self.buffer, self.start_offset, self.end_offset)
+
+# Section headers, matched against a stripped line:
+#   ALL CAPS headers, numbered sections like "1. INSTANT MONEY",
+#   headers ending with a colon, and separator lines
+HEADER_PATTERN = re.compile(r'(?:[A-Z][A-Z\s]{2,}|[A-Z][A-Z\s]+:|[-=]{3,})\Z|\d+\.\s*[A-Z][A-Z\s]+')
+
+# The same headers found in place across a whole buffer. Each match starts at the
+# newline before a header line, which lets the regex engine skip straight from one
+# newline to the next; whitespace never crosses a line break.
+_WS = r'[^\S\n]'
+_CAPS_OR_WS = r'(?:[A-Z]|[^\S\n])'
+_HEADER_LINE = (
+    rf'{_WS}*(?:'
+    rf'[A-Z]{_CAPS_OR_WS}+[A-Z]'
+    rf'|[A-Z]{_CAPS_OR_WS}+:'
+    rf'|[-=]{{3,}}'
+    rf'|\d+\.{_WS}*[A-Z](?:[A-Z]|{_WS}+\S)[^\n]*?'
+    rf'){_WS}*(?=\n|\Z)'
+)
+HEADER_LINE_PATTERN = re.compile(rf'\n{_HEADER_LINE}')
+FIRST_HEADER_LINE_PATTERN = re.compile(_HEADER_LINE)  # The document's first line has no newline before it
+
+NON_BLANK_PATTERN = re.compile(r'\S')
+
+# Title keywords per section type, in priority order
+SECTION_TYPE_KEYWORDS = [
+    ('feature', ['feature', 'transfer', 'payment', 'onboarding', 'service', 'investment']),
+    ('architecture', ['architecture', 'technical', 'security', 'database', 'api']),
+    ('compliance', ['compliance', 'regulatory', 'legal', 'monitoring']),
+    ('business', ['business', 'model', 'strategy', 'marketing', 'partnership']),
+]
+SECTION_TYPE_PATTERNS = [(section_type, re.compile('|'.join(keywords))) for section_type, keywords in SECTION_TYPE_KEYWORDS]
+
+# Content keywords for data handling sections
+DATA_PRIVACY_PATTERN = re.compile('customer data|biometric|privacy|data sharing')
+
+def classify_section_title(title: str) -> Optional[str]:
+    """Section type implied by the title's keywords, if any"""
+    title_lower = title.lower()
+    for section_type, pattern in SECTION_TYPE_PATTERNS:
+        if pattern.search(title_lower):
+            return section_type
+    return None
+
+def classify_section_type(title: str, content: str) -> str:
+    """Classify section based on title and content"""
+    section_type = classify_section_title(title)
+    if section_type:
+        return section_type
+
+    # Data handling sections
+    if DATA_PRIVACY_PATTERN.search(content.lower()):
+        return 'data_privacy'
+
+    return 'other'
+
+def is_header_line(line: str) -> bool:
+    """Check if a line is likely a section header"""
+    return HEADER_PATTERN.match(line.strip()) is not None
+
+def normalize_section_text(text: str, start: int = 0, end: Optional[int] = None) -> str:
+    """Strip every line of text[start:end] and drop blank ones"""
+    if start or end is not None:
+        text = text[start:end]
+    return '\n'.join([stripped for line in text.split('\n') if (stripped := line.strip())])
+
+class IncrementalSectionParser:
+    """Parses a document into sections as text arrives.
+
+    `feed` returns sections as soon as the next header closes them; `close` returns
+    the final section. Only text not yet scanned is held as a string, and sections
+    point into it by offset, so a whole document fed at once is scanned in a single
+    regex pass and shared by every section without being copied.
+    """
+
+    def __init__(self):
+        self.line_count = 0
+        self.sections_emitted = 0
+        self._newlines = 0
+        # Unscanned text. After the first scan it starts with the newline that ends
+        # the last scanned line, which is what the header pattern anchors on.
+        self._tail_parts: List[str] = []
+        self._at_document_start = True
+        self._tail_line = 1
+        self._counted_pos = 0
+        self._counted_lines = 0
+        # Current section: its header, and (buffer, start, end) ranges scanned since
+        self._title = ""
+        self._start_line = 1
+        self._region: List[Tuple[str, int, int]] = []
+        self._region_start = 0
+        # Raw text kept for the no-headers fallback until a section is emitted
+        self._document: Optional[List[str]] = []
+
+    def _line_number(self, tail: str, pos: int) -> int:
+        """1-based number of the line after the newline at `pos` in the tail"""
+        self._counted_lines += tail.count('\n', self._counted_pos, pos + 1)
+        self._counted_pos = pos + 1
+        return self._tail_line + self._counted_lines
+
+    def _section(self, end_line: int) -> Optional[DocumentSection]:
+        if not self._title or not self._region:
+            return None
+
+        # A section scanned in one piece points into the tail; one spanning feeds is joined
+        if len(self._region) == 1:
+            buffer, start, end = self._region[0]
+        else:
+            buffer = ''.join(text[start:end] for text, start, end in self._region)
+            start, end = 0, len(buffer)
+        if not NON_BLANK_PATTERN.search(buffer, start, end):  # Only create section if it has content
+            return None
+
+        self.sections_emitted += 1
+        self._document = None
+        section = DocumentSection(
+            title=self._title,
+            start_line=self._start_line,
+            end_line=end_line,
+            buffer=buffer,
+            start_offset=start,
+            end_offset=end
+        )
+        section.section_type = classify_section_title(self._title) or classify_section_type(self._title, section.content)
+        return section
+
+    def _headers(self, tail: str, endpos: int) -> Iterator[re.Match]:
+        if self._at_document_start:
+            self._at_document_start = False
+            first = FIRST_HEADER_LINE_PATTERN.match(tail, 0, endpos)
+            if first:
+                yield first
+        yield from HEADER_LINE_PATTERN.finditer(tail, 0, endpos)
+
+    def _scan(self, tail: str, endpos: int) -> List[DocumentSection]:
+        """Find the headers among the tail's lines before `endpos`"""
+        sections = []
+        for match in self._headers(tail, endpos):
+            header_line = self._line_number(tail, match.start())
+            if self._title and match.start() > self._region_start:
+                self._region.append((tail, self._region_start, match.start()))
+            section = self._section(end_line=header_line - 1)
+            if section is not None:
+                sections.append(section)
+
+            # Start new section
+            self._title = match.group().strip()
+            self._start_line = header_line
+            self._region = []
+            self._region_start = match.end()
+
+        # Text before the first header never belongs to a section
+        if self._title and endpos > self._region_start:
+            self._region.append((tail, self._region_start, endpos))
+        return sections
+
+    def feed(self, text: str) -> List[DocumentSection]:
+        """Consume more text, returning any sections it completed"""
+        if self._document is not None:
+            self._document.append(text)
+        self._tail_parts.append(text)
+        if '\n' not in text:
+            return []  # Still inside the same line
+        self._newlines += text.count('\n')
+
+        # Scan the complete lines; the partial last line waits for more text
+        tail = self._tail_parts[0] if len(self._tail_parts) == 1 else ''.join(self._tail_parts)
+        endpos = tail.rfind('\n')
+        sections = self._scan(tail, endpos)
+
+        self._counted_lines += tail.count('\n', self._counted_pos, endpos + 1)
+        self._tail_line += self._counted_lines
+        self._tail_parts = [tail[endpos:]]
+        self._counted_pos = 1
+        self._counted_lines = 0
+        self._region_start = 0
+        return sections
+
+    def close(self) -> List[DocumentSection]:
+        """Finish the document, returning the remaining section(s)"""
+        tail = ''.join(self._tail_parts)
+        sections = self._scan(tail, len(tail))
+        self._tail_parts = []
+        self.line_count = self._newlines + 1
+
+        # Don't forget the last section
+        last = self._section(end_line=self.line_count)
+        if last is not None:
+            sections.append(last)
+
+        # If no sections were found, treat the whole document as one section
+        if not self.sections_emitted:
+            document = self._document[0] if len(self._document) == 1 else ''.join(self._document)
+            if NON_BLANK_PATTERN.search(document):
+                sections.append(DocumentSection(
+                    title="Document Content",
+                    start_line=1,
+                    end_line=self.line_count,
+                    section_type='other',
+                    buffer=document
+                ))
+        return sections
+
+def parse_document_sections(document_content: str) -> List[DocumentSection]:
+    """Parse document into logical sections based on structure and content"""
+    parser = IncrementalSectionParser()
+    return parser.feed(document_content) + parser.close()
@@ -0,0 +1,303 @@
+"""
+Near-duplicate detection for analyzed sections using MinHash signatures
+"""
+import asyncio
+import hashlib
+import random
+import re
+import struct
+import uuid
+from array import array
+from collections import OrderedDict, defaultdict
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Set
+
+from pymongo import UpdateOne
+
+from app.core.config import settings
+from app.core.database import get_database
+
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+WORD_PATTERN = re.compile(r'\w+')
+# Bumped whenever the bucket key changes, so entries keyed the old way are rebuilt
+MATCH_KEY = "section_type+title"
+
+def match_key(section_type: str, title: str) -> str:
+    """Sections are only compared with others of the same type and title"""
+    return f"{section_type}:{' '.join(WORD_PATTERN.findall(title.lower()))}"
+
+class Sketch:
+    """What the index keeps of a section's content"""
+
+    def __init__(self, signature: array, shingle_digest: str, words: int):
+        self.signature = signature
+        self.shingle_digest = shingle_digest
+        self.words = words
+
+class MinHasher:
+    """MinHash signatures over word shingles, with LSH band keys for candidate lookup"""
+
+    def __init__(self, num_perm: int, bands: int, shingle_size: int, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        rng = random.Random(seed)
+        self._permutations = [(rng.randrange(1, MERSENNE_PRIME), rng.randrange(0, MERSENNE_PRIME)) for _ in range(num_perm)]
+
+    @property
+    def params(self) -> Dict[str, int]:
+        return {"num_perm": self.num_perm, "bands": self.bands, "shingle_size": self.shingle_size, "key": MATCH_KEY}
+
+    def _shingles(self, words: List[str]) -> Set[int]:
+        size = self.shingle_size
+        grams = {" ".join(words[i:i + size]) for i in range(max(1, len(words) - size + 1))} if words else set()
+        return {int.from_bytes(hashlib.blake2b(gram.encode("utf-8"), digest_size=4).digest(), "big") for gram in grams}
+
+    def shingles(self, text: str) -> Set[int]:
+        """Stable 32-bit hashes of the text's word n-grams"""
+        return self._shingles(WORD_PATTERN.findall(text.lower()))
+
+    def signature(self, text: str) -> array:
+        return self._signature(self.shingles(text))
+
+    def sketch(self, text: str) -> Sketch:
+        """Signature plus an exact digest of the shingle set, for short sections"""
+        words = WORD_PATTERN.findall(text.lower())
+        shingles = self._shingles(words)
+        digest = hashlib.blake2b(struct.pack(f"<{len(shingles)}L", *sorted(shingles)), digest_size=16).hexdigest()
+        return Sketch(self._signature(shingles), digest, len(words))
+
+    def _signature(self, shingles: Set[int]) -> array:
+        if not shingles:
+            return array("I", [MAX_HASH] * self.num_perm)
+        return array("I", (
+            min(((a * shingle + b) % MERSENNE_PRIME) & MAX_HASH for shingle in shingles)
+            for a, b in self._permutations
+        ))
+
+    def band_keys(self, key: str, signature: array) -> List[str]:
+        """One bucket key per band; sections with different match keys never share a bucket"""
+        keys = []
+        for band in range(self.bands):
+            rows = signature[band * self.rows:(band + 1) * self.rows]
+            digest = hashlib.blake2b(struct.pack(f"<{self.rows}L", *rows), digest_size=8).hexdigest()
+            keys.append(f"{key}:{band}:{digest}")
+        return keys
+
+    @staticmethod
+    def similarity(first: array, second: array) -> float:
+        """Estimated Jaccard similarity of two signatures"""
+        return sum(1 for x, y in zip(first, second) if x == y) / len(first)
+
+class SimilarMatch:
+    """A previously analyzed section similar enough to reuse"""
+
+    def __init__(self, entry_id: str, similarity: float, metadata: Dict[str, Any], analysis: Dict[str, Any]):
+        self.entry_id = entry_id
+        self.similarity = similarity
+        self.metadata = metadata
+        self.analysis = analysis
+
+    def provenance(self) -> Dict[str, Any]:
+        return {
+            "type": "similar_section",
+            "entryId": self.entry_id,
+            "similarity": round(self.similarity, 3),
+            "sectionTitle": self.metadata.get("title"),
+            "documentName": self.metadata.get("document_name"),
+            "analyzedAt": self.metadata.get("created_at")
+        }
+
+class SectionSimilarityIndex:
+    """Finds near-duplicates of previously analyzed sections so their analysis can be reused.
+
+    Only sections with the same type and title are compared. Sections shorter than
+    exact_match_words must have exactly the same shingles, since a single changed
+    word ("not") barely moves the similarity of a short text. Signatures live in an
+    in-memory LSH index backed by MongoDB. Entries keep their normalized content so
+    the index can be rebuilt offline when the MinHash parameters change (see
+    rebuild_similarity_index.py).
+    """
+
+    def __init__(self, collection_name: str, threshold: float, num_perm: int, bands: int, shingle_size: int, max_memory_entries: int, exact_match_words: int = 0, enabled: bool = True):
+        self.collection_name = collection_name
+        self.threshold = threshold
+        self.exact_match_words = exact_match_words
+        self.max_memory_entries = max_memory_entries
+        self.enabled = enabled
+        self.hasher = MinHasher(num_perm, bands, shingle_size)
+        # entry id -> (shingle digest, signature, band keys, metadata, analysis or None when stored in MongoDB)
+        self._entries: "OrderedDict[str, tuple[str, array, List[str], Dict[str, Any], Optional[Dict[str, Any]]]]" = OrderedDict()
+        self._buckets: Dict[str, Set[str]] = defaultdict(set)
+        self.hits = 0
+        self.misses = 0
+        self.added = 0
+        self.skipped_stale = 0
+
+    def _collection(self):
+        db = get_database()
+        return db[self.collection_name] if db is not None else None
+
+    def _index(self, entry_id: str, shingle_digest: str, signature: array, bands: List[str], metadata: Dict[str, Any], analysis: Optional[Dict[str, Any]]):
+        self._entries[entry_id] = (shingle_digest, signature, bands, metadata, analysis)
+        for key in bands:
+            self._buckets[key].add(entry_id)
+        while len(self._entries) > self.max_memory_entries:
+            evicted_id, (_, _, evicted_bands, _, _) = self._entries.popitem(last=False)
+            for key in evicted_bands:
+                self._buckets[key].discard(evicted_id)
+                if not self._buckets[key]:
+                    del self._buckets[key]
+
+    async def load(self):
+        """Load stored signatures from MongoDB into the in-memory index"""
+        collection = self._collection()
+        if not self.enabled or collection is None:
+            return
+
+        try:
+            await collection.create_index("bands")
+            loaded = 0
+            cursor = collection.find({}, {"content": 0, "analysis": 0}).sort("created_at", 1)
+            async for document in cursor:
+                if document.get("params") != self.hasher.params:
+                    self.skipped_stale += 1
+                    continue
+                self._index(document["_id"], document["shingle_digest"], array("I", document["signature"]), document["bands"], document.get("metadata", {}), None)
+                loaded += 1
+            print(f"🧬 Loaded {loaded} section signatures for near-duplicate detection")
+            if self.skipped_stale:
+                print(f"⚠️  {self.skipped_stale} signatures use other MinHash parameters; run rebuild_similarity_index.py")
+        except Exception as e:
+            print(f"⚠️  Could not load section signatures: {e}")
+
+    async def find_similar(self, section_type: str, title: str, content: str) -> Optional[SimilarMatch]:
+        """Best stored analysis of a section with the same type and title at or above the threshold"""
+        if not self.enabled or not self._entries:
+            return None
+
+        sketch = await asyncio.to_thread(self.hasher.sketch, content)
+        candidates = set()
+        for key in self.hasher.band_keys(match_key(section_type, title), sketch.signature):
+            candidates.update(self._buckets.get(key, ()))
+
+        exact = sketch.words < self.exact_match_words
+        best_id, best_similarity = None, 0.0
+        for entry_id in candidates:
+            shingle_digest, signature = self._entries[entry_id][:2]
+            if exact and shingle_digest != sketch.shingle_digest:
+                continue
+            similarity = self.hasher.similarity(sketch.signature, signature)
+            if similarity > best_similarity:
+                best_id, best_similarity = entry_id, similarity
+
+        if best_id is None or best_similarity < self.threshold:
+            self.misses += 1
+            return None
+
+        _, _, _, metadata, analysis = self._entries[best_id]
+        if analysis is None:
+            analysis = await self._load_analysis(best_id)
+            if analysis is None:
+                self.misses += 1
+                return None
+
+        self.hits += 1
+        self._entries.move_to_end(best_id)
+        return SimilarMatch(best_id, best_similarity, metadata, analysis)
+
+    async def _load_analysis(self, entry_id: str) -> Optional[Dict[str, Any]]:
+        collection = self._collection()
+        if collection is None:
+            return None
+        try:
+            document = await collection.find_one({"_id": entry_id}, {"analysis": 1})
+        except Exception as e:
+            print(f"⚠️  Failed to load similar section {entry_id}: {e}")
+            return None
+        return document["analysis"] if document else None
+
+    async def add(self, section_type: str, title: str, content: str, analysis: Dict[str, Any], document_name: Optional[str] = None):
+        """Index an analyzed section for future reuse"""
+        if not self.enabled:
+            return
+
+        sketch = await asyncio.to_thread(self.hasher.sketch, content)
+        bands = self.hasher.band_keys(match_key(section_type, title), sketch.signature)
+        metadata = {"title": title, "document_name": document_name, "created_at": datetime.utcnow()}
+        entry_id = uuid.uuid4().hex
+        collection = self._collection()
+        # Memory holds the analysis only when there is no database to fetch it from
+        self._index(entry_id, sketch.shingle_digest, sketch.signature, bands, metadata, analysis if collection is None else None)
+        self.added += 1
+
+        if collection is not None:
+            try:
+                await collection.insert_one({
+                    "_id": entry_id,
+                    "section_type": section_type,
+                    "content": content,
+                    "signature": list(sketch.signature),
+                    "shingle_digest": sketch.shingle_digest,
+                    "bands": bands,
+                    "params": self.hasher.params,
+                    "metadata": metadata,
+                    "analysis": analysis,
+                    "created_at": metadata["created_at"]
+                })
+            except Exception as e:
+                print(f"⚠️  Failed to persist section signature {entry_id}: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "threshold": self.threshold,
+            "exact_match_words": self.exact_match_words,
+            "params": self.hasher.params,
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "added": self.added,
+            "stale_entries_skipped": self.skipped_stale
+        }
+
+async def rebuild_signatures(collection, hasher: MinHasher, batch_size: int = 500) -> int:
+    """Recompute every stored entry's signature and bands from its content"""
+    await collection.create_index("bands")
+    rebuilt = 0
+    updates = []
+    async for document in collection.find({}, {"content": 1, "section_type": 1, "metadata.title": 1}):
+        sketch = hasher.sketch(document.get("content", ""))
+        key = match_key(document["section_type"], document.get("metadata", {}).get("title") or "")
+        updates.append(UpdateOne({"_id": document["_id"]}, {"$set": {
+            "signature": list(sketch.signature),
+            "shingle_digest": sketch.shingle_digest,
+            "bands": hasher.band_keys(key, sketch.signature),
+            "params": hasher.params
+        }}))
+        if len(updates) >= batch_size:
+            await collection.bulk_write(updates, ordered=False)
+            rebuilt += len(updates)
+            updates = []
+    if updates:
+        await collection.bulk_write(updates, ordered=False)
+        rebuilt += len(updates)
+    return rebuilt
+
+# Global section similarity index instance
+section_similarity_index = SectionSimilarityIndex(
+    settings.similarity_collection,
+    threshold=settings.similarity_threshold,
+    num_perm=settings.similarity_num_perm,
+    bands=settings.similarity_bands,
+    shingle_size=settings.similarity_shingle_size,
+    max_memory_entries=settings.similarity_max_memory_entries,
+    exact_match_words=settings.similarity_exact_match_words,
+    enabled=settings.similarity_enabled
+)
@@ -0,0 +1,163 @@
+"""
+Schema-driven completion formats, tolerant parsing and one-shot format re-asks
+"""
+import json
+from collections import defaultdict
+from typing import Optional, Dict, Any, Callable, Tuple
+
+from app.core.config import settings
+from app.core.tracing import span
+from app.services.r2r_service import r2r_service, COMPLETION_MODEL, NO_CONTEXT_COMPLETION
+
+REASK_SYSTEM_PROMPT = "You reformat compliance analysis responses into a required output format. Keep every finding, citation and explanation; do not add new analysis."
+
+_decoder = json.JSONDecoder()
+
+def object_schema(properties: Dict[str, Any]) -> Dict[str, Any]:
+    """Strict JSON schema for an object whose properties are all required"""
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(properties),
+        "additionalProperties": False
+    }
+
+class ResponseSpec:
+    """One completion format: the labelled-text layout used in prompts and its JSON schema.
+
+    With STRUCTURED_OUTPUT_ENABLED the prompt asks for JSON and the schema is sent as
+    the completion's response format; otherwise the labelled-text layout is used.
+    """
+
+    def __init__(self, name: str, schema: Dict[str, Any], text_format: str, text_prefix: str = "Respond in this EXACT format:\n"):
+        self.name = name
+        self.schema = schema
+        self.text_format = text_format
+        self.text_prefix = text_prefix
+
+    @property
+    def structured(self) -> bool:
+        return settings.structured_output_enabled
+
+    def instructions(self, **fields) -> str:
+        if self.structured:
+            return "Respond with only a JSON object matching this JSON schema:\n" + json.dumps(self.schema)
+        return self.text_prefix + self.text_format.format(**fields)
+
+    def response_format(self) -> Optional[Dict[str, Any]]:
+        if not self.structured:
+            return None
+        return {"type": "json_schema", "json_schema": {"name": self.name, "schema": self.schema, "strict": True}}
+
+class BatchResponseSpec(ResponseSpec):
+    """Several items answered in one completion, as marked text blocks or a JSON array"""
+
+    def __init__(self, item: ResponseSpec, items_key: str, marker: str):
+        item_schema = object_schema({"number": {"type": "integer"}, **item.schema["properties"]})
+        super().__init__(f"{item.name}_batch", object_schema({items_key: {"type": "array", "items": item_schema}}), item.text_format)
+        self.items_key = items_key
+        self.marker = marker
+
+    def instructions(self, **fields) -> str:
+        noun = self.marker.lower()
+        if self.structured:
+            return (
+                f"Respond with only a JSON object whose \"{self.items_key}\" array has one entry per {noun}, "
+                f"in the same order, each with its \"number\". Match this JSON schema:\n" + json.dumps(self.schema)
+            )
+        return (
+            f"Respond with exactly one block per {noun}, in the same order, each starting with its marker line. "
+            f"Use this EXACT format for every block:\n=== {self.marker} [number] ===\n" + self.text_format.format(**fields)
+        )
+
+def extract_json(text: str) -> Optional[Any]:
+    """First JSON object in `text`, tolerating code fences and surrounding prose"""
+    start = text.find("{")
+    while start != -1:
+        try:
+            value, _ = _decoder.raw_decode(text, start)
+            return value
+        except ValueError:
+            start = text.find("{", start + 1)
+    return None
+
+class ParseStats:
+    """Per-format counts of how completions were parsed and how often a re-ask was needed"""
+
+    OUTCOMES = ("json", "text", "failed", "recovered", "unrecovered")
+
+    def __init__(self):
+        self.counts: Dict[str, Dict[str, int]] = defaultdict(lambda: dict.fromkeys(self.OUTCOMES, 0))
+
+    def record(self, spec_name: str, outcome: str):
+        self.counts[spec_name][outcome] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        totals = dict.fromkeys(self.OUTCOMES, 0)
+        for counts in self.counts.values():
+            for outcome, count in counts.items():
+                totals[outcome] += count
+        parsed = totals["json"] + totals["text"] + totals["failed"]
+        return {
+            "structured_output": settings.structured_output_enabled,
+            "reask_enabled": settings.structured_output_reask,
+            "parse_failure_rate": round(totals["failed"] / parsed, 4) if parsed else 0.0,
+            "totals": totals,
+            "formats": {name: dict(counts) for name, counts in self.counts.items()}
+        }
+
+async def reask_for_format(spec: ResponseSpec, completion: str, max_tokens: int = 500, **fields) -> Optional[str]:
+    """Ask the model once to restate an unparseable completion in the expected format"""
+    user_msg = f"""The response below does not follow the required output format.
+
+{spec.instructions(**fields)}
+
+RESPONSE TO REFORMAT:
+{completion}"""
+    generation_config = {"model": COMPLETION_MODEL, "temperature": 0.0, "max_tokens": max_tokens}
+    response_format = spec.response_format()
+    if response_format is not None:
+        generation_config["response_format"] = response_format
+
+    try:
+        return await r2r_service.chat_completion(REASK_SYSTEM_PROMPT, user_msg, generation_config)
+    except Exception as e:
+        print(f"⚠️  Format re-ask for {spec.name} failed: {e}")
+        return None
+
+async def parse_completion(spec: ResponseSpec, completion: str, parse: Callable[[str], Dict[str, Any]], max_tokens: int = 500,
+                           cache_key: Optional[str] = None, **fields) -> Tuple[str, Dict[str, Any]]:
+    """Parse a completion, re-asking once for the expected format only if parsing fails.
+
+    `parse` returns a dict whose "format" is "json", "text", or None when nothing
+    usable was found. Returns the (possibly reformatted) completion and its parse.
+    With the `cache_key` of a deferred rag_completion, the completion is cached only
+    once it parses (the reformatted one after a successful re-ask).
+    """
+    with span("parse_completion", spec=spec.name):
+        parsed = parse(completion)
+    if parsed["format"] is not None:
+        parse_stats.record(spec.name, parsed["format"])
+        await r2r_service.store_completion(cache_key, completion)
+        return completion, parsed
+
+    parse_stats.record(spec.name, "failed")
+    # An empty or no-context completion has nothing to reformat
+    if not settings.structured_output_reask or not completion.strip() or completion == NO_CONTEXT_COMPLETION:
+        parse_stats.record(spec.name, "unrecovered")
+        return completion, parsed
+
+    with span("format_reask", spec=spec.name):
+        reformatted = await reask_for_format(spec, completion, max_tokens, **fields)
+        reparsed = parse(reformatted) if reformatted is not None else None
+    if reparsed is not None and reparsed["format"] is not None:
+        print(f"🩹 Recovered an unparseable {spec.name} completion with a format re-ask")
+        parse_stats.record(spec.name, "recovered")
+        await r2r_service.store_completion(cache_key, reformatted)
+        return reformatted, reparsed
+
+    parse_stats.record(spec.name, "unrecovered")
+    return completion, parsed
+
+# Global parse statistics
+parse_stats = ParseStats()
@@ -0,0 +1,203 @@
+"""
+Streaming helpers for uploaded files
+"""
+import codecs
+from typing import AsyncIterable, AsyncIterator, BinaryIO, Dict, List, Optional
+
+from fastapi import Request, UploadFile
+
+try:
+    from python_multipart import MultipartParser
+    from python_multipart.multipart import parse_options_header
+except ModuleNotFoundError:  # python-multipart < 0.0.13
+    from multipart import MultipartParser
+    from multipart.multipart import parse_options_header
+
+from app.core.config import settings
+
+class UploadTooLargeError(Exception):
+    """Raised when an upload exceeds the configured size cap"""
+
+    def __init__(self, limit: int):
+        super().__init__(f"Upload exceeds the {limit:,} byte limit")
+        self.limit = limit
+
+class InvalidUploadError(Exception):
+    """Raised when a streamed request body does not contain a usable file"""
+
+def upload_size(file: UploadFile) -> Optional[int]:
+    """Size of an upload's spooled file, without reading it"""
+    if getattr(file, "size", None) is not None:
+        return file.size
+    try:
+        position = file.file.tell()
+        file.file.seek(0, 2)
+        size = file.file.tell()
+        file.file.seek(position)
+        return size
+    except (AttributeError, OSError):
+        return None
+
+class CappedReader:
+    """File-like wrapper that reads an upload's spool in place and enforces a size cap.
+
+    httpx pulls the multipart body from it chunk by chunk as the socket drains, so
+    only one chunk is held in memory. It seeks back to the start on retries.
+    """
+
+    def __init__(self, raw: BinaryIO, limit: int):
+        self.raw = raw
+        self.limit = limit
+        self.bytes_read = 0
+
+    def read(self, size: int = -1) -> bytes:
+        chunk = self.raw.read(size)
+        self.bytes_read += len(chunk)
+        if self.bytes_read > self.limit:
+            raise UploadTooLargeError(self.limit)
+        return chunk
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        position = self.raw.seek(offset, whence)
+        if whence == 0 and offset == 0:
+            self.bytes_read = 0
+        return position
+
+    def tell(self) -> int:
+        return self.raw.tell()
+
+def open_capped_upload(file: UploadFile, limit: Optional[int] = None) -> CappedReader:
+    """Check an upload against the size cap and wrap its spool for streaming"""
+    limit = limit or settings.max_upload_bytes
+    size = upload_size(file)
+    if size is not None and size > limit:
+        raise UploadTooLargeError(limit)
+    file.file.seek(0)
+    return CappedReader(file.file, limit)
+
+async def decode_chunks(chunks: AsyncIterable[bytes], encoding: str = "utf-8") -> AsyncIterator[str]:
+    """Decode byte chunks incrementally, so multi-byte characters may straddle chunks"""
+    decoder = codecs.getincrementaldecoder(encoding)()
+    async for chunk in chunks:
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+class StreamingUpload:
+    """Reads an uploaded file straight off the request body as it arrives.
+
+    FastAPI's UploadFile only reaches the endpoint once the whole body has been
+    spooled, so callers that want to start work mid-upload read the body here
+    instead. Accepts multipart/form-data (the `field_name` part, or else the first
+    part with a filename) or a raw body named by a `filename` query parameter or
+    `X-Filename` header.
+    """
+
+    def __init__(self, request: Request, field_name: str = "file", limit: Optional[int] = None):
+        self.request = request
+        self.field_name = field_name
+        self.limit = limit or settings.max_upload_bytes
+        self.filename: Optional[str] = None
+        self.bytes_read = 0
+
+    async def _body(self) -> AsyncIterator[bytes]:
+        content_length = self.request.headers.get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) > self.limit:
+            raise UploadTooLargeError(self.limit)
+
+        async for chunk in self.request.stream():
+            self.bytes_read += len(chunk)
+            if self.bytes_read > self.limit:
+                raise UploadTooLargeError(self.limit)
+            if chunk:
+                yield chunk
+
+    async def _multipart_file(self, boundary: bytes) -> AsyncIterator[bytes]:
+        data: List[bytes] = []
+        headers: Dict[bytes, bytes] = {}
+        header_field: List[bytes] = []
+        header_value: List[bytes] = []
+        state = {"in_file": False, "found": False, "finished": False}
+
+        def on_part_begin():
+            headers.clear()
+
+        def on_header_field(buffer: bytes, start: int, end: int):
+            header_field.append(buffer[start:end])
+
+        def on_header_value(buffer: bytes, start: int, end: int):
+            header_value.append(buffer[start:end])
+
+        def on_header_end():
+            headers[b"".join(header_field).lower()] = b"".join(header_value)
+            header_field.clear()
+            header_value.clear()
+
+        def on_headers_finished():
+            _, options = parse_options_header(headers.get(b"content-disposition", b""))
+            name = options.get(b"name", b"").decode("latin-1")
+            filename = options.get(b"filename")
+            state["in_file"] = not state["found"] and (name == self.field_name or filename is not None)
+            if state["in_file"]:
+                state["found"] = True
+                self.filename = filename.decode("utf-8", "replace") if filename is not None else name
+
+        def on_part_data(buffer: bytes, start: int, end: int):
+            if state["in_file"]:
+                data.append(buffer[start:end])
+
+        def on_part_end():
+            state["in_file"] = False
+
+        def on_end():
+            state["finished"] = True
+
+        parser = MultipartParser(boundary, {
+            "on_part_begin": on_part_begin,
+            "on_header_field": on_header_field,
+            "on_header_value": on_header_value,
+            "on_header_end": on_header_end,
+            "on_headers_finished": on_headers_finished,
+            "on_part_data": on_part_data,
+            "on_part_end": on_part_end,
+            "on_end": on_end,
+        })
+
+        async for chunk in self._body():
+            parser.write(chunk)
+            if data:
+                yield b"".join(data)
+                data.clear()
+        parser.finalize()
+
+        if not state["finished"]:
+            raise InvalidUploadError("Multipart body ended before its closing boundary")
+        if not state["found"]:
+            raise InvalidUploadError(f"No '{self.field_name}' file part in the upload")
+
+    async def iter_bytes(self) -> AsyncIterator[bytes]:
+        """Yield the file's bytes as they are received"""
+        content_type, options = parse_options_header(self.request.headers.get("content-type", ""))
+        if content_type == b"multipart/form-data":
+            boundary = options.get(b"boundary")
+            if not boundary:
+                raise InvalidUploadError("Multipart upload is missing its boundary")
+            async for chunk in self._multipart_file(boundary):
+                yield chunk
+            return
+
+        if content_type == b"application/x-www-form-urlencoded":
+            raise InvalidUploadError("Send the file as multipart/form-data or as the raw request body")
+
+        self.filename = self.request.query_params.get("filename") or self.request.headers.get("x-filename") or "upload.txt"
+        async for chunk in self._body():
+            yield chunk
+
+    async def iter_text(self, encoding: str = "utf-8") -> AsyncIterator[str]:
+        """Yield the file's text, decoded incrementally as bytes arrive"""
+        async for text in decode_chunks(self.iter_bytes(), encoding):
+            yield text
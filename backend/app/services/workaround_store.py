@@ -0,0 +1,185 @@
+"""
+On-demand workaround generation for analyzed sections
+"""
+import asyncio
+import hashlib
+import json
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Callable, Awaitable
+
+from app.core.config import settings
+from app.core.database import get_database
+from app.services.r2r_service import r2r_service, background_requests
+
+WorkaroundGenerator = Callable[[Dict[str, Any]], Awaitable[List[Dict[str, Any]]]]
+
+def make_workaround_handle(section_fingerprint: str, violation_details: List[str]) -> str:
+    """Handle for a section's workarounds, shared by every result with the same content and violations"""
+    payload = json.dumps({"section": section_fingerprint, "violations": violation_details}, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class WorkaroundStore:
+    """Generates workarounds when a handle is first opened and caches them.
+
+    A handle records what generation needs (section title, type, analysis and
+    violations); the workarounds are filled in on first request, or earlier by the
+    background prefetch queue. Entries are kept in an in-memory LRU and persisted
+    in MongoDB so handles stay valid across restarts and workers.
+    """
+
+    def __init__(self, collection_name: str, max_memory_entries: int, prefetch_workers: int):
+        self.collection_name = collection_name
+        self.max_memory_entries = max_memory_entries
+        self.prefetch_workers = prefetch_workers
+        # handle -> {"request": generation inputs, "workarounds": list or None until generated}
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self.registered = 0
+        self.generated = 0
+        self.hits = 0
+        self.prefetched = 0
+
+    def _collection(self):
+        db = get_database()
+        return db[self.collection_name] if db is not None else None
+
+    def _remember(self, handle: str, entry: Dict[str, Any]):
+        self._entries[handle] = entry
+        self._entries.move_to_end(handle)
+        while len(self._entries) > self.max_memory_entries:
+            self._entries.popitem(last=False)
+
+    async def register(self, handle: str, request: Dict[str, Any]):
+        """Record how to generate a handle's workarounds, keeping any already generated"""
+        if handle in self._entries:
+            self._entries.move_to_end(handle)
+            return
+
+        self._remember(handle, {"request": request, "workarounds": None})
+        self.registered += 1
+        collection = self._collection()
+        if collection is not None:
+            try:
+                await collection.update_one(
+                    {"_id": handle},
+                    {"$setOnInsert": {"request": request, "workarounds": None, "created_at": datetime.utcnow()}},
+                    upsert=True
+                )
+            except Exception as e:
+                print(f"⚠️  Failed to persist workaround handle {handle}: {e}")
+
+    async def _lookup(self, handle: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(handle)
+        if entry is not None:
+            self._entries.move_to_end(handle)
+            return entry
+
+        collection = self._collection()
+        if collection is None:
+            return None
+        try:
+            document = await collection.find_one({"_id": handle})
+        except Exception as e:
+            print(f"⚠️  Workaround lookup failed for {handle}: {e}")
+            return None
+        if document is None:
+            return None
+
+        entry = {"request": document["request"], "workarounds": document.get("workarounds")}
+        self._remember(handle, entry)
+        return entry
+
+    async def _generate(self, handle: str, entry: Dict[str, Any], generate: WorkaroundGenerator) -> List[Dict[str, Any]]:
+        try:
+            workarounds = await generate(entry["request"])
+            entry["workarounds"] = workarounds
+            self.generated += 1
+            collection = self._collection()
+            if collection is not None:
+                try:
+                    await collection.update_one(
+                        {"_id": handle},
+                        {"$set": {"workarounds": workarounds, "generated_at": datetime.utcnow()}}
+                    )
+                except Exception as e:
+                    print(f"⚠️  Failed to persist workarounds for {handle}: {e}")
+            return workarounds
+        finally:
+            self._inflight.pop(handle, None)
+
+    async def get(self, handle: str, generate: WorkaroundGenerator) -> Optional[List[Dict[str, Any]]]:
+        """Workarounds for `handle`, generating them on first use; None for an unknown handle"""
+        entry = await self._lookup(handle)
+        if entry is None:
+            return None
+        if entry["workarounds"] is not None:
+            self.hits += 1
+            return entry["workarounds"]
+
+        # Concurrent requests (and the prefetcher) share one generation
+        task = self._inflight.get(handle)
+        if task is None:
+            task = asyncio.create_task(self._generate(handle, entry, generate))
+            self._inflight[handle] = task
+        return await asyncio.shield(task)
+
+    def is_ready(self, handle: str) -> bool:
+        entry = self._entries.get(handle)
+        return entry is not None and entry["workarounds"] is not None
+
+    def prefetch(self, handle: str, generate: WorkaroundGenerator):
+        """Queue a handle for background generation once foreground R2R traffic is idle"""
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+            self._workers = [asyncio.create_task(self._prefetch_worker()) for _ in range(max(1, self.prefetch_workers))]
+        self._queue.put_nowait((handle, generate))
+
+    async def _prefetch_worker(self):
+        while True:
+            handle, generate = await self._queue.get()
+            try:
+                # Yield to analyses and on-demand requests; their R2R calls come first
+                await r2r_service.foreground_idle.wait()
+                if not self.is_ready(handle):
+                    token = background_requests.set(True)
+                    try:
+                        await self.get(handle, generate)
+                    finally:
+                        background_requests.reset(token)
+                    self.prefetched += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️  Workaround prefetch failed for {handle}: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def stop(self):
+        """Cancel the prefetch workers; queued handles are generated on demand instead"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": settings.workaround_mode,
+            "entries": len(self._entries),
+            "registered": self.registered,
+            "generated": self.generated,
+            "hits": self.hits,
+            "prefetched": self.prefetched,
+            "prefetch_queued": self._queue.qsize() if self._queue is not None else 0,
+            "in_flight": len(self._inflight)
+        }
+
+# Global workaround store instance
+workaround_store = WorkaroundStore(
+    settings.workaround_collection,
+    max_memory_entries=settings.workaround_cache_max_entries,
+    prefetch_workers=settings.workaround_prefetch_workers
+)
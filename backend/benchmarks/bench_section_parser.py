@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for parse_document_sections on synthetic documents.
+
+Compares the single-pass parser against the original line-by-line implementation
+(kept below as the reference), checks both produce the same sections, and times
+streaming the same text through IncrementalSectionParser in upload-sized chunks.
+
+    python benchmarks/bench_section_parser.py
+    python benchmarks/bench_section_parser.py --lines 10000 100000 1000000 --repeat 3
+    python benchmarks/bench_section_parser.py --memory
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+import tracemalloc
+from typing import List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.section_parser import DocumentSection, IncrementalSectionParser, parse_document_sections
+
+HEADERS = [
+    "PRODUCT FEATURES", "1. INSTANT MONEY TRANSFER", "TECHNICAL ARCHITECTURE", "RISK NOTES:",
+    "BUSINESS MODEL", "CUSTOMER ONBOARDING", "REGULATORY COMPLIANCE", "DATA HANDLING", "---",
+]
+WORDS = (
+    "the customer shall provide valid identification before any transfer and all biometric "
+    "data is stored with the partner bank for analytics while transactions above the daily "
+    "limit are reviewed by the compliance team"
+).split()
+
+def reference_parse_document_sections(document_content: str) -> List[DocumentSection]:
+    """The original line-by-line parser, used as the baseline"""
+    sections = []
+    lines = document_content.split('\n')
+
+    header_patterns = [
+        r'^[A-Z][A-Z\s]{2,}$',
+        r'^\d+\.\s*[A-Z][A-Z\s]+',
+        r'^[A-Z][A-Z\s]+:$',
+        r'^\s*[-=]{3,}\s*$',
+    ]
+
+    def classify_section_type(title: str, content: str) -> str:
+        title_lower = title.lower()
+        content_lower = content.lower()
+        if any(keyword in title_lower for keyword in ['feature', 'transfer', 'payment', 'onboarding', 'service', 'investment']):
+            return 'feature'
+        if any(keyword in title_lower for keyword in ['architecture', 'technical', 'security', 'database', 'api']):
+            return 'architecture'
+        if any(keyword in title_lower for keyword in ['compliance', 'regulatory', 'legal', 'monitoring']):
+            return 'compliance'
+        if any(keyword in title_lower for keyword in ['business', 'model', 'strategy', 'marketing', 'partnership']):
+            return 'business'
+        if any(keyword in content_lower for keyword in ['customer data', 'biometric', 'privacy', 'data sharing']):
+            return 'data_privacy'
+        return 'other'
+
+    def is_header_line(line: str) -> bool:
+        line = line.strip()
+        if not line or len(line) < 3:
+            return False
+        for pattern in header_patterns:
+            if re.match(pattern, line):
+                return True
+        return False
+
+    current_section_lines = []
+    current_title = ""
+    current_start_line = 1
+
+    for i, line in enumerate(lines, 1):
+        line_stripped = line.strip()
+        if is_header_line(line_stripped) and current_section_lines:
+            if current_title and current_section_lines:
+                section_content = '\n'.join(current_section_lines).strip()
+                if section_content:
+                    sections.append(DocumentSection(
+                        title=current_title,
+                        content=section_content,
+                        start_line=current_start_line,
+                        end_line=i - 1,
+                        section_type=classify_section_type(current_title, section_content)
+                    ))
+            current_title = line_stripped
+            current_section_lines = []
+            current_start_line = i
+        elif is_header_line(line_stripped) and not current_section_lines:
+            current_title = line_stripped
+            current_start_line = i
+        elif line_stripped:
+            current_section_lines.append(line_stripped)
+
+    if current_title and current_section_lines:
+        section_content = '\n'.join(current_section_lines).strip()
+        if section_content:
+            sections.append(DocumentSection(
+                title=current_title,
+                content=section_content,
+                start_line=current_start_line,
+                end_line=len(lines),
+                section_type=classify_section_type(current_title, section_content)
+            ))
+
+    if not sections:
+        content_lines = [line.strip() for line in lines if line.strip()]
+        if content_lines:
+            sections.append(DocumentSection(
+                title="Document Content",
+                content='\n'.join(content_lines),
+                start_line=1,
+                end_line=len(lines),
+                section_type='other'
+            ))
+
+    return sections
+
+def synthetic_document(line_count: int, seed: int = 42) -> str:
+    """A proposal-like document with a header roughly every 30 lines"""
+    rng = random.Random(seed)
+    lines = []
+    while len(lines) < line_count:
+        lines.append(rng.choice(HEADERS))
+        for _ in range(rng.randint(10, 50)):
+            if rng.random() < 0.15:
+                lines.append("")
+            else:
+                indent = "  " if rng.random() < 0.3 else ""
+                lines.append(indent + "- " + " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 16))))
+    return "\n".join(lines[:line_count])
+
+def section_key(sections: List[DocumentSection]) -> list:
+    return [(s.title, s.content, s.start_line, s.end_line, s.section_type) for s in sections]
+
+def parse_streaming(document: str, chunk_size: int) -> List[DocumentSection]:
+    parser = IncrementalSectionParser()
+    sections = []
+    for start in range(0, len(document), chunk_size):
+        sections.extend(parser.feed(document[start:start + chunk_size]))
+    sections.extend(parser.close())
+    return sections
+
+def best_time(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+def memory_usage(fn) -> Tuple[float, float]:
+    """MB still held by fn's result, and MB allocated at peak while it ran"""
+    tracemalloc.start()
+    result = fn()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return retained / 1e6, peak / 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the compliance section parser")
+    parser.add_argument("--lines", type=int, nargs="+", default=[10_000, 100_000, 1_000_000], help="Document sizes in lines")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement (best is reported)")
+    parser.add_argument("--chunk-size", type=int, default=64 * 1024, help="Characters per feed() in streaming mode")
+    parser.add_argument("--memory", action="store_true", help="Also report memory held by the parsed sections")
+    args = parser.parse_args()
+
+    print(f"{'lines':>10} {'MB':>7} {'sections':>9} {'reference':>10} {'single-pass':>12} {'streaming':>10} {'speedup':>8}")
+    for line_count in args.lines:
+        document = synthetic_document(line_count)
+
+        expected = section_key(reference_parse_document_sections(document))
+        if section_key(parse_document_sections(document)) != expected:
+            sys.exit(f"❌ Output differs from the reference parser at {line_count} lines")
+        if section_key(parse_streaming(document, args.chunk_size)) != expected:
+            sys.exit(f"❌ Streaming output differs from the reference parser at {line_count} lines")
+
+        reference = best_time(lambda: reference_parse_document_sections(document), args.repeat)
+        single_pass = best_time(lambda: parse_document_sections(document), args.repeat)
+        streaming = best_time(lambda: parse_streaming(document, args.chunk_size), args.repeat)
+        print(
+            f"{line_count:>10,} {len(document) / 1e6:>7.1f} {len(expected):>9,} "
+            f"{reference:>9.3f}s {single_pass:>11.3f}s {streaming:>9.3f}s {reference / single_pass:>7.1f}x"
+        )
+
+    if args.memory:
+        print(f"\n{'lines':>10} {'MB':>7} {'reference held/peak MB':>24} {'single-pass held/peak MB':>26}")
+        for line_count in args.lines:
+            document = synthetic_document(line_count)
+            reference_held, reference_peak = memory_usage(lambda: reference_parse_document_sections(document))
+            held, peak = memory_usage(lambda: parse_document_sections(document))
+            print(
+                f"{line_count:>10,} {len(document) / 1e6:>7.1f} "
+                f"{reference_held:>13.1f} / {reference_peak:>8.1f} {held:>15.1f} / {peak:>8.1f}"
+            )
+
+    print("✅ Outputs identical to the reference parser")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Regression checks for behaviour the load test cannot see.
+
+Fuzzes the section parser against the original implementation (whole documents
+and chunk-fed, including chunk boundaries inside header lines), checks the rule
+pre-screen, context packer and batch demultiplexer on fixed cases, and runs
+analysis checks in-process against the fake R2R (benchmarks/fake_r2r.py).
+Needs no R2R, MongoDB or LLM, and exits non-zero when any check fails.
+
+    python benchmarks/check_regressions.py
+    python benchmarks/check_regressions.py --fuzz-documents 20000 --seed 7
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+from typing import Any, Callable, List, Tuple
+
+import httpx
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARKS_DIR))
+sys.path.insert(0, BENCHMARKS_DIR)
+
+from bench_section_parser import reference_parse_document_sections, section_key, synthetic_document
+from fake_r2r import create_app
+from app.core.config import settings
+from app.core.tokens import estimate_tokens
+from app.routers.compliance import BATCH_BLOCK_PATTERN, LINE_BLOCK_PATTERN, analyze_sections, split_batch_completion
+from app.services.completion_cache import completion_cache
+from app.services.context_packer import ContextPacker, context_header, format_context
+from app.services.r2r_service import r2r_service
+from app.services.rule_screener import DECISION_COMPLIANT, DECISION_ESCALATE, DECISION_VIOLATION, RuleScreener, rule_screener
+from app.services.section_parser import IncrementalSectionParser, parse_document_sections
+from app.services.section_similarity import section_similarity_index
+
+SAMPLE_DOCUMENT = os.path.join(os.path.dirname(BENCHMARKS_DIR), "sample_product_proposal.txt")
+
+# Lines the fuzzer builds documents from: headers of every kind, near-misses and body text
+FUZZ_HEADERS = [
+    "PRODUCT FEATURES", "DATA HANDLING", "1. INSTANT MONEY TRANSFER", "2.REGULATORY APPROACH",
+    "RISK NOTES:", "---", "=====", "  TECHNICAL ARCHITECTURE  ", "\tBUSINESS MODEL", "BUSINESS MODEL\r",
+    "  - - -  ", "CUSTOMER ONBOARDING:", "A B", "ABC",
+]
+FUZZ_NEAR_MISSES = [
+    "AB", "Product Features", "PRODUCT features", "1. lower case", "RISK: notes", "--", "A1 B2",
+    "PRODUCT FEATURES.", "3.", "- - -", "ÉTÉ PLAN", "FEATURES\u00a0",
+]
+FUZZ_BODY = [
+    "Customers send money to any bank in seconds.", "  - Biometric data is shared with partners.",
+    "Loans are approved instantly.", "\tIndented line", "Line with trailing spaces   ", "x", "\r",
+]
+
+def fuzz_document(rng: random.Random) -> str:
+    lines = []
+    for _ in range(rng.randint(0, 40)):
+        roll = rng.random()
+        if roll < 0.25:
+            lines.append(rng.choice(FUZZ_HEADERS))
+        elif roll < 0.35:
+            lines.append(rng.choice(FUZZ_NEAR_MISSES))
+        elif roll < 0.5:
+            lines.append(rng.choice(["", " ", "\t", "   "]))
+        else:
+            lines.append(rng.choice(FUZZ_BODY))
+    return "\n".join(lines) + rng.choice(["", "\n", "\n\n"])
+
+def fuzz_cuts(document: str, rng: random.Random) -> List[int]:
+    """Chunk boundaries: random ones plus at least one inside a header line when there is one"""
+    cuts = {rng.randint(0, len(document)) for _ in range(rng.randint(1, 6))}
+    offset = 0
+    for line in document.split("\n"):
+        if line.strip() in {header.strip() for header in FUZZ_HEADERS} and len(line) > 1:
+            cuts.add(offset + rng.randint(1, len(line) - 1))
+        offset += len(line) + 1
+    if len(document) < 200 and rng.random() < 0.2:
+        cuts.update(range(len(document)))  # One character per feed
+    return sorted(cuts)
+
+def feed_in_chunks(document: str, cuts: List[int]) -> list:
+    parser = IncrementalSectionParser()
+    sections, start = [], 0
+    for cut in cuts + [len(document)]:
+        sections.extend(parser.feed(document[start:cut]))
+        start = cut
+    return sections + parser.close()
+
+def make_fuzz_parser_check(documents: int, seed: int) -> Callable[[], None]:
+    def check_parser_matches_reference():
+        """The parser gives the original parser's sections, fed whole or in arbitrary chunks"""
+        rng = random.Random(seed)
+        for number in range(documents):
+            document = fuzz_document(rng)
+            expected = section_key(reference_parse_document_sections(document))
+            assert section_key(parse_document_sections(document)) == expected, \
+                f"document {number} parsed whole differs: {document!r}"
+            cuts = fuzz_cuts(document, rng)
+            assert section_key(feed_in_chunks(document, cuts)) == expected, \
+                f"document {number} fed in chunks at {cuts} differs: {document!r}"
+    return check_parser_matches_reference
+
+def check_sections_share_buffers():
+    """Sections point into the text they were parsed from instead of copying it"""
+    document = synthetic_document(20_000)
+    sections = parse_document_sections(document)
+    # Only the last section, which the final scan closes, gets a buffer of its own
+    copied = [section.title for section in sections[:-1] if section.buffer is not document]
+    assert not copied, f"{len(copied)} of {len(sections)} sections copied the document"
+    assert len(sections[-1].buffer) < len(document) // 100, f"last section holds {len(sections[-1].buffer)} characters"
+
+    expected = section_key(sections)
+    for chunk_size in (4 * 1024, 64 * 1024):
+        chunked = feed_in_chunks(document, list(range(chunk_size, len(document), chunk_size)))
+        assert section_key(chunked) == expected, f"sections fed in {chunk_size}-character chunks differ"
+        assert all(0 <= section.start_offset <= section.end_offset <= len(section.buffer) for section in chunked)
+        # Each section points into its chunk, or holds its own joined text when it spans chunks
+        buffers = {id(section.buffer): len(section.buffer) for section in chunked}
+        longest = max(len(section.buffer) for section in chunked)
+        assert longest <= chunk_size + max(section.end_offset - section.start_offset for section in chunked), \
+            f"{chunk_size}-character chunks: a section holds a {longest:,}-character buffer"
+        assert sum(buffers.values()) <= 2 * len(document), \
+            f"{chunk_size}-character chunks: sections hold {sum(buffers.values()):,} characters of a {len(document):,}-character document"
+
+def check_rule_screener():
+    """Fixed texts keep their pre-screen decisions and rule hits"""
+    screener = RuleScreener(settings.prescreen_rules_file)
+    cases = [
+        ("Users can send money without identity verification.", DECISION_VIOLATION, ["AML-001"]),
+        ("Transfers can never be made without verification.", DECISION_ESCALATE, ["AML-001"]),
+        ("No KYC is needed for wallets under PHP 5,000.", DECISION_VIOLATION, ["AML-002"]),
+        ("We sell customer data to advertisers without consent.", DECISION_VIOLATION, ["DPA-003"]),
+        ("Investors receive guaranteed returns.\nNo verification is required for transfers.", DECISION_VIOLATION, ["AML-002", "SEC-001"]),
+        ("We store customer data in encrypted form.", DECISION_ESCALATE, []),
+        ("The office opens at nine and the team meets on Mondays.", DECISION_COMPLIANT, []),
+    ]
+    for text, decision, rule_ids in cases:
+        result = screener.screen(text)
+        hits = sorted(hit.rule.id for hit in result.hits)
+        assert (result.decision, hits) == (decision, rule_ids), f"{text!r}: {result.decision} {hits}, expected {decision} {rule_ids}"
+
+def check_context_packer():
+    """Packing stays best-first, within budget, deduplicated and trimmed at sentence boundaries"""
+    shared = "Covered institutions shall verify the identity of every client before any transaction."
+    chunks = [
+        {"id": "low", "score": 0.2, "text": "Fees must be disclosed before the consumer is bound. " * 40, "metadata": {"filename": "fees.pdf"}},
+        {"id": "best", "score": 0.9, "text": shared + " Records are kept for five years.", "metadata": {"filename": "aml.pdf"}},
+        {"id": "overlap", "score": 0.8, "text": shared + " Suspicious transactions are reported within five days.", "metadata": {"filename": "bsp.pdf"}},
+        {"id": "best", "score": 0.7, "text": "A repeat of the best chunk under the same id.", "metadata": {"filename": "aml.pdf"}},
+        {"id": "empty", "score": 0.95, "text": "   "},
+    ]
+    packer = ContextPacker(token_budget=150, max_chunks=5, min_chunk_tokens=10, overlap_threshold=0.8)
+    packed = packer.pack(chunks)
+
+    assert [chunk["id"] for chunk in packed] == ["best", "overlap", "low"], [chunk["id"] for chunk in packed]
+    assert packed[1]["text"] == "Suspicious transactions are reported within five days.", packed[1]["text"]
+    assert not packed[0]["trimmed"] and packed[1]["trimmed"] and packed[2]["trimmed"]
+    assert packed[2]["text"].endswith("bound."), f"trimmed mid-sentence: {packed[2]['text'][-40:]!r}"
+    used = sum(estimate_tokens(context_header(number, chunk["metadata"]["filename"])) + estimate_tokens(chunk["text"])
+               for number, chunk in enumerate(packed, 1))
+    assert used <= packer.token_budget, f"{used} tokens packed into a budget of {packer.token_budget}"
+    assert format_context(packed[:1]) == "DOCUMENT 1 (aml.pdf):\n" + shared + " Records are kept for five years."
+
+    packer = ContextPacker(token_budget=1000, max_chunks=1, min_chunk_tokens=10, overlap_threshold=0.8)
+    assert [chunk["id"] for chunk in packer.pack(chunks)] == ["best"]
+
+def check_split_batch_completion():
+    """Batched completions split into the same per-item blocks, as text or JSON"""
+    text = (
+        "Here is the analysis.\n"
+        "=== SECTION 2 ===\nSECTION_ANALYSIS: second\n"
+        "  ==SECTION 1==  \nSECTION_ANALYSIS: first\n\n"
+        "=== SECTION 2 ===\nSECTION_ANALYSIS: repeated\n"
+    )
+    blocks = split_batch_completion(text)
+    assert blocks == {2: "SECTION_ANALYSIS: second", 1: "SECTION_ANALYSIS: first"}, blocks
+    assert split_batch_completion("No markers at all") == {}
+    assert split_batch_completion("=== LINE 1 ===\nSTATUS: OK\n=== LINE 3 ===\nSTATUS: VIOLATION", LINE_BLOCK_PATTERN, "lines") == {
+        1: "STATUS: OK", 3: "STATUS: VIOLATION"
+    }
+
+    items = [{"number": 2, "section_analysis": "b"}, {"number": "1", "section_analysis": "a"}, {"number": "x"}, "junk"]
+    fenced = "```json\n" + json.dumps({"sections": items}) + "\n```"
+    assert split_batch_completion(fenced, BATCH_BLOCK_PATTERN, "sections") == {2: json.dumps(items[0]), 1: json.dumps(items[1])}
+    # A JSON object without the items array falls back to the text markers
+    assert split_batch_completion('{"lines": []}', BATCH_BLOCK_PATTERN, "sections") == {}
+
+def use_fake_r2r():
+    """Point the R2R client at an in-process fake that answers instantly"""
+    fake = create_app(search_latency="const:0", completion_latency="const:0", documents_latency="const:0")
+    r2r_service.client = httpx.AsyncClient(transport=httpx.ASGITransport(app=fake), base_url="http://fake-r2r")
+    r2r_service.base_url = "http://fake-r2r"
+    r2r_service._needs_discovery = False
+    return fake
+
+async def check_edited_section_reaches_llm():
+    """A section edited since the previous analysis is re-analyzed, not matched to its old version"""
+    fake = use_fake_r2r()
+    completion_cache.enabled = False
+    rule_screener.enabled = False
+    # Permissive enough that the index would match the edit if it were consulted
+    section_similarity_index.enabled = True
+    section_similarity_index.threshold = 0.5
+    section_similarity_index.exact_match_words = 0
+
+    document = open(SAMPLE_DOCUMENT, encoding="utf-8").read()
+    sections = parse_document_sections(document)
+    first = await analyze_sections(sections, document_name="v1.txt")
+
+    target = max(sections, key=lambda section: len(section.content))
+    sentence = target.content.split("\n")[-1]
+    edited_document = document.replace(sentence, sentence + " This does not apply to partner banks.", 1)
+    edited = parse_document_sections(edited_document)
+    edited_index = next(i for i, section in enumerate(edited) if section.title == target.title)
+    assert await section_similarity_index.find_similar(target.section_type, target.title, edited[edited_index].content) is not None, \
+        "similarity index does not match the edit, so the check proves nothing"
+
+    completions = fake.state.requests["completion"]
+    second = await analyze_sections(edited, previous_analyses=first, document_name="v2.txt")
+    result = second[edited_index]
+    assert not result["reused"] and "reusedFrom" not in result, f"edited section was reused: {result.get('reusedFrom')}"
+    assert fake.state.requests["completion"] > completions, "edited section made no completion request"
+    unchanged = [analysis for i, analysis in enumerate(second) if i != edited_index]
+    assert all(analysis["reused"] for analysis in unchanged), "unchanged sections were re-analyzed"
+
+async def run_checks(checks: List[Tuple[str, Callable[[], Any]]]) -> int:
+    failures = 0
+    for name, check in checks:
+        try:
+            result = check()
+            if asyncio.iscoroutine(result):
+                await result
+            print(f"✅ {name}")
+        except AssertionError as e:
+            failures += 1
+            print(f"❌ {name}: {e}")
+    print(f"{len(checks) - failures}/{len(checks)} checks passed")
+    return 1 if failures else 0
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Behavioural regression checks")
+    parser.add_argument("--fuzz-documents", type=int, default=3000, help="Random documents for the parser fuzz")
+    parser.add_argument("--seed", type=int, default=42, help="Seed for the parser fuzz")
+    args = parser.parse_args()
+
+    # Checks that only read state run before the ones that reconfigure global services
+    checks = [
+        ("section parser matches the original", make_fuzz_parser_check(args.fuzz_documents, args.seed)),
+        ("sections share the parsed text", check_sections_share_buffers),
+        ("rule pre-screen decisions", check_rule_screener),
+        ("context packing", check_context_packer),
+        ("batch completion splitting", check_split_batch_completion),
+        ("edited section reaches the LLM", check_edited_section_reaches_llm),
+    ]
+    return asyncio.run(run_checks(checks))
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the R2R API, for reproducible benchmarks without R2R or an LLM.
+
+Serves /openapi.json, /v3/retrieval/search, /v3/retrieval/completion and
+/v3/documents with configurable latency distributions and error rates.
+Completions follow whichever output format the prompt asks for (section,
+batched section, cascade triage, line, workaround or format re-ask; labelled text or the JSON
+schema passed as the response format), so the backend parses them as it
+would real ones.
+
+    python benchmarks/fake_r2r.py --port 7272
+    python benchmarks/fake_r2r.py --completion-latency lognormal:800:0.4 --error-rate 0.02
+    python benchmarks/fake_r2r.py --model-latency openai/gpt-4o=lognormal:900:0.4
+
+Latencies are given as DIST:PARAMS in milliseconds: const:MS, uniform:LO:HI,
+normal:MEAN:SD, lognormal:MEDIAN:SIGMA or exp:MEAN.
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import re
+import uuid
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+CHUNKS = [
+    ("RA9160.pdf", "Covered institutions shall establish and record the true identity of their clients based on official documents before any transaction."),
+    ("RA10173.pdf", "Personal information must be collected for specified and legitimate purposes and processed only with the consent of the data subject."),
+    ("BSP_Circular_706.pdf", "Money service businesses must monitor transactions and report covered and suspicious transactions to the AMLC within five working days."),
+    ("SEC_Guidelines.pdf", "No person shall sell or offer investment contracts to the public without a registration statement filed with the Commission."),
+    ("BSP_Circular_1048.pdf", "Financial service providers shall disclose fees and charges in a clear manner before the consumer is bound by any agreement."),
+]
+
+VIOLATIONS = [
+    "Transfers without identity verification breach customer identification rules (RA 9160 Sec. 9)",
+    "Sharing customer data with partners without consent breaches RA 10173 Sec. 12",
+    "Missing suspicious transaction reporting breaches BSP Circular 706",
+    "Offering guaranteed investment returns without SEC registration",
+]
+
+def latency_sampler(spec: str, rng: random.Random) -> Callable[[], float]:
+    """Parse DIST:PARAMS (milliseconds) into a function returning a delay in seconds"""
+    name, *params = spec.split(":")
+    values = [float(param) for param in params]
+    samplers = {
+        "const": (1, lambda ms: ms),
+        "uniform": (2, lambda lo, hi: rng.uniform(lo, hi)),
+        "normal": (2, lambda mean, sd: rng.gauss(mean, sd)),
+        "lognormal": (2, lambda median, sigma: rng.lognormvariate(math.log(max(median, 1e-3)), sigma)),
+        "exp": (1, lambda mean: rng.expovariate(1.0 / mean) if mean > 0 else 0.0),
+    }
+    if name not in samplers or len(values) != samplers[name][0]:
+        raise ValueError(f"Invalid latency '{spec}': use const:MS, uniform:LO:HI, normal:MEAN:SD, lognormal:MEDIAN:SIGMA or exp:MEAN")
+    sample = samplers[name][1]
+    return lambda: max(0.0, sample(*values)) / 1000.0
+
+class FakeCompletions:
+    """Builds completions in the format a prompt asks for"""
+
+    def __init__(self, rng: random.Random, violation_rate: float):
+        self.rng = rng
+        self.violation_rate = violation_rate
+
+    def violation_count(self) -> int:
+        return self.rng.randint(1, 2) if self.rng.random() < self.violation_rate else 0
+
+    def section(self, number: int = 0) -> Dict[str, Any]:
+        count = self.violation_count()
+        return {
+            "number": number,
+            "section_analysis": "The section describes practices that need regulatory review." if count else "The section follows applicable regulations.",
+            "violation_count": count,
+            "violation_details": self.rng.sample(VIOLATIONS, count),
+            "business_impact": "Fines and partner bank scrutiny" if count else "None",
+            "regulatory_risk": "BSP and AMLC enforcement" if count else "Low"
+        }
+
+    def triage(self) -> Dict[str, Any]:
+        if self.rng.random() < self.violation_rate:
+            return {"verdict": "VIOLATION", "confidence": round(self.rng.uniform(0.5, 0.95), 2), "reason": self.rng.choice(VIOLATIONS)}
+        return {"verdict": "COMPLIANT", "confidence": round(self.rng.uniform(0.6, 0.99), 2), "reason": "No applicable regulation is breached."}
+
+    def line(self, number: int = 0) -> Dict[str, Any]:
+        found = 1 if self.rng.random() < self.violation_rate else 0
+        violation = self.rng.choice(VIOLATIONS)
+        return {
+            "number": number,
+            "violations_found": found,
+            "violation_text": "without verification" if found else "",
+            "compliance_issue": violation if found else "",
+            "regulatory_source": violation.rsplit("(", 1)[-1].rstrip(")") if found else "",
+            "reason": "" if found else "No regulatory concern in this line"
+        }
+
+    @staticmethod
+    def approaches(key: str) -> Dict[str, Any]:
+        steps_key = "implementation_steps" if key == "approaches" else "steps"
+        items = []
+        for i in range(1, 4):
+            item = {
+                "title": f"Compliance approach {i}",
+                "description": "Introduce controls that address the cited violations.",
+                steps_key: ["Map the requirement", "Implement the control", "Audit quarterly"],
+            }
+            if key == "approaches":
+                item.update(regulatory_alignment="Meets the cited BSP and AMLC requirements", business_benefit="Keeps partner bank relationships")
+            else:
+                item["benefit"] = "Removes the violation at its source"
+            items.append(item)
+        return {key: items}
+
+    @staticmethod
+    def section_text(item: Dict[str, Any]) -> str:
+        details = "\n".join(f"- {detail}" for detail in item["violation_details"]) or "- None"
+        return (
+            f"SECTION_ANALYSIS: {item['section_analysis']}\nVIOLATIONS_FOUND: {item['violation_count']}\n"
+            f"VIOLATION_DETAILS:\n{details}\nBUSINESS_IMPACT: {item['business_impact']}\nREGULATORY_RISK: {item['regulatory_risk']}"
+        )
+
+    @staticmethod
+    def line_text(item: Dict[str, Any]) -> str:
+        if item["violations_found"]:
+            return (
+                f"VIOLATIONS_FOUND: 1\nVIOLATION_TEXT: {item['violation_text']}\n"
+                f"COMPLIANCE_ISSUE: {item['compliance_issue']}\nREGULATORY_SOURCE: {item['regulatory_source']}"
+            )
+        return f"VIOLATIONS_FOUND: 0\nREASON: {item['reason']}"
+
+    @staticmethod
+    def triage_text(item: Dict[str, Any]) -> str:
+        return f"VERDICT: {item['verdict']}\nCONFIDENCE: {item['confidence']}\nREASON: {item['reason']}"
+
+    @staticmethod
+    def approaches_text(data: Dict[str, Any]) -> str:
+        if "approaches" in data:
+            return "\n\n".join(
+                f"APPROACH {i}:\nTITLE: {item['title']}\nDESCRIPTION: {item['description']}\n"
+                f"IMPLEMENTATION_STEPS: {' | '.join(item['implementation_steps'])}\n"
+                f"REGULATORY_ALIGNMENT: {item['regulatory_alignment']}\nBUSINESS_BENEFIT: {item['business_benefit']}"
+                for i, item in enumerate(data["approaches"], 1)
+            )
+        return "\n\n".join(
+            f"SUGGESTION {i}:\nTITLE: {item['title']}\nDESCRIPTION: {item['description']}\n"
+            f"STEPS: {' | '.join(item['steps'])}\nBENEFIT: {item['benefit']}"
+            for i, item in enumerate(data["suggestions"], 1)
+        )
+
+    def respond(self, prompt: str, structured: bool) -> str:
+        """Completion for a prompt, as JSON when a response format was requested"""
+        if "APPROACH 1:" in prompt or '"approaches"' in prompt:
+            data = self.approaches("approaches")
+            return json.dumps(data) if structured else self.approaches_text(data)
+        if "SUGGESTION 1:" in prompt or '"suggestions"' in prompt:
+            data = self.approaches("suggestions")
+            return json.dumps(data) if structured else self.approaches_text(data)
+        if "VERDICT:" in prompt or '"verdict"' in prompt:
+            item = self.triage()
+            return json.dumps(item) if structured else self.triage_text(item)
+
+        for marker, build, to_text, key in (("SECTION", self.section, self.section_text, "sections"), ("LINE", self.line, self.line_text, "lines")):
+            count = len(re.findall(rf"^{marker} \d+:", prompt, re.MULTILINE))
+            if count and ("one block per" in prompt or f'"{key}" array' in prompt):
+                items = [build(i) for i in range(1, count + 1)]
+                if structured:
+                    return json.dumps({key: items})
+                return "\n\n".join(f"=== {marker} {item['number']} ===\n{to_text(item)}" for item in items)
+
+        item = self.section() if "SECTION_ANALYSIS" in prompt or '"section_analysis"' in prompt else self.line()
+        item.pop("number")
+        if structured:
+            return json.dumps(item)
+        return self.section_text(item) if "section_analysis" in item else self.line_text(item)
+
+def create_app(
+    search_latency: str = "lognormal:30:0.3",
+    completion_latency: str = "lognormal:250:0.35",
+    documents_latency: str = "const:10",
+    error_rate: float = 0.0,
+    error_status: int = 503,
+    violation_rate: float = 0.5,
+    seed: int = 42,
+    model_latency: str = ""
+) -> FastAPI:
+    """Build the fake R2R application.
+
+    `model_latency` ("MODEL=DIST,...") gives completions for those models their own
+    latency distribution, e.g. to compare cheap and strong tiers of a model cascade.
+    """
+    rng = random.Random(seed)
+    delays = {
+        "search": latency_sampler(search_latency, rng),
+        "completion": latency_sampler(completion_latency, rng),
+        "documents": latency_sampler(documents_latency, rng),
+    }
+    model_delays = {}
+    for entry in filter(None, (entry.strip() for entry in model_latency.split(","))):
+        model, _, spec = entry.partition("=")
+        model_delays[model.strip()] = latency_sampler(spec.strip(), rng)
+    completions = FakeCompletions(rng, violation_rate)
+    documents: Dict[str, Dict[str, Any]] = {}
+    app = FastAPI(title="Fake R2R")
+    app.state.requests = {endpoint: 0 for endpoint in delays}
+    app.state.models: Dict[str, int] = {}
+
+    async def simulate(endpoint: str, delay: Callable[[], float] = None):
+        """Wait out the sampled latency; returns an error response for injected failures"""
+        app.state.requests[endpoint] += 1
+        await asyncio.sleep((delay or delays[endpoint])())
+        if rng.random() < error_rate:
+            return JSONResponse({"detail": "Injected failure"}, status_code=error_status)
+        return None
+
+    @app.post("/v3/retrieval/search")
+    async def search(request: Request):
+        body = await request.json()
+        if (error := await simulate("search")) is not None:
+            return error
+        limit = int(body.get("search_settings", {}).get("limit") or body.get("vector_search_settings", {}).get("search_limit", 3))
+        chunks = [
+            {"id": f"chunk-{i}", "score": round(0.9 - i * 0.05, 3), "text": text, "metadata": {"filename": filename}}
+            for i, (filename, text) in enumerate(rng.sample(CHUNKS, min(limit, len(CHUNKS))))
+        ]
+        return {"results": {"chunk_search_results": chunks}}
+
+    @app.post("/v3/retrieval/completion")
+    async def completion(request: Request):
+        body = await request.json()
+        generation_config = body.get("generation_config", {})
+        model = generation_config.get("model", "")
+        app.state.models[model] = app.state.models.get(model, 0) + 1
+        if (error := await simulate("completion", model_delays.get(model))) is not None:
+            return error
+        messages = body.get("messages", [])
+        prompt = "\n".join(message.get("content", "") for message in messages)
+        structured = "response_format" in generation_config
+        content = completions.respond(prompt, structured)
+        usage = {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(content) // 4}
+        return {"results": {"choices": [{"message": {"role": "assistant", "content": content}}], "usage": usage}}
+
+    @app.post("/v3/documents")
+    async def create_document(request: Request):
+        form = await request.form()
+        if (error := await simulate("documents")) is not None:
+            return error
+        upload = form.get("file")
+        document_id = str(uuid.uuid4())
+        metadata = json.loads(form.get("metadata") or "{}")
+        documents[document_id] = {
+            "id": document_id,
+            "title": getattr(upload, "filename", None) or metadata.get("filename", "document"),
+            "metadata": metadata,
+            "created_at": datetime.utcnow().isoformat()
+        }
+        return {"results": {"message": "Ingestion task queued successfully.", "document_id": document_id}}
+
+    @app.get("/v3/documents")
+    async def list_documents(limit: int = 10, offset: int = 0):
+        if (error := await simulate("documents")) is not None:
+            return error
+        listed = list(documents.values())
+        return {"results": listed[offset:offset + limit], "total_entries": len(listed)}
+
+    @app.delete("/v3/documents/{document_id}")
+    async def delete_document(document_id: str):
+        if (error := await simulate("documents")) is not None:
+            return error
+        if documents.pop(document_id, None) is None:
+            return JSONResponse({"detail": "Document not found"}, status_code=404)
+        return {"results": {"success": True}}
+
+    @app.get("/fake/stats")
+    async def stats():
+        return {"requests": app.state.requests, "completions_by_model": app.state.models, "documents": len(documents)}
+
+    return app
+
+def add_latency_arguments(parser: argparse.ArgumentParser):
+    """Fake R2R behaviour flags, shared with the load test"""
+    parser.add_argument("--search-latency", default="lognormal:30:0.3", help="Search latency distribution (ms)")
+    parser.add_argument("--completion-latency", default="lognormal:250:0.35", help="Completion latency distribution (ms)")
+    parser.add_argument("--documents-latency", default="const:10", help="Documents endpoint latency distribution (ms)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with --error-status")
+    parser.add_argument("--error-status", type=int, default=503, help="HTTP status of injected failures")
+    parser.add_argument("--violation-rate", type=float, default=0.5, help="Fraction of sections and lines reported as violations")
+    parser.add_argument("--seed", type=int, default=42, help="Seed for latencies, errors and findings")
+    parser.add_argument("--model-latency", default="", metavar="MODEL=DIST,...", help="Per-model completion latency overrides (ms)")
+
+def latency_options(args: argparse.Namespace) -> Dict[str, Any]:
+    return {
+        "search_latency": args.search_latency,
+        "completion_latency": args.completion_latency,
+        "documents_latency": args.documents_latency,
+        "error_rate": args.error_rate,
+        "error_status": args.error_status,
+        "violation_rate": args.violation_rate,
+        "seed": args.seed,
+        "model_latency": args.model_latency,
+    }
+
+def latency_argv(options: Dict[str, Any]) -> List[str]:
+    """Command-line flags reproducing `options`"""
+    argv = []
+    for key, value in options.items():
+        argv.extend([f"--{key.replace('_', '-')}", str(value)])
+    return argv
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a fake R2R API for benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7272)
+    add_latency_arguments(parser)
+    args = parser.parse_args()
+
+    app = create_app(**latency_options(args))
+    print(f"🧪 Fake R2R on http://{args.host}:{args.port} (search {args.search_latency}, completion {args.completion_latency}, errors {args.error_rate:.1%})")
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
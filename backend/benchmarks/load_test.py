@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Load test for the backend against the fake R2R server.
+
+Starts benchmarks/fake_r2r.py and a fresh backend process per scenario, drives
+/compliance/analyze and the /rag/* routes at each concurrency level (analysis
+also at each document size, built from sample_product_proposal.txt), and
+reports throughput, p50/p95/p99 latency, error rate and the backend's peak RSS.
+
+    python benchmarks/load_test.py
+    python benchmarks/load_test.py --routes analyze --concurrency 1 4 16 --sizes 1 4 16
+    python benchmarks/load_test.py --save-baseline benchmarks/baseline.json
+    python benchmarks/load_test.py --baseline benchmarks/baseline.json
+
+With --baseline the run exits non-zero when a scenario's p50 or p95 latency, throughput,
+error rate or peak RSS regresses past the tolerances. Baselines are only
+comparable on the same machine with the same settings.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from app.services.section_parser import is_header_line
+from benchmarks.fake_r2r import add_latency_arguments, latency_options, latency_argv
+
+SAMPLE_DOCUMENT = os.path.join(BACKEND_DIR, "sample_product_proposal.txt")
+ROUTES = ("analyze", "rag-chat", "rag-search", "rag-documents")
+
+# Benchmark the request path itself: no MongoDB, no cross-request reuse, no rate limit
+BACKEND_ENV = {
+    "MONGODB_URL": "",
+    "COMPLETION_CACHE_ENABLED": "false",
+    "SIMILARITY_ENABLED": "false",
+    "ANALYSIS_RATE_LIMIT_PER_SECOND": "0",
+    "TRACE_EXPORT_FILE": "",
+}
+
+def build_document(copies: int) -> str:
+    """The sample proposal repeated `copies` times, with every section made unique"""
+    lines = open(SAMPLE_DOCUMENT, encoding="utf-8").read().splitlines()
+    parts = []
+    for copy in range(1, copies + 1):
+        for line in lines:
+            parts.append(line)
+            if copies > 1 and is_header_line(line):
+                parts.append(f"Reference: proposal copy {copy}.")
+    return "\n".join(parts)
+
+def sample_queries() -> List[str]:
+    lines = [line.strip() for line in open(SAMPLE_DOCUMENT, encoding="utf-8") if len(line.strip()) > 40]
+    return lines or ["Instant money transfers without identity verification"]
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def peak_rss_mb(pid: int) -> Optional[float]:
+    """Peak resident set size of a process (Linux only)"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+def wait_until_ready(url: str, process: subprocess.Popen, name: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            sys.exit(f"❌ {name} exited during startup (code {process.returncode})")
+        try:
+            if httpx.get(url, timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    process.terminate()
+    sys.exit(f"❌ {name} did not become ready at {url} within {timeout:.0f}s")
+
+def stop(process: subprocess.Popen):
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+def start_fake_r2r(port: int, options: Dict[str, Any], log) -> subprocess.Popen:
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(BACKEND_DIR, "benchmarks", "fake_r2r.py"), "--port", str(port), *latency_argv(options)],
+        cwd=BACKEND_DIR, stdout=log, stderr=subprocess.STDOUT
+    )
+    wait_until_ready(f"http://127.0.0.1:{port}/openapi.json", process, "Fake R2R")
+    return process
+
+def start_backend(port: int, r2r_url: str, backend_env: Dict[str, str], log) -> subprocess.Popen:
+    env = {**os.environ, **backend_env, "R2R_BASE_URL": r2r_url, "PORT": str(port), "PYTHONUNBUFFERED": "1"}
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=log, stderr=subprocess.STDOUT
+    )
+    wait_until_ready(f"http://127.0.0.1:{port}/health/", process, "Backend")
+    return process
+
+def route_request(route: str, document: str, queries: List[str], i: int) -> Dict[str, Any]:
+    """httpx request arguments for the i-th request of a scenario"""
+    if route == "analyze":
+        return {"method": "POST", "url": "/compliance/analyze", "json": {"content": document, "filename": f"bench-{i}.txt"}}
+    if route == "rag-chat":
+        return {"method": "POST", "url": "/rag/chat", "json": {"query": queries[i % len(queries)]}}
+    if route == "rag-search":
+        return {"method": "POST", "url": "/rag/search", "json": {"query": queries[i % len(queries)], "limit": 3}}
+    return {"method": "GET", "url": "/rag/documents", "params": {"limit": 10}}
+
+async def drive(base_url: str, route: str, document: str, requests: int, concurrency: int, timeout: float) -> Dict[str, Any]:
+    """Closed-loop load: `concurrency` clients issue `requests` requests in total"""
+    queries = sample_queries()
+    latencies: List[float] = []
+    errors = 0
+    next_request = 0
+
+    async def client_loop(client: httpx.AsyncClient):
+        nonlocal errors, next_request
+        while next_request < requests:
+            i = next_request
+            next_request += 1
+            started = time.perf_counter()
+            try:
+                response = await client.request(**route_request(route, document, queries, i))
+                ok = response.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            latencies.append(time.perf_counter() - started)
+            if not ok:
+                errors += 1
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+        # One warm-up request so the first measured request doesn't pay startup costs
+        await client.request(**route_request(route, document, queries, requests))
+        started = time.perf_counter()
+        await asyncio.gather(*(client_loop(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "error_rate": round(errors / len(latencies), 4) if latencies else 0.0,
+        "throughput_rps": round(len(latencies) / elapsed, 3) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+    }
+
+def scenario_key(route: str, concurrency: int, size: Optional[int]) -> str:
+    return f"{route}/c{concurrency}" + (f"/x{size}" if size is not None else "")
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]], tolerance: float, rss_tolerance: float, error_tolerance: float) -> List[str]:
+    """Regressions of `results` against `baseline`, as readable messages"""
+    regressions = []
+    for key, result in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        for percentile_key in ("p50_ms", "p95_ms"):
+            if result[percentile_key] > base[percentile_key] * (1 + tolerance):
+                regressions.append(f"{key}: {percentile_key[:3]} {result[percentile_key]:.1f}ms vs baseline {base[percentile_key]:.1f}ms")
+        if result["throughput_rps"] < base["throughput_rps"] * (1 - tolerance):
+            regressions.append(f"{key}: throughput {result['throughput_rps']:.2f}/s vs baseline {base['throughput_rps']:.2f}/s")
+        if result["error_rate"] > base["error_rate"] + error_tolerance:
+            regressions.append(f"{key}: error rate {result['error_rate']:.1%} vs baseline {base['error_rate']:.1%}")
+        if result.get("peak_rss_mb") and base.get("peak_rss_mb") and result["peak_rss_mb"] > base["peak_rss_mb"] * (1 + rss_tolerance):
+            regressions.append(f"{key}: peak RSS {result['peak_rss_mb']:.0f}MB vs baseline {base['peak_rss_mb']:.0f}MB")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the backend against a fake R2R server")
+    parser.add_argument("--routes", nargs="+", choices=ROUTES, default=list(ROUTES), help="Routes to drive")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8], help="Concurrent clients per scenario")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 4], help="Analysis document sizes, in copies of the sample proposal")
+    parser.add_argument("--requests", type=int, default=8, help="Measured requests per analysis scenario")
+    parser.add_argument("--rag-requests", type=int, default=100, help="Measured requests per /rag/* scenario")
+    parser.add_argument("--timeout", type=float, default=300.0, help="Per-request timeout in seconds")
+    parser.add_argument("--backend-env", nargs="*", default=[], metavar="KEY=VALUE", help="Extra backend settings (override the benchmark defaults)")
+    parser.add_argument("--output", help="Write the results as JSON")
+    parser.add_argument("--baseline", help="Fail on regressions against this baseline")
+    parser.add_argument("--save-baseline", help="Store the results as a baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed fractional p50, p95 and throughput regression")
+    parser.add_argument("--rss-tolerance", type=float, default=0.25, help="Allowed fractional peak RSS growth")
+    parser.add_argument("--error-tolerance", type=float, default=0.02, help="Allowed absolute error rate increase")
+    parser.add_argument("--log", help="Server log file (default: a temporary file)")
+    add_latency_arguments(parser)
+    args = parser.parse_args()
+
+    backend_env = {**BACKEND_ENV, **dict(item.split("=", 1) for item in args.backend_env)}
+    fake_options = latency_options(args)
+    settings = {"fake_r2r": fake_options, "backend_env": backend_env, "requests": args.requests, "rag_requests": args.rag_requests}
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("settings") != settings:
+            sys.exit(f"❌ {args.baseline} was recorded with different settings:\n{json.dumps(baseline.get('settings'), indent=2)}")
+
+    log_path = args.log or os.path.join(tempfile.gettempdir(), "silab_load_test.log")
+    results: Dict[str, Dict[str, Any]] = {}
+    with open(log_path, "w") as log:
+        print(f"🧪 Fake R2R: search {args.search_latency}, completion {args.completion_latency}, errors {args.error_rate:.1%}; logs in {log_path}")
+        print(f"{'scenario':<24} {'req':>5} {'err':>6} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'RSS MB':>8}")
+        for route in args.routes:
+            requests = args.requests if route == "analyze" else args.rag_requests
+            for size in (args.sizes if route == "analyze" else [None]):
+                document = build_document(size) if size is not None else ""
+                for concurrency in args.concurrency:
+                    key = scenario_key(route, concurrency, size)
+                    # Fresh servers per scenario isolate caches and peak RSS, and replay the same latency samples
+                    r2r_port, backend_port = free_port(), free_port()
+                    fake_r2r = start_fake_r2r(r2r_port, fake_options, log)
+                    try:
+                        backend = start_backend(backend_port, f"http://127.0.0.1:{r2r_port}", backend_env, log)
+                        try:
+                            result = asyncio.run(drive(f"http://127.0.0.1:{backend_port}", route, document, requests, concurrency, args.timeout))
+                            result["peak_rss_mb"] = peak_rss_mb(backend.pid)
+                        finally:
+                            stop(backend)
+                    finally:
+                        stop(fake_r2r)
+                    results[key] = result
+                    rss = f"{result['peak_rss_mb']:.0f}" if result["peak_rss_mb"] else "n/a"
+                    print(
+                        f"{key:<24} {result['requests']:>5} {result['error_rate']:>6.1%} {result['throughput_rps']:>8.2f} "
+                        f"{result['p50_ms']:>9.1f} {result['p95_ms']:>9.1f} {result['p99_ms']:>9.1f} {rss:>8}"
+                    )
+
+    report = {
+        "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "machine": f"{platform.system()} {platform.machine()}, Python {platform.python_version()}, {os.cpu_count()} CPUs",
+        "settings": settings,
+        "scenarios": results,
+    }
+    for path in filter(None, (args.output, args.save_baseline)):
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        print(f"💾 Wrote {path}")
+
+    if baseline is not None:
+        missing = sorted(set(results) - set(baseline["scenarios"]))
+        if missing:
+            print(f"⚠️  No baseline for: {', '.join(missing)}")
+        regressions = compare(results, baseline["scenarios"], args.tolerance, args.rss_tolerance, args.error_tolerance)
+        if regressions:
+            print(f"❌ {len(regressions)} regressions against {args.baseline} ({baseline.get('machine', 'unknown machine')}):")
+            for regression in regressions:
+                print(f"  - {regression}")
+            sys.exit(1)
+        print(f"✅ No regressions against {args.baseline}")
+
+if __name__ == "__main__":
+    main()
@@ -2,21 +2,72 @@
 """
 Compliance Documents RAG Ingestion Script
 Ingests compliance documents into R2R with fast ingestion mode and RAG-Fusion
+
+Documents are uploaded by a pool of concurrent workers and their R2R ingestion
+status is polled until it finishes. A manifest maps each file's content hash to
+its R2R document ID, so PDFs already in R2R are skipped on the next run and an
+interrupted run can be resumed with --resume. Only failed uploads and ingestions
+are uploaded again, unless --force re-uploads everything.
 """
 
+import argparse
 import asyncio
+import hashlib
 import os
+import time
 from pathlib import Path
 import httpx
 from datetime import datetime
 import mimetypes
 import json
 
+# R2R ingestion_status values that mean processing is over
+FINISHED_STATUSES = {"success": True, "failed": False}
+# Manifest statuses of documents R2R accepted but had not finished processing
+PENDING_STATUSES = ("uploaded", "timeout")
+
+def file_sha256(file_path: Path) -> str:
+    """Hash a file's content in chunks"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+class IngestionManifest:
+    """JSON record of content hash -> R2R document, written atomically after every change"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.documents = {}
+        self._lock = asyncio.Lock()
+        if path.exists():
+            try:
+                self.documents = json.loads(path.read_text()).get("documents", {})
+            except (OSError, ValueError) as e:
+                print(f"⚠️  Ignoring unreadable manifest {path}: {e}")
+
+    def get(self, content_hash: str):
+        return self.documents.get(content_hash)
+
+    async def record(self, content_hash: str, **fields):
+        async with self._lock:
+            entry = self.documents.setdefault(content_hash, {})
+            entry.update(fields, updated_at=datetime.utcnow().isoformat())
+            tmp_path = self.path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps({"version": 1, "documents": self.documents}, indent=2))
+            os.replace(tmp_path, self.path)
+
 class ComplianceRAGIngester:
-    def __init__(self, r2r_base_url="http://localhost:7272"):
+    def __init__(self, r2r_base_url="http://localhost:7272", workers=4, manifest_path=None,
+                 poll_interval=5.0, poll_timeout=1800.0):
         self.base_url = r2r_base_url
         self.client = httpx.AsyncClient(timeout=120.0)  # Longer timeout for large files
         self.compliance_dir = Path(__file__).parent / "Compliance Documents"
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.poll_timeout = poll_timeout
+        self.manifest = IngestionManifest(Path(manifest_path) if manifest_path else self.compliance_dir / ".ingestion_manifest.json")
         
     async def setup_collection(self):
         """Create a collection for compliance documents"""
@@ -48,7 +99,7 @@ class ComplianceRAGIngester:
             return None
     
     async def ingest_document(self, file_path: Path, collection_id=None):
-        """Ingest a single document with fast ingestion mode"""
+        """Upload a single document with fast ingestion mode; returns R2R's IDs or None"""
         try:
             print(f"📄 Ingesting: {file_path.name}")
             
@@ -97,7 +148,7 @@ class ComplianceRAGIngester:
                     print(f"  ✅ Queued for processing - Document ID: {document_id}, Task ID: {task_id}")
                 else:
                     print(f"  ✅ Ingested successfully - Document ID: {document_id}")
-                return document_id
+                return {"document_id": document_id, "task_id": task_id}
             else:
                 print(f"  ❌ Failed to ingest: {response.status_code} - {response.text[:200]}")
                 return None
@@ -106,44 +157,140 @@ class ComplianceRAGIngester:
             print(f"  ❌ Error ingesting {file_path.name}: {e}")
             return None
     
-    async def ingest_all_documents(self):
-        """Ingest all documents in the compliance directory"""
+    async def wait_for_ingestion(self, document_id: str) -> str:
+        """Poll R2R until the document's ingestion finishes; returns the final status"""
+        deadline = time.monotonic() + self.poll_timeout
+        status = "unknown"
+        while time.monotonic() < deadline:
+            try:
+                response = await self.client.get(f"{self.base_url}/v3/documents/{document_id}")
+                if response.status_code == 200:
+                    status = str(response.json().get('results', {}).get('ingestion_status', 'unknown')).lower()
+                    if status in FINISHED_STATUSES:
+                        return status
+                elif response.status_code != 404:  # 404: not registered yet
+                    print(f"  ⚠️  Status check for {document_id} returned {response.status_code}")
+            except Exception as e:
+                print(f"  ⚠️  Status check for {document_id} failed: {e}")
+            await asyncio.sleep(self.poll_interval)
+        return "timeout"
+    
+    async def track_ingestion(self, content_hash: str, file_path: Path, document_id: str):
+        """Poll a document's ingestion and record the outcome in the manifest"""
+        status = await self.wait_for_ingestion(document_id)
+        await self.manifest.record(content_hash, status=status)
+        icon = "✅" if FINISHED_STATUSES.get(status) else "❌"
+        print(f"  {icon} {file_path.name}: ingestion {status}")
+        return FINISHED_STATUSES.get(status, False)
+    
+    async def ingest_all_documents(self, resume=False, wait=True, force=False):
+        """Ingest all documents in the compliance directory concurrently.
+
+        Files whose content hash is recorded as ingested, or as uploaded and still
+        processing, are skipped; only new files and failed uploads or ingestions are
+        uploaded. With `resume`, documents left processing by an interrupted run are
+        polled. With `force`, every file is uploaded again.
+        """
         if not self.compliance_dir.exists():
             print(f"❌ Compliance Documents directory not found: {self.compliance_dir}")
             return
         
         # Get all PDF files
-        pdf_files = list(self.compliance_dir.glob("*.pdf"))
+        pdf_files = sorted(self.compliance_dir.glob("*.pdf"))
         if not pdf_files:
             print("❌ No PDF files found in Compliance Documents directory")
             return
         
-        print(f"🚀 Starting ingestion of {len(pdf_files)} compliance documents...")
+        print(f"🚀 Starting ingestion of {len(pdf_files)} compliance documents with {self.workers} workers...")
         print(f"📂 Directory: {self.compliance_dir}")
+        print(f"🧾 Manifest: {self.manifest.path}")
         
         # Setup collection
         collection_id = await self.setup_collection()
         
-        # Ingest documents
-        successful_ingestions = 0
-        failed_ingestions = 0
-        
+        started_at = time.monotonic()
+        counts = {"uploaded": 0, "skipped": 0, "pending": 0, "resumed": 0, "failed": 0}
+        uploaded_bytes = 0
+        polls = []
+        queue = asyncio.Queue()
         for pdf_file in pdf_files:
-            document_id = await self.ingest_document(pdf_file, collection_id)
-            if document_id:
-                successful_ingestions += 1
-                # Small delay to avoid overwhelming the system
-                await asyncio.sleep(1)
-            else:
-                failed_ingestions += 1
+            queue.put_nowait(pdf_file)
+        
+        async def worker():
+            nonlocal uploaded_bytes
+            while True:
+                try:
+                    pdf_file = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                
+                content_hash = await asyncio.to_thread(file_sha256, pdf_file)
+                entry = None if force else self.manifest.get(content_hash)
+                if entry and entry.get("status") == "success":
+                    counts["skipped"] += 1
+                    print(f"⏭️  Unchanged, skipping: {pdf_file.name}")
+                    continue
+                
+                # Uploading again would duplicate a document R2R is still processing
+                if entry and entry.get("document_id") and entry.get("status") in PENDING_STATUSES:
+                    if not resume:
+                        counts["pending"] += 1
+                        print(f"⏭️  Already uploaded, skipping: {pdf_file.name} (--resume to wait for it, --force to re-upload)")
+                        continue
+                    counts["resumed"] += 1
+                    print(f"♻️  Resuming status checks for: {pdf_file.name}")
+                    if wait:
+                        polls.append(asyncio.create_task(self.track_ingestion(content_hash, pdf_file, entry["document_id"])))
+                    continue
+                
+                result = await self.ingest_document(pdf_file, collection_id)
+                if not result:
+                    counts["failed"] += 1
+                    await self.manifest.record(content_hash, filename=pdf_file.name, status="upload_failed")
+                    continue
+                
+                counts["uploaded"] += 1
+                uploaded_bytes += pdf_file.stat().st_size
+                await self.manifest.record(
+                    content_hash,
+                    filename=pdf_file.name,
+                    size=pdf_file.stat().st_size,
+                    document_id=result["document_id"],
+                    task_id=result["task_id"],
+                    status="uploaded"
+                )
+                # Poll in the background so the worker can start the next upload
+                if wait:
+                    polls.append(asyncio.create_task(self.track_ingestion(content_hash, pdf_file, result["document_id"])))
+        
+        await asyncio.gather(*(worker() for _ in range(max(1, self.workers))))
+        upload_seconds = time.monotonic() - started_at
+        
+        if polls:
+            print(f"\n⏳ Waiting for R2R to finish processing {len(polls)} documents...")
+        outcomes = await asyncio.gather(*polls)
+        processed = sum(1 for ok in outcomes if ok)
+        processing_failures = len(outcomes) - processed
+        total_seconds = time.monotonic() - started_at
         
         # Summary
         print(f"\n📊 Ingestion Summary:")
-        print(f"  ✅ Successfully ingested: {successful_ingestions}")
-        print(f"  ❌ Failed ingestions: {failed_ingestions}")
+        print(f"  ✅ Uploaded: {counts['uploaded']}")
+        print(f"  ♻️  Resumed: {counts['resumed']}")
+        print(f"  ⏭️  Skipped (unchanged): {counts['skipped']}")
+        print(f"  ⏳ Skipped (uploaded, still processing): {counts['pending']}")
+        print(f"  ❌ Failed uploads: {counts['failed']}")
+        if wait:
+            print(f"  🧠 Processed by R2R: {processed} ok, {processing_failures} failed or timed out")
         print(f"  📄 Total documents processed: {len(pdf_files)}")
         
-        if successful_ingestions > 0:
+        uploaded_mb = uploaded_bytes / (1024 * 1024)
+        print(f"\n⏱️  Throughput:")
+        print(f"  Upload: {counts['uploaded'] / upload_seconds:.2f} docs/sec, {uploaded_mb / upload_seconds:.2f} MB/sec ({uploaded_mb:.1f} MB in {upload_seconds:.1f}s)")
+        if wait and outcomes:
+            print(f"  End-to-end: {processed / total_seconds:.2f} docs/sec, {uploaded_mb / total_seconds:.2f} MB/sec ({total_seconds:.1f}s)")
+        
+        if counts["uploaded"] + counts["resumed"] + counts["skipped"] + counts["pending"] > 0:
             print(f"\n🎉 RAG pipeline is ready! Documents are embedded and searchable.")
             print(f"💡 You can now query compliance documents using the /r2r/chat endpoint")
         
@@ -188,12 +335,31 @@ class ComplianceRAGIngester:
         """Close HTTP client"""
         await self.client.aclose()
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Ingest compliance documents into R2R")
+    parser.add_argument("--base-url", default=os.getenv("R2R_BASE_URL", "http://localhost:7272"), help="R2R API URL")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent uploads")
+    parser.add_argument("--manifest", default=None, help="Manifest path (default: Compliance Documents/.ingestion_manifest.json)")
+    parser.add_argument("--resume", action="store_true", help="Poll documents left unfinished by an interrupted run instead of re-uploading them")
+    parser.add_argument("--force", action="store_true", help="Upload every document again, ignoring the manifest")
+    parser.add_argument("--no-wait", action="store_true", help="Don't poll R2R ingestion status after uploading")
+    parser.add_argument("--poll-interval", type=float, default=5.0, help="Seconds between ingestion status checks")
+    parser.add_argument("--poll-timeout", type=float, default=1800.0, help="Give up waiting on a document after this many seconds")
+    return parser.parse_args()
+
 async def main():
     """Main execution function"""
+    args = parse_args()
     print("🏛️  SiLab Compliance Documents RAG Ingestion")
     print("=" * 50)
     
-    ingester = ComplianceRAGIngester()
+    ingester = ComplianceRAGIngester(
+        r2r_base_url=args.base_url,
+        workers=args.workers,
+        manifest_path=args.manifest,
+        poll_interval=args.poll_interval,
+        poll_timeout=args.poll_timeout
+    )
     
     try:
         # Check R2R health
@@ -206,7 +372,7 @@ async def main():
         print("✅ R2R service is running")
         
         # Ingest all documents
-        await ingester.ingest_all_documents()
+        await ingester.ingest_all_documents(resume=args.resume, wait=not args.no_wait, force=args.force)
         
         # Test search functionality
         await ingester.test_search()
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Rebuild the near-duplicate section index
+
+Recomputes the MinHash signature and LSH bands of every stored section from its
+content. Run this after changing SIMILARITY_NUM_PERM, SIMILARITY_BANDS or
+SIMILARITY_SHINGLE_SIZE, or after upgrading from an index keyed by section type
+alone; until then the backend skips entries built with the old parameters.
+"""
+
+import argparse
+import asyncio
+import time
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app.core.config import settings
+from app.services.section_similarity import MinHasher, rebuild_signatures
+
+async def main():
+    parser = argparse.ArgumentParser(description="Recompute stored section signatures for near-duplicate detection")
+    parser.add_argument("--num-perm", type=int, default=settings.similarity_num_perm, help="MinHash permutations per signature")
+    parser.add_argument("--bands", type=int, default=settings.similarity_bands, help="LSH bands (must divide --num-perm)")
+    parser.add_argument("--shingle-size", type=int, default=settings.similarity_shingle_size, help="Words per shingle")
+    parser.add_argument("--batch-size", type=int, default=500, help="Entries per bulk update")
+    args = parser.parse_args()
+
+    if not settings.mongodb_url:
+        print("❌ MONGODB_URL is not configured")
+        return
+
+    hasher = MinHasher(args.num_perm, args.bands, args.shingle_size)
+    client = AsyncIOMotorClient(settings.mongodb_url, serverSelectionTimeoutMS=3000)
+    collection = client[settings.db_name][settings.similarity_collection]
+
+    try:
+        await client.admin.command("ping")
+        print(f"🧬 Rebuilding {settings.db_name}.{settings.similarity_collection} with {hasher.params}")
+        started = time.time()
+        rebuilt = await rebuild_signatures(collection, hasher, batch_size=args.batch_size)
+        print(f"✅ Rebuilt {rebuilt} section signatures in {time.time() - started:.1f}s")
+        if hasher.params != MinHasher(settings.similarity_num_perm, settings.similarity_bands, settings.similarity_shingle_size).params:
+            print("💡 Update the SIMILARITY_* settings to match before restarting the backend")
+    except Exception as e:
+        print(f"❌ Rebuild failed: {e}")
+    finally:
+        client.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())